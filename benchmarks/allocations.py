@@ -0,0 +1,223 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+"""
+Measure the memory allocated by common operations, using :mod:`tracemalloc`.
+
+For each operation, two figures are reported:
+
+- the number of blocks and bytes still allocated after each call, which
+  is the size of the result;
+- the peak memory used during a call, which includes temporary objects.
+
+Usage::
+
+    # Measure the installed sipmessage.
+    python benchmarks/allocations.py
+
+    # Write the results as JSON.
+    python benchmarks/allocations.py --json
+
+    # Compare two git revisions.
+    python benchmarks/allocations.py --compare main HEAD
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from sipmessage import URI, Address, Headers, Message
+
+ITERATIONS = 1000
+
+REQUEST_BYTES = b"""INVITE sip:bob@biloxi.com SIP/2.0\r
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKnashds8\r
+Max-Forwards: 70\r
+To: Bob <sip:bob@biloxi.com>\r
+From: Alice <sip:alice@atlanta.com>;tag=1928301774\r
+Call-ID: a84b4c76e66710@pc33.atlanta.com\r
+CSeq: 314159 INVITE\r
+Contact: <sip:alice@pc33.atlanta.com>\r
+Content-Type: application/sdp\r
+Content-Length: 4\r
+\r
+v=0\n"""
+
+Result = dict[str, float]
+
+
+def headers_operations() -> Headers:
+    headers = Headers()
+    headers.add("Via", "SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKnashds8")
+    headers.add("Via", "SIP/2.0/UDP bigbox3.site3.atlanta.com")
+    headers.set("Call-ID", "a84b4c76e66710@pc33.atlanta.com")
+    headers.getlist("Via")
+    headers.get("call-id")
+    headers.remove("Via")
+    return headers
+
+
+def operations() -> dict[str, Callable[[], object]]:
+    message = Message.parse(REQUEST_BYTES)
+    return {
+        "message_parse": lambda: Message.parse(REQUEST_BYTES),
+        "headers": headers_operations,
+        "uri_parse": lambda: URI.parse("sip:alice@atlanta.com;transport=tcp"),
+        "address_parse": lambda: Address.parse(
+            '"Alice" <sip:alice@atlanta.com>;tag=1928301774'
+        ),
+        "serialize": lambda: bytes(message),
+    }
+
+
+def measure(func: Callable[[], object], iterations: int) -> Result:
+    """
+    Measure the memory allocated by `func`.
+    """
+    # Populate any caches before measuring.
+    func()
+
+    filters = [
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ]
+    tracemalloc.start()
+    try:
+        # Peak memory of a single call.
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+
+        # Memory retained by the results.
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        results = [func() for _ in range(iterations)]
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+    finally:
+        tracemalloc.stop()
+    del results
+
+    stats = after.compare_to(before, "filename")
+    return {
+        "blocks": sum(stat.count_diff for stat in stats) / iterations,
+        "bytes": sum(stat.size_diff for stat in stats) / iterations,
+        "peak": float(peak - current),
+    }
+
+
+def run(iterations: int) -> dict[str, Result]:
+    return {name: measure(func, iterations) for name, func in operations().items()}
+
+
+def run_revision(revision: str, iterations: int) -> dict[str, Result]:
+    """
+    Run the benchmarks against the given git `revision`, using a temporary
+    worktree.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        worktree = os.path.join(path, "worktree")
+        subprocess.run(
+            ["git", "worktree", "add", "--quiet", "--detach", worktree, revision],
+            check=True,
+        )
+        try:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--json",
+                    "--iterations",
+                    str(iterations),
+                ],
+                check=True,
+                env={**os.environ, "PYTHONPATH": os.path.join(worktree, "src")},
+                stdout=subprocess.PIPE,
+            ).stdout
+        finally:
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", worktree], check=True
+            )
+    results: dict[str, Result] = json.loads(output)
+    return results
+
+
+def format_table(rows: list[list[str]]) -> str:
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def report(results: dict[str, Result]) -> str:
+    rows = [["operation", "blocks", "bytes", "peak"]]
+    for name, result in results.items():
+        rows.append(
+            [name] + [f"{result[metric]:.1f}" for metric in ("blocks", "bytes", "peak")]
+        )
+    return format_table(rows)
+
+
+def compare_report(
+    old: dict[str, Result], new: dict[str, Result], old_name: str, new_name: str
+) -> str:
+    rows = [["operation", "metric", old_name, new_name, "change"]]
+    for name, result in new.items():
+        if name not in old:
+            continue
+        for metric in ("blocks", "bytes", "peak"):
+            old_value = old[name][metric]
+            new_value = result[metric]
+            change = f"{(new_value - old_value) / old_value:+.1%}" if old_value else "-"
+            rows.append([name, metric, f"{old_value:.1f}", f"{new_value:.1f}", change])
+    return format_table(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="compare two git revisions",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=ITERATIONS,
+        help="number of calls used to measure retained memory",
+    )
+    parser.add_argument("--json", action="store_true", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    output: Any
+    if args.compare:
+        old_name, new_name = args.compare
+        old = run_revision(old_name, args.iterations)
+        new = run_revision(new_name, args.iterations)
+        output = (
+            {old_name: old, new_name: new}
+            if args.json
+            else compare_report(old, new, old_name, new_name)
+        )
+    else:
+        results = run(args.iterations)
+        output = results if args.json else report(results)
+
+    sys.stdout.write(json.dumps(output, indent=2) + "\n" if args.json else output)
+
+
+if __name__ == "__main__":
+    main()
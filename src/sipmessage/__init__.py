@@ -7,25 +7,55 @@ import importlib.metadata
 
 from .address import Address
 from .auth import AuthChallenge, AuthCredentials, AuthParameters
+from .callindex import CallIndex, MessageSummary
 from .cseq import CSeq
-from .mediatype import MediaType
-from .message import Headers, Message, Request, Response
+from .digest import DigestClient, DigestServer, DigestStatus, NonceStore
+from .export import ColumnExporter, StringColumn
+from .instrumentation import Histogram, Instrumentation
+from .logfile import LogReader
+from .mediatype import AcceptMatcher, MediaType
+from .message import Headers, Message, Request, Response, ResponseTemplate
+from .multipart import BodyPart, Multipart
 from .parameters import Parameters
+from .pcap import CapturedMessage, CaptureReader
+from .sdp import Connection, MediaDescription, SessionDescription
 from .uri import URI
+from .utils import ParseError
 from .via import Via
 
 __all__ = [
+    "AcceptMatcher",
     "Address",
     "AuthChallenge",
     "AuthCredentials",
     "AuthParameters",
+    "BodyPart",
     "CSeq",
+    "CallIndex",
+    "CaptureReader",
+    "CapturedMessage",
+    "ColumnExporter",
+    "Connection",
+    "DigestClient",
+    "DigestServer",
+    "DigestStatus",
     "Headers",
+    "Histogram",
+    "Instrumentation",
+    "LogReader",
+    "MediaDescription",
     "MediaType",
     "Message",
+    "MessageSummary",
+    "Multipart",
+    "NonceStore",
     "Parameters",
+    "ParseError",
     "Request",
     "Response",
+    "ResponseTemplate",
+    "SessionDescription",
+    "StringColumn",
     "URI",
     "Via",
 ]
@@ -7,7 +7,7 @@ import dataclasses
 import re
 
 from . import grammar, utils
-from .parameters import Parameters
+from .parameters import Parameters, splice_parameters
 from .uri import URI
 
 TOKEN_LWS = grammar.cset(grammar.C_TOKEN + " ")
@@ -47,7 +47,7 @@ def unquote(value: str) -> str:
 
 
 @dataclasses.dataclass(frozen=True)
-class Address:
+class Address(utils.CachedStr):
     """
     An address as used in `Contact`, `From`, `Reply-To` and `To` headers.
     """
@@ -68,34 +68,59 @@ class Address:
 
         If parsing fails, a :class:`ValueError` is raised.
         """
-        return utils.parse_single(cls._parse_one, ADDRESS_EXCEPTION, value)
+        return utils.parse_single(cls._parse_one, ADDRESS_EXCEPTION, "Address", value)
 
     @classmethod
-    def parse_many(cls, value: str) -> "list[Address]":
+    def parse_many(
+        cls, value: str, errors: list[utils.ParseError] | None = None
+    ) -> "list[Address]":
         """
         Parse the given string into a list of :class:`Address` instances.
 
+        If parsing fails, a :class:`ValueError` is raised. If `errors` is
+        a list, invalid elements are skipped instead, and their errors are
+        appended to it.
+        """
+        return utils.parse_many(
+            cls._parse_one, ADDRESS_EXCEPTION, "Address", value, errors
+        )
+
+    @classmethod
+    def splice_parameters(cls, value: str, **changes: str | None) -> str:
+        """
+        Update the parameters of the first address in the given header value,
+        returning the new header value.
+
+        Only the parameters are modified, the remainder of the header value,
+        including any further address, is kept verbatim.
+
         If parsing fails, a :class:`ValueError` is raised.
         """
-        return utils.parse_many(cls._parse_one, ADDRESS_EXCEPTION, value)
+        value = grammar.simplify_whitespace(value)
+        return splice_parameters(value, cls._match(value), changes)
 
     @classmethod
-    def _parse_one(cls, value: str) -> "tuple[Address, str]":
+    def _match(cls, value: str) -> "re.Match[str]":
         for pattern in ADDRESS_PATTERNS:
             m = pattern.match(value)
             if m:
-                return (
-                    cls(
-                        uri=URI.parse(m.group("uri")),
-                        name=unquote(m.group("name").strip()),
-                        parameters=Parameters.parse(m.group("parameters")),
-                    ),
-                    value[m.end() :],
-                )
+                return m
         else:
             raise ADDRESS_EXCEPTION
 
-    def __str__(self) -> str:
+    @classmethod
+    def _parse_one(cls, value: str) -> "tuple[Address, str]":
+        m = cls._match(value)
+        return (
+            cls(
+                uri=URI.parse(m.group("uri")),
+                name=unquote(m.group("name").strip()),
+                parameters=Parameters.parse(m.group("parameters")),
+            ),
+            value[m.end() :],
+        )
+
+    def _render(self) -> str:
         s = ""
         if self.name:
             s += quote(self.name) + " "
@@ -7,28 +7,36 @@ import dataclasses
 import re
 from collections.abc import Iterator, Mapping
 
-from . import grammar
+from . import grammar, utils
 from .address import quote, unquote
 
-AUTH_CHALLENGE_PATTERN = re.compile(
-    f"^(?P<scheme>{grammar.TOKEN}){grammar.LWS}"
-    f"(?P<parameters>{grammar.AUTH_PARAM}(?:{grammar.COMMA}{grammar.AUTH_PARAM})*)"
-    "$"
+AUTH_CHALLENGE_EXCEPTION = ValueError("AuthChallenge is not valid")
+AUTH_CREDENTIALS_EXCEPTION = ValueError("AuthCredentials are not valid")
+AUTH_PARAMETERS_EXCEPTION = ValueError("AuthParameters are not valid")
+AUTH_PARAM_PATTERN = re.compile(
+    f"(?P<key>{grammar.TOKEN}){grammar.EQUAL}"
+    f"(?:(?P<token>{grammar.TOKEN})|(?P<quoted>{grammar.QUOTED_STRING})){grammar.SWS}"
 )
-AUTH_CREDENTIALS_PATTERN = re.compile(
-    f"^(?P<scheme>{grammar.TOKEN}){grammar.LWS}"
-    f"(?P<parameters>(?:{grammar.TOKEN}|{grammar.AUTH_PARAM}(?:{grammar.COMMA}{grammar.AUTH_PARAM})*))"
-    "$"
-)
-
-COMMA_PATTERN = re.compile(f"{grammar.SWS}{grammar.COMMA}{grammar.SWS}")
-EQUAL_PATTERN = re.compile(f"{grammar.SWS}{grammar.EQUAL}{grammar.SWS}")
+AUTH_SCHEME_PATTERN = re.compile(f"(?P<scheme>{grammar.TOKEN}){grammar.LWS}")
 TOKEN_PATTERN = re.compile("^" + grammar.TOKEN + "$")
 
 QUOTED_PARAMETERS = frozenset(
     ["cnonce", "domain", "nonce", "opaque", "qop", "realm", "response", "username"]
 )
 
+# In credentials, `qop` is a single token rather than a quoted list.
+#
+# :rfc:`7616#section-3.4`
+CREDENTIALS_QUOTED_PARAMETERS = QUOTED_PARAMETERS - {"qop"}
+
+
+def auth_error(exc: ValueError, expected: str, pos: int) -> utils.ParseError:
+    """
+    Build the error raised when parsing the `expected` production fails
+    at `pos`.
+    """
+    return utils.ParseError(str(exc), expected=expected, offset=pos)
+
 
 def maybe_quote(v: str, force_quote: bool) -> str:
     if TOKEN_PATTERN.match(v) and not force_quote:
@@ -37,7 +45,7 @@ def maybe_quote(v: str, force_quote: bool) -> str:
         return quote(v)
 
 
-class AuthParameters(Mapping[str, str]):
+class AuthParameters(utils.CachedStr, Mapping[str, str]):
     """
     A mapping of :class:`AuthChallenge` or :class:`AuthCredentials` parameters.
     """
@@ -52,19 +60,43 @@ class AuthParameters(Mapping[str, str]):
 
         If parsing fails, a :class:`ValueError` is raised.
         """
+        value = value.rstrip()
+        pos = len(value) - len(value.lstrip())
+        if pos < len(value):
+            return cls._parse(value, pos, AUTH_PARAMETERS_EXCEPTION, "AuthParameters")
+        else:
+            return cls()
+
+    @classmethod
+    def _parse(
+        cls, value: str, pos: int, exc: ValueError, expected: str
+    ) -> "AuthParameters":
+        """
+        Parse the comma-separated parameters starting at `pos` up to the end
+        of `value`, validating and extracting them in a single pass.
+        """
         data: dict[str, str] = {}
-        value = value.strip()
-        if value:
-            bits = COMMA_PATTERN.split(value)
+        end = len(value)
+        while True:
+            m = AUTH_PARAM_PATTERN.match(value, pos)
+            if m is None:
+                raise auth_error(exc, expected, pos)
+
+            token = m.group("token")
+            data[m.group("key")] = (
+                token if token is not None else unquote(m.group("quoted"))
+            )
 
-            for bit in bits:
-                # Empty parameters are not allowed.
-                if "=" not in bit:
-                    raise ValueError("AuthParameters are not valid")
+            pos = m.end()
+            if pos == end:
+                return cls(**data)
+            elif value[pos] != ",":
+                raise auth_error(exc, expected, pos)
 
-                k, v = EQUAL_PATTERN.split(bit, 1)
-                data[unquote(k)] = unquote(v)
-        return cls(**data)
+            # Skip the separator and any whitespace following it.
+            pos += 1
+            while pos < end and value[pos] == " ":
+                pos += 1
 
     def replace(self, **changes: str) -> "AuthParameters":
         """
@@ -92,16 +124,19 @@ class AuthParameters(Mapping[str, str]):
             data += f"{k}={v!r}"
         return f"AuthParameters({data})"
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
+        return self._render_quoted(QUOTED_PARAMETERS)
+
+    def _render_quoted(self, quoted_parameters: frozenset[str]) -> str:
         bits = [
-            k + "=" + maybe_quote(v, force_quote=k in QUOTED_PARAMETERS)
+            k + "=" + maybe_quote(v, force_quote=k in quoted_parameters)
             for (k, v) in self.items()
         ]
         return ", ".join(bits)
 
 
 @dataclasses.dataclass(frozen=True)
-class AuthChallenge:
+class AuthChallenge(utils.CachedStr):
     """
     A `WWW-Authenticate` or `Proxy-Authenticate` header, used to convey
     an authentication challenge.
@@ -120,16 +155,18 @@ class AuthChallenge:
 
         If parsing fails, a :class:`ValueError` is raised.
         """
-        m = AUTH_CHALLENGE_PATTERN.match(value)
+        m = AUTH_SCHEME_PATTERN.match(value)
         if m is None:
-            raise ValueError("AuthChallenge is not valid")
+            raise auth_error(AUTH_CHALLENGE_EXCEPTION, "AuthChallenge", 0)
 
         return cls(
             scheme=m.group("scheme"),
-            parameters=AuthParameters.parse(m.group("parameters")),
+            parameters=AuthParameters._parse(
+                value, m.end(), AUTH_CHALLENGE_EXCEPTION, "AuthChallenge"
+            ),
         )
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         s = self.scheme.title()
         if self.parameters:
             s += " " + str(self.parameters)
@@ -137,7 +174,7 @@ class AuthChallenge:
 
 
 @dataclasses.dataclass(frozen=True)
-class AuthCredentials:
+class AuthCredentials(utils.CachedStr):
     """
     An `Authorization`, `Proxy-Authorization` header, used to convey
     authentication credentials.
@@ -159,30 +196,33 @@ class AuthCredentials:
 
         If parsing fails, a :class:`ValueError` is raised.
         """
-        m = AUTH_CREDENTIALS_PATTERN.match(value)
+        m = AUTH_SCHEME_PATTERN.match(value)
         if m is None:
-            raise ValueError("AuthCredentials are not valid")
+            raise auth_error(AUTH_CREDENTIALS_EXCEPTION, "AuthCredentials", 0)
 
-        if TOKEN_PATTERN.match(m.group("parameters")):
+        rest = value[m.end() :]
+        if TOKEN_PATTERN.match(rest):
             return cls(
                 scheme=m.group("scheme"),
                 parameters=None,
-                token=m.group("parameters"),
+                token=rest,
             )
         else:
             return cls(
                 scheme=m.group("scheme"),
-                parameters=AuthParameters.parse(m.group("parameters")),
+                parameters=AuthParameters._parse(
+                    value, m.end(), AUTH_CREDENTIALS_EXCEPTION, "AuthCredentials"
+                ),
             )
 
     def __post_init__(self) -> None:
         if (self.parameters is None) == (self.token is None):
             raise ValueError("Exactly one of `parameters` or `token` must be set.")
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         s = self.scheme.title()
         if self.token:
             s += " " + self.token
         elif self.parameters:
-            s += " " + str(self.parameters)
+            s += " " + self.parameters._render_quoted(CREDENTIALS_QUOTED_PARAMETERS)
         return s
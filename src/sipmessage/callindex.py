@@ -0,0 +1,170 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import array
+import dataclasses
+import mmap
+import re
+from collections.abc import Iterator
+
+SUMMARY_EXCEPTION = ValueError("SIP message headers are not valid for indexing")
+
+# Header lines used to group messages, including their compact forms.
+SUMMARY_HEADER_PATTERN = re.compile(
+    rb"^(call-id|i|cseq|from|f|to|t)[ \t]*:[ \t]*([^\r\n]*?)[ \t]*\r?$",
+    re.IGNORECASE | re.MULTILINE,
+)
+TAG_PATTERN = re.compile(rb";[ \t]*tag[ \t]*=[ \t]*([^;, \t]+)", re.IGNORECASE)
+
+SUMMARY_HEADER_NAMES = {
+    b"call-id": "call_id",
+    b"i": "call_id",
+    b"cseq": "cseq",
+    b"from": "from",
+    b"f": "from",
+    b"to": "to",
+    b"t": "to",
+}
+
+
+def extract_tag(value: bytes) -> str | None:
+    """
+    Extract the `tag` parameter from a raw `From` or `To` header value,
+    without parsing the address.
+    """
+    # Parameters inside angle brackets belong to the URI.
+    pos = value.rfind(b">")
+    m = TAG_PATTERN.search(value, pos + 1)
+    return m.group(1).decode("utf8", "replace") if m else None
+
+
+@dataclasses.dataclass(frozen=True)
+class MessageSummary:
+    """
+    The fields of a SIP message used to group it into calls and dialogs.
+    """
+
+    call_id: str
+    "The `Call-ID` header value."
+
+    cseq: int
+    "The `CSeq` sequence number."
+
+    method: str
+    "The `CSeq` method."
+
+    from_tag: str | None
+    "The `tag` parameter of the `From` header."
+
+    to_tag: str | None
+    "The `tag` parameter of the `To` header."
+
+    @classmethod
+    def parse(
+        cls, data: bytes | mmap.mmap, start: int = 0, end: int | None = None
+    ) -> "MessageSummary":
+        """
+        Extract the summary of the raw message in `data[start:end]`.
+
+        Only the `Call-ID`, `CSeq`, `From` and `To` header lines are
+        examined, and their values are not fully parsed.
+
+        If any of these headers is missing, a :class:`ValueError` is raised.
+        """
+        if end is None:
+            end = len(data)
+
+        # Only look at the header section.
+        header_end = data.find(b"\r\n\r\n", start, end)
+        if header_end != -1:
+            end = header_end + 2
+
+        values: dict[str, bytes] = {}
+        for m in SUMMARY_HEADER_PATTERN.finditer(data, start, end):
+            values.setdefault(SUMMARY_HEADER_NAMES[m.group(1).lower()], m.group(2))
+
+        try:
+            sequence, method = values["cseq"].split()
+            return cls(
+                call_id=values["call_id"].decode("utf8", "replace"),
+                cseq=int(sequence),
+                method=method.decode("utf8", "replace"),
+                from_tag=extract_tag(values["from"]),
+                to_tag=extract_tag(values["to"]),
+            )
+        except (KeyError, ValueError):
+            raise SUMMARY_EXCEPTION
+
+    @property
+    def dialog_id(self) -> tuple[str, str, str]:
+        """
+        A key identifying the dialog, which is the same for messages
+        sent in either direction.
+
+        Messages sent before the remote tag is known, such as an initial
+        `INVITE`, have an empty tag in their key.
+
+        :rfc:`3261#section-12`
+        """
+        tags = sorted([self.from_tag or "", self.to_tag or ""])
+        return (self.call_id, tags[0], tags[1])
+
+
+class CallIndex:
+    """
+    An in-memory index grouping the positions of messages in a trace,
+    for instance the indices of a :class:`LogReader`, by call and dialog.
+
+    Positions are stored in compact arrays, in the order they were added.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, array.array[int]] = {}
+        self._dialogs: dict[str, dict[tuple[str, str, str], array.array[int]]] = {}
+
+    def add(self, position: int, summary: MessageSummary) -> None:
+        """
+        Add the message at `position` with the given `summary`.
+        """
+        calls = self._calls.get(summary.call_id)
+        if calls is None:
+            calls = self._calls[summary.call_id] = array.array("Q")
+            self._dialogs[summary.call_id] = {}
+        calls.append(position)
+
+        dialog_id = summary.dialog_id
+        dialogs = self._dialogs[summary.call_id]
+        positions = dialogs.get(dialog_id)
+        if positions is None:
+            positions = dialogs[dialog_id] = array.array("Q")
+        positions.append(position)
+
+    def call(self, call_id: str) -> "array.array[int]":
+        """
+        Return the positions of the messages with the given `call_id`.
+        """
+        return self._calls.get(call_id, array.array("Q"))
+
+    def call_ids(self) -> Iterator[str]:
+        """
+        Iterate over the indexed `Call-ID` values.
+        """
+        return iter(self._calls)
+
+    def dialog(self, dialog_id: tuple[str, str, str]) -> "array.array[int]":
+        """
+        Return the positions of the messages with the given
+        :attr:`MessageSummary.dialog_id`.
+        """
+        return self._dialogs.get(dialog_id[0], {}).get(dialog_id, array.array("Q"))
+
+    def dialog_ids(self, call_id: str) -> list[tuple[str, str, str]]:
+        """
+        Return the dialog identifiers for the given `call_id`.
+        """
+        return list(self._dialogs.get(call_id, {}))
+
+    def __len__(self) -> int:
+        return len(self._calls)
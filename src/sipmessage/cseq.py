@@ -6,7 +6,7 @@
 import dataclasses
 import re
 
-from . import grammar
+from . import grammar, utils
 
 CSEQ_PATTERN = re.compile(
     f"^(?P<sequence>{grammar.DIGIT}+){grammar.LWS}(?P<method>{grammar.TOKEN})$"
@@ -14,7 +14,7 @@ CSEQ_PATTERN = re.compile(
 
 
 @dataclasses.dataclass(frozen=True)
-class CSeq:
+class CSeq(utils.CachedStr):
     """
     A `CSeq` header, used to identity and order transactions.
     """
@@ -32,7 +32,6 @@ class CSeq:
 
         If parsing fails, a :class:`ValueError` is raised.
         """
-        pass
         value = grammar.simplify_whitespace(value)
 
         m = CSEQ_PATTERN.match(value)
@@ -41,5 +40,5 @@ class CSeq:
 
         return cls(sequence=int(m.group("sequence")), method=m.group("method"))
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         return f"{self.sequence} {self.method}"
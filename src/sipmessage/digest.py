@@ -0,0 +1,365 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import collections
+import enum
+import hashlib
+import hmac
+import secrets
+import time
+from collections.abc import Callable
+
+from .auth import AuthChallenge, AuthCredentials, AuthParameters
+
+# Map digest algorithm names to hashlib names.
+#
+# :rfc:`8760#section-2`
+HASHES = {
+    "MD5": "md5",
+    "SHA-256": "sha256",
+    "SHA-512-256": "sha512_256",
+}
+
+
+def _hash(algorithm: str, data: str | bytes) -> str:
+    try:
+        name = HASHES[algorithm.upper().removesuffix("-SESS")]
+    except KeyError:
+        raise ValueError(f"Digest algorithm {algorithm!r} is not supported")
+    if isinstance(data, str):
+        data = data.encode("utf8")
+    return hashlib.new(name, data).hexdigest()
+
+
+def compute_ha1(algorithm: str, username: str, realm: str, password: str) -> str:
+    """
+    Compute the `HA1` value for the given credentials.
+
+    :rfc:`7616#section-3.4.2`
+    """
+    return _hash(algorithm, f"{username}:{realm}:{password}")
+
+
+def compute_response(
+    *,
+    algorithm: str,
+    ha1: str,
+    method: str,
+    uri: str,
+    nonce: str,
+    qop: str | None = None,
+    nc: str | None = None,
+    cnonce: str | None = None,
+    body: bytes = b"",
+) -> str:
+    """
+    Compute the `response` value of a digest authentication.
+
+    If `qop` is `"auth"` or `"auth-int"`, the `nc` and `cnonce` values
+    must be given. For `"auth-int"`, the hash of the `body` is included.
+
+    :rfc:`7616#section-3.4.1`
+    """
+    if algorithm.upper().endswith("-SESS"):
+        ha1 = _hash(algorithm, f"{ha1}:{nonce}:{cnonce}")
+
+    if qop == "auth-int":
+        ha2 = _hash(algorithm, f"{method}:{uri}:{_hash(algorithm, body)}")
+    else:
+        ha2 = _hash(algorithm, f"{method}:{uri}")
+
+    if qop is None:
+        return _hash(algorithm, f"{ha1}:{nonce}:{ha2}")
+    elif qop in ("auth", "auth-int"):
+        return _hash(algorithm, f"{ha1}:{nonce}:{nc}:{cnonce}:{qop}:{ha2}")
+    else:
+        raise ValueError(f"Digest qop {qop!r} is not supported")
+
+
+class DigestStatus(enum.Enum):
+    """
+    The outcome of verifying digest credentials.
+    """
+
+    VALID = "valid"
+    "The credentials are valid."
+
+    INVALID = "invalid"
+    "The credentials are invalid, or the nonce was replayed."
+
+    STALE = "stale"
+    "The credentials are valid, but the nonce is unknown or has expired."
+
+
+class NonceStore:
+    """
+    A server-side store of issued nonces, which tracks nonce counts to
+    detect replays and expires nonces after `lifetime` seconds.
+    """
+
+    def __init__(
+        self, lifetime: float = 300.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.lifetime = lifetime
+        self._clock = clock
+        # Nonces are issued in order, so they also expire in order.
+        self._nonces: collections.OrderedDict[str, tuple[float, int]] = (
+            collections.OrderedDict()
+        )
+
+    def create(self) -> str:
+        """
+        Issue a new nonce.
+        """
+        now = self._clock()
+        self._expire(now)
+        nonce = secrets.token_hex(16)
+        self._nonces[nonce] = (now + self.lifetime, 0)
+        return nonce
+
+    def check(self, nonce: str, nc: str | None) -> DigestStatus:
+        """
+        Check a `nonce` presented by a client with the given nonce count.
+
+        If `nc` is given, it must be greater than any count previously seen
+        for this nonce. If `nc` is `None`, no replay detection is possible.
+        """
+        self._expire(self._clock())
+        try:
+            expires, last_nc = self._nonces[nonce]
+        except KeyError:
+            return DigestStatus.STALE
+
+        if nc is not None:
+            try:
+                count = int(nc, 16)
+            except ValueError:
+                return DigestStatus.INVALID
+            if count <= last_nc:
+                return DigestStatus.INVALID
+            self._nonces[nonce] = (expires, count)
+
+        return DigestStatus.VALID
+
+    def _expire(self, now: float) -> None:
+        while self._nonces:
+            nonce, (expires, _nc) = next(iter(self._nonces.items()))
+            if expires > now:
+                break
+            del self._nonces[nonce]
+
+    def __len__(self) -> int:
+        return len(self._nonces)
+
+
+class DigestClient:
+    """
+    Computes :class:`AuthCredentials` in response to digest challenges.
+
+    Nonce counts are tracked per realm, so successive requests reusing
+    the same nonce carry increasing `nc` values. `HA1` values are cached
+    per username, realm and algorithm.
+    """
+
+    def __init__(self, username: str, password: str) -> None:
+        self.username = username
+        self.password = password
+        self._nonce_counts: dict[str, tuple[str, int]] = {}
+
+    @property
+    def password(self) -> str:
+        """
+        The user's password.
+        """
+        return self._password
+
+    @password.setter
+    def password(self, value: str) -> None:
+        self._password = value
+        self._ha1_cache: dict[tuple[str, str, str], str] = {}
+
+    def authorize(
+        self, challenge: AuthChallenge, method: str, uri: str, body: bytes = b""
+    ) -> AuthCredentials:
+        """
+        Compute the credentials answering the `challenge` for a request
+        with the given `method`, request `uri` and `body`.
+
+        If the challenge offers both `auth` and `auth-int` protection,
+        `auth` is used.
+
+        If the challenge is not a digest challenge, a :class:`ValueError`
+        is raised.
+        """
+        params = challenge.parameters
+        if challenge.scheme.lower() != "digest" or "nonce" not in params:
+            raise ValueError("AuthChallenge is not a digest challenge")
+
+        algorithm = params.get("algorithm", "MD5")
+        realm = params.get("realm", "")
+        nonce = params["nonce"]
+
+        offered_qop = [x.strip() for x in params.get("qop", "").split(",")]
+        qop: str | None
+        if "auth" in offered_qop:
+            qop = "auth"
+        elif "auth-int" in offered_qop:
+            qop = "auth-int"
+        else:
+            qop = None
+
+        nc: str | None = None
+        cnonce: str | None = None
+        if qop is not None:
+            last_nonce, count = self._nonce_counts.get(realm, (nonce, 0))
+            count = count + 1 if last_nonce == nonce else 1
+            self._nonce_counts[realm] = (nonce, count)
+
+            nc = f"{count:08x}"
+            cnonce = secrets.token_hex(8)
+
+        key = (self.username, realm, algorithm)
+        ha1 = self._ha1_cache.get(key)
+        if ha1 is None:
+            ha1 = self._ha1_cache[key] = compute_ha1(
+                algorithm, self.username, realm, self.password
+            )
+
+        response = compute_response(
+            algorithm=algorithm,
+            ha1=ha1,
+            method=method,
+            uri=uri,
+            nonce=nonce,
+            qop=qop,
+            nc=nc,
+            cnonce=cnonce,
+            body=body,
+        )
+
+        data = {
+            "username": self.username,
+            "realm": realm,
+            "nonce": nonce,
+            "uri": uri,
+            "response": response,
+        }
+        if "algorithm" in params:
+            data["algorithm"] = algorithm
+        if qop is not None:
+            assert nc is not None and cnonce is not None
+            data.update(cnonce=cnonce, nc=nc, qop=qop)
+        if "opaque" in params:
+            data["opaque"] = params["opaque"]
+
+        return AuthCredentials(
+            scheme=challenge.scheme, parameters=AuthParameters(**data)
+        )
+
+
+class DigestServer:
+    """
+    Issues digest challenges for a `realm` and verifies the resulting
+    :class:`AuthCredentials`.
+
+    The `qop` is a comma-separated list of the quality of protection
+    values offered to clients, or `None` to use :rfc:`2069` compatibility.
+
+    Servers verifying many credentials should store the `HA1` of each user,
+    as returned by :func:`compute_ha1`, and pass it to :meth:`verify`
+    instead of the password. This avoids both hashing the password for
+    each request and storing plaintext passwords.
+    """
+
+    def __init__(
+        self,
+        realm: str,
+        algorithm: str = "MD5",
+        qop: str | None = "auth",
+        nonces: NonceStore | None = None,
+    ) -> None:
+        self.realm = realm
+        self.algorithm = algorithm
+        self.qop = qop
+        self.nonces = nonces if nonces is not None else NonceStore()
+
+    def challenge(self, stale: bool = False) -> AuthChallenge:
+        """
+        Create a new challenge, with a freshly issued nonce.
+
+        If `stale` is `True`, the challenge tells the client that its
+        previous nonce expired but its credentials were correct.
+        """
+        data = {
+            "realm": self.realm,
+            "nonce": self.nonces.create(),
+            "algorithm": self.algorithm,
+        }
+        if self.qop is not None:
+            data["qop"] = self.qop
+        if stale:
+            data["stale"] = "TRUE"
+        return AuthChallenge(scheme="Digest", parameters=AuthParameters(**data))
+
+    def verify(
+        self,
+        credentials: AuthCredentials,
+        method: str,
+        password: str | None = None,
+        body: bytes = b"",
+        ha1: str | None = None,
+    ) -> DigestStatus:
+        """
+        Verify the `credentials` presented for a request with the given
+        `method` and `body`.
+
+        Either the user's `password` or their precomputed `ha1` must be
+        given.
+        """
+        if (password is None) == (ha1 is None):
+            raise ValueError("Exactly one of `password` or `ha1` must be set.")
+
+        params = credentials.parameters
+        if (
+            credentials.scheme.lower() != "digest"
+            or params is None
+            or params.get("realm") != self.realm
+            or params.get("algorithm", "MD5").upper() != self.algorithm.upper()
+        ):
+            return DigestStatus.INVALID
+
+        qop = params.get("qop")
+        if self.qop is None:
+            if qop is not None:
+                return DigestStatus.INVALID
+        elif qop not in [x.strip() for x in self.qop.split(",")]:
+            return DigestStatus.INVALID
+
+        try:
+            nonce = params["nonce"]
+            nc = params["nc"] if qop is not None else None
+            if ha1 is None:
+                assert password is not None
+                ha1 = compute_ha1(
+                    self.algorithm, params["username"], self.realm, password
+                )
+            expected = compute_response(
+                algorithm=self.algorithm,
+                ha1=ha1,
+                method=method,
+                uri=params["uri"],
+                nonce=nonce,
+                qop=qop,
+                nc=nc,
+                cnonce=params["cnonce"] if qop is not None else None,
+                body=body,
+            )
+        except KeyError:
+            return DigestStatus.INVALID
+
+        if not hmac.compare_digest(expected, params.get("response", "")):
+            return DigestStatus.INVALID
+
+        return self.nonces.check(nonce, nc)
@@ -0,0 +1,238 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import array
+import csv
+import json
+import sys
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, BinaryIO, TextIO, overload
+
+from .address import Address
+from .cseq import CSeq
+from .message import Request, Response
+from .via import Via
+
+BINARY_HEADER = b"sipmessage-columns 1\n"
+BINARY_EXCEPTION = ValueError("Column file is not valid")
+
+
+class StringColumn(Sequence[str]):
+    """
+    A column of strings, stored as an array of codes into a list of
+    distinct values.
+    """
+
+    def __init__(self) -> None:
+        self.codes = array.array("L")
+        "The code of each row, which is an index into :attr:`values`."
+
+        self.values: list[str] = []
+        "The distinct values, in order of first appearance."
+
+        self._lookup: dict[str, int] = {}
+
+    def append(self, value: str) -> None:
+        """
+        Append a value to the column.
+        """
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self.values[code] for code in self.codes[index]]
+        return self.values[self.codes[index]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def _call_id(message: Request | Response, timestamp: float) -> str:
+    return message.headers.get("Call-ID", "") or ""
+
+
+def _code(message: Request | Response, timestamp: float) -> int:
+    return message.code if isinstance(message, Response) else 0
+
+
+def _cseq(message: Request | Response, timestamp: float) -> int:
+    value = message.headers.get("CSeq")
+    return CSeq.parse(value).sequence if value else 0
+
+
+def _from_user(message: Request | Response, timestamp: float) -> str:
+    value = message.headers.get("From")
+    return (Address.parse(value).uri.user or "") if value else ""
+
+
+def _method(message: Request | Response, timestamp: float) -> str:
+    if isinstance(message, Request):
+        return message.method
+    value = message.headers.get("CSeq")
+    return CSeq.parse(value).method if value else ""
+
+
+def _timestamp(message: Request | Response, timestamp: float) -> float:
+    return timestamp
+
+
+def _to_user(message: Request | Response, timestamp: float) -> str:
+    value = message.headers.get("To")
+    return (Address.parse(value).uri.user or "") if value else ""
+
+
+def _via_host(message: Request | Response, timestamp: float) -> str:
+    values = message.headers.getlist("Via")
+    return Via.parse_many(values[0])[0].host if values else ""
+
+
+# The supported columns, with their array type code, or `None` for
+# string columns, and the function extracting their value.
+COLUMNS: dict[str, tuple[str | None, Callable[[Request | Response, float], Any]]] = {
+    "timestamp": ("d", _timestamp),
+    "method": (None, _method),
+    "code": ("H", _code),
+    "call_id": (None, _call_id),
+    "from_user": (None, _from_user),
+    "to_user": (None, _to_user),
+    "via_host": (None, _via_host),
+    "cseq": ("L", _cseq),
+}
+
+
+class ColumnExporter:
+    """
+    Collects fields of SIP messages into columns, for analytics.
+
+    The available columns are `timestamp`, `method`, `code`, `call_id`,
+    `from_user`, `to_user`, `via_host` and `cseq`. For responses, `method`
+    is the method from the `CSeq` header. Missing headers result in empty
+    strings or zeros.
+
+    Numeric columns are :class:`array.array` instances, which NumPy can
+    wrap without copying using `numpy.frombuffer`. String columns are
+    :class:`StringColumn` instances.
+
+    Columns can be written in CSV format, or in a compact binary format
+    which :meth:`read_binary` loads back.
+    """
+
+    def __init__(self, columns: Iterable[str] = COLUMNS) -> None:
+        self.columns: dict[str, array.array[Any] | StringColumn] = {}
+        "The columns, by name."
+
+        self._extractors: list[
+            tuple[Callable[[Any], None], Callable[[Request | Response, float], Any]]
+        ] = []
+        for name in columns:
+            try:
+                typecode, extractor = COLUMNS[name]
+            except KeyError:
+                raise ValueError(f"Column {name!r} is not supported")
+            column = self.columns[name] = (
+                StringColumn() if typecode is None else array.array(typecode)
+            )
+            self._extractors.append((column.append, extractor))
+
+    def add(self, message: Request | Response, timestamp: float = 0.0) -> None:
+        """
+        Append the fields of `message` to the columns.
+
+        If a field cannot be extracted, a :class:`ValueError` is raised and
+        no column is modified.
+        """
+        values = [extractor(message, timestamp) for _, extractor in self._extractors]
+        for (append, _), value in zip(self._extractors, values):
+            append(value)
+
+    @classmethod
+    def read_binary(cls, fp: BinaryIO) -> "ColumnExporter":
+        """
+        Read columns written by :meth:`write_binary` from `fp`.
+
+        If the data is not valid, a :class:`ValueError` is raised.
+        """
+        if fp.readline() != BINARY_HEADER:
+            raise BINARY_EXCEPTION
+        try:
+            header = json.loads(fp.readline())
+            byteorder = header["byteorder"]
+            rows = header["rows"]
+            specs = header["columns"]
+            exporter = cls(spec["name"] for spec in specs)
+        except (KeyError, TypeError, ValueError):
+            raise BINARY_EXCEPTION
+        if not isinstance(rows, int) or rows < 0:
+            raise BINARY_EXCEPTION
+
+        for spec, column in zip(specs, exporter.columns.values()):
+            data = column.codes if isinstance(column, StringColumn) else column
+            if spec.get("itemsize") != data.itemsize:
+                raise BINARY_EXCEPTION
+            try:
+                data.fromfile(fp, rows)
+            except (EOFError, ValueError):
+                raise BINARY_EXCEPTION
+            if byteorder != sys.byteorder:
+                data.byteswap()
+
+            if isinstance(column, StringColumn):
+                column.values = spec.get("values", [])
+                if max(column.codes, default=-1) >= len(column.values):
+                    raise BINARY_EXCEPTION
+                column._lookup = {value: i for i, value in enumerate(column.values)}
+        return exporter
+
+    def write_binary(self, fp: BinaryIO) -> None:
+        """
+        Write the columns to `fp` in a compact binary format.
+
+        The data starts with a line identifying the format, followed by
+        a line containing a JSON header describing the columns and holding
+        the distinct values of string columns. The numeric data follows,
+        with the array of each column in turn, in native byte order.
+        """
+        specs: list[dict[str, Any]] = []
+        for name, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                specs.append(
+                    {
+                        "name": name,
+                        "itemsize": column.codes.itemsize,
+                        "values": column.values,
+                    }
+                )
+            else:
+                specs.append({"name": name, "itemsize": column.itemsize})
+        header = {"byteorder": sys.byteorder, "rows": len(self), "columns": specs}
+
+        fp.write(BINARY_HEADER)
+        fp.write(json.dumps(header).encode("utf8") + b"\n")
+        for column in self.columns.values():
+            if isinstance(column, StringColumn):
+                column.codes.tofile(fp)
+            else:
+                column.tofile(fp)
+
+    def write_csv(self, fp: TextIO) -> None:
+        """
+        Write the columns to `fp` in CSV format, with a header row.
+        """
+        writer = csv.writer(fp)
+        writer.writerow(self.columns.keys())
+        writer.writerows(zip(*self.columns.values()))
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
@@ -28,6 +28,7 @@ def simplify_whitespace(value: str) -> str:
 # Character collections.
 C_ALPHA = string.ascii_letters
 C_ALPHANUM = string.ascii_letters + string.digits
+C_ALWAYS_SAFE = C_ALPHANUM + "_.-~"
 C_MARK = "-_.!~*/'()"
 C_TOKEN = C_ALPHANUM + "-.!%*_+`'~"
 C_UNRESERVED = C_ALPHANUM + C_MARK
@@ -44,7 +45,7 @@ ESCAPED = f"%{HEXDIG}{{2}}"
 LWS = "[ ]+"
 SWS = "[ ]*"
 TOKEN = f"{cset(C_TOKEN)}+"
-QUOTED_STRING = '"(?:[^"]|\\")*"'
+QUOTED_STRING = '"(?:[^"\\\\]|\\\\.)*"'
 
 COMMA = f"{SWS},{SWS}"
 EQUAL = f"{SWS}={SWS}"
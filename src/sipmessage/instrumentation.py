@@ -0,0 +1,127 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import bisect
+
+# Upper bounds of the histogram buckets, in seconds.
+DEFAULT_BUCKETS = (
+    1e-6,
+    2.5e-6,
+    5e-6,
+    1e-5,
+    2.5e-5,
+    5e-5,
+    1e-4,
+    2.5e-4,
+    5e-4,
+    1e-3,
+    1e-2,
+)
+
+# The enabled instrumentation, if any.
+active: "Instrumentation | None" = None
+
+
+def escape_label(value: str) -> str:
+    """
+    Escape a Prometheus label value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    A histogram of durations, in seconds.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        "The upper bounds of the buckets, in increasing order."
+
+        self.counts = [0] * (len(buckets) + 1)
+        "The number of durations in each bucket, the last one being unbounded."
+
+        self.count = 0
+        "The number of durations."
+
+        self.sum = 0.0
+        "The sum of the durations."
+
+    def observe(self, duration: float) -> None:
+        """
+        Add a `duration` to the histogram.
+        """
+        self.counts[bisect.bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.sum += duration
+
+
+class Instrumentation:
+    """
+    Collects the time spent parsing and serializing messages.
+
+    Durations are recorded in a :class:`Histogram` per operation and name:
+
+    - `parse`, by request method or response code, for :meth:`Message.parse`;
+    - `header`, by header name, for the typed header accessors;
+    - `serialize`, by request method or response code, for
+      :meth:`Message.serialize` and conversions to bytes.
+
+    Unknown request methods and response codes outside 100-699 are recorded
+    under the `other` name, so the number of histograms stays bounded.
+
+    Nothing is recorded until :meth:`enable` is called. When instrumentation
+    is disabled, the cost is a single check per operation.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        "The histograms, by operation and name."
+
+        self._buckets = buckets
+
+    def disable(self) -> None:
+        """
+        Stop recording durations.
+        """
+        global active
+        if active is self:
+            active = None
+
+    def enable(self) -> None:
+        """
+        Start recording durations, replacing any other enabled instrumentation.
+        """
+        global active
+        active = self
+
+    def observe(self, operation: str, name: str, duration: float) -> None:
+        """
+        Record the `duration` of an `operation` for the given `name`.
+        """
+        key = (operation, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self._buckets)
+        histogram.observe(duration)
+
+    def render(self) -> str:
+        """
+        Render the histograms in the Prometheus text exposition format.
+        """
+        metric = "sipmessage_duration_seconds"
+        output = f"# TYPE {metric} histogram\n"
+        for (operation, name), histogram in self.histograms.items():
+            labels = f'operation="{operation}",name="{escape_label(name)}"'
+            count = 0
+            for bound, bucket_count in zip(
+                histogram.buckets + (float("inf"),), histogram.counts
+            ):
+                count += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                output += f'{metric}_bucket{{{labels},le="{le}"}} {count}\n'
+            output += f"{metric}_sum{{{labels}}} {histogram.sum!r}\n"
+            output += f"{metric}_count{{{labels}}} {histogram.count}\n"
+        return output
@@ -0,0 +1,237 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import mmap
+import os
+import re
+from collections.abc import Iterator, Sequence
+from typing import overload
+
+from .callindex import CallIndex, MessageSummary
+from .message import Message, Request, Response
+
+INDEX_HEADER = b"sipmessage-index 3"
+
+CALL_ID_PATTERN = re.compile(
+    rb"^(?:call-id|i)[ \t]*:[ \t]*(\S+)", re.IGNORECASE | re.MULTILINE
+)
+CONTENT_LENGTH_PATTERN = re.compile(
+    rb"^(?:content-length|l)[ \t]*:[ \t]*(\d+)", re.IGNORECASE | re.MULTILINE
+)
+CONTENT_TYPE_PATTERN = re.compile(
+    rb"^(?:content-type|c)[ \t]*:", re.IGNORECASE | re.MULTILINE
+)
+
+
+class LogReader(Sequence[Request | Response]):
+    """
+    A reader for text logs containing raw SIP messages, each of which
+    follows a line matching the `marker` regular expression.
+
+    The log is memory-mapped and scanned once to build an index of the
+    offsets and `Call-ID` of each message. Messages are only parsed when
+    they are accessed.
+
+    A message ends after the body given by its `Content-Length`. Without
+    it, a message which has no `Content-Type` ends with its headers, and
+    otherwise runs up to the next marker, less any trailing blank lines.
+    This keeps other log lines out of message bodies.
+
+    If `index_path` is given, the index is loaded from that file if it
+    matches the size and modification time of the log and the `marker`,
+    otherwise it is built and saved to that file.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        marker: bytes,
+        index_path: str | os.PathLike[str] | None = None,
+    ) -> None:
+        with open(path, "rb") as fp:
+            stat = os.fstat(fp.fileno())
+            self._size = stat.st_size
+            self._mtime_ns = stat.st_mtime_ns
+            self._mmap = (
+                mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                if self._size
+                else None
+            )
+        self._view = memoryview(self._mmap if self._mmap is not None else b"")
+        self._marker = marker
+
+        self._offsets: list[tuple[int, int]] = []
+        self._call_ids: list[str | None] = []
+        if index_path is None or not self._load_index(index_path):
+            self._build_index(re.compile(marker, re.MULTILINE))
+            if index_path is not None:
+                self.save_index(index_path)
+
+    def close(self) -> None:
+        """
+        Close the log file.
+        """
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def find_call(self, call_id: str) -> list[Request | Response]:
+        """
+        Return the messages with the given `Call-ID`.
+
+        Only the matching messages are parsed.
+        """
+        return [self[i] for i, value in enumerate(self._call_ids) if value == call_id]
+
+    def index_calls(self) -> CallIndex:
+        """
+        Build a :class:`CallIndex` of the messages, using their position
+        in the log.
+
+        Messages are not parsed, and those missing the headers needed to
+        group them are skipped.
+        """
+        index = CallIndex()
+        if self._mmap is not None:
+            for i, (start, end) in enumerate(self._offsets):
+                try:
+                    summary = MessageSummary.parse(self._mmap, start, end)
+                except ValueError:
+                    continue
+                index.add(i, summary)
+        return index
+
+    def save_index(self, path: str | os.PathLike[str]) -> None:
+        """
+        Save the index of the log to the file at `path`.
+        """
+        with open(path, "wb") as fp:
+            fp.write(self._index_header() + b"\n")
+            for (start, end), call_id in zip(self._offsets, self._call_ids):
+                call_id_bytes = b"-" if call_id is None else call_id.encode("utf8")
+                fp.write(b"%d %d %s\n" % (start, end, call_id_bytes))
+
+    @overload
+    def __getitem__(self, index: int) -> Request | Response: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Request | Response]: ...
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> Request | Response | list[Request | Response]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+
+        start, end = self._offsets[index]
+        return Message.parse(bytes(self._view[start:end]))
+
+    def __enter__(self) -> "LogReader":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Request | Response]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _build_index(self, marker: re.Pattern[bytes]) -> None:
+        if self._mmap is None:
+            return
+
+        data = self._mmap
+        starts = []
+        for m in marker.finditer(data):
+            # The message starts on the line following the marker.
+            line_end = data.find(b"\n", m.end())
+            starts.append((m.start(), self._size if line_end == -1 else line_end + 1))
+
+        for i, (_marker, start) in enumerate(starts):
+            end = starts[i + 1][0] if i + 1 < len(starts) else self._size
+
+            # Skip blank lines preceding the message.
+            while start < end and data[start] in b"\r\n":
+                start += 1
+            if start == end:
+                continue
+
+            header_end = data.find(b"\r\n\r\n", start, end)
+            if header_end == -1:
+                end = _strip_blank_lines(data, start, end)
+                call_id = CALL_ID_PATTERN.search(data, start, end)
+            else:
+                call_id = CALL_ID_PATTERN.search(data, start, header_end)
+                end = _message_end(data, start, header_end + 4, end)
+            self._offsets.append((start, end))
+            self._call_ids.append(
+                call_id.group(1).decode("utf8", "replace") if call_id else None
+            )
+
+    def _index_header(self) -> bytes:
+        return b"%s %d %d %s" % (
+            INDEX_HEADER,
+            self._size,
+            self._mtime_ns,
+            self._marker.hex().encode("ascii"),
+        )
+
+    def _load_index(self, path: str | os.PathLike[str]) -> bool:
+        try:
+            with open(path, "rb") as fp:
+                lines = fp.read().splitlines()
+        except FileNotFoundError:
+            return False
+
+        if not lines or lines[0] != self._index_header():
+            return False
+
+        offsets: list[tuple[int, int]] = []
+        call_ids: list[str | None] = []
+        try:
+            for line in lines[1:]:
+                start_bytes, end_bytes, call_id = line.split(b" ")
+                start, end = int(start_bytes), int(end_bytes)
+                if not 0 <= start <= end <= self._size:
+                    return False
+                offsets.append((start, end))
+                call_ids.append(None if call_id == b"-" else call_id.decode("utf8"))
+        except ValueError:
+            return False
+
+        self._offsets = offsets
+        self._call_ids = call_ids
+        return True
+
+
+def _message_end(data: mmap.mmap, start: int, body_start: int, end: int) -> int:
+    """
+    Return the end of the message whose headers span from `start` to
+    `body_start`, given that the next marker is at `end`.
+    """
+    m = CONTENT_LENGTH_PATTERN.search(data, start, body_start)
+    if m is not None:
+        return min(body_start + int(m.group(1)), end)
+    elif CONTENT_TYPE_PATTERN.search(data, start, body_start) is None:
+        return body_start
+    else:
+        return _strip_blank_lines(data, body_start, end)
+
+
+def _strip_blank_lines(data: mmap.mmap, start: int, end: int) -> int:
+    """
+    Return the end of the text between `start` and `end` without its
+    trailing blank lines, keeping the line ending of the last line.
+    """
+    pos = end
+    while pos > start and data[pos - 1] in b" \t\r\n":
+        pos -= 1
+    for line_end in (b"\r\n", b"\n"):
+        if pos + len(line_end) <= end and data[pos : pos + len(line_end)] == line_end:
+            return pos + len(line_end)
+    return pos
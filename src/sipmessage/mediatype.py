@@ -4,6 +4,7 @@
 #
 
 import dataclasses
+import functools
 import re
 
 from . import grammar, utils
@@ -17,7 +18,7 @@ MEDIATYPE_PATTERN = re.compile(
 
 
 @dataclasses.dataclass(frozen=True)
-class MediaType:
+class MediaType(utils.CachedStr):
     """
     A media type as used in `Accept` and `Content-Type` headers.
     """
@@ -35,16 +36,24 @@ class MediaType:
 
         If parsing fails, a :class:`ValueError` is raised.
         """
-        return utils.parse_single(cls._parse_one, MEDIATYPE_EXCEPTION, value)
+        return utils.parse_single(
+            cls._parse_one, MEDIATYPE_EXCEPTION, "MediaType", value
+        )
 
     @classmethod
-    def parse_many(cls, value: str) -> "list[MediaType]":
+    def parse_many(
+        cls, value: str, errors: list[utils.ParseError] | None = None
+    ) -> "list[MediaType]":
         """
         Parse the given string into a list of :class:`MediaType` instances.
 
-        If parsing fails, a :class:`ValueError` is raised.
+        If parsing fails, a :class:`ValueError` is raised. If `errors` is
+        a list, invalid elements are skipped instead, and their errors are
+        appended to it.
         """
-        return utils.parse_many(cls._parse_one, MEDIATYPE_EXCEPTION, value)
+        return utils.parse_many(
+            cls._parse_one, MEDIATYPE_EXCEPTION, "MediaType", value, errors
+        )
 
     @classmethod
     def _parse_one(cls, value: str) -> "tuple[MediaType, str]":
@@ -60,7 +69,115 @@ class MediaType:
         else:
             raise MEDIATYPE_EXCEPTION
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         s = self.mime_type
         s += str(self.parameters)
         return s
+
+
+@dataclasses.dataclass(frozen=True)
+class MediaRange:
+    maintype: str
+    subtype: str
+    parameters: tuple[tuple[str, str | None], ...]
+    quality: float
+
+    @property
+    def specificity(self) -> int:
+        if self.maintype == "*":
+            return 0
+        elif self.subtype == "*":
+            return 1
+        else:
+            return 2 + len(self.parameters)
+
+    def matches(
+        self, maintype: str, subtype: str, parameters: dict[str, str | None]
+    ) -> bool:
+        return (
+            (self.maintype == "*" or self.maintype == maintype)
+            and (self.subtype == "*" or self.subtype == subtype)
+            and all(parameters.get(k) == v for k, v in self.parameters)
+        )
+
+
+class AcceptMatcher:
+    """
+    A matcher for the media ranges of an `Accept` header, used to
+    negotiate the media type of a message body.
+
+    Media ranges may use wildcards such as `*/*` or `text/*`, parameters
+    and `q` values. When several media ranges match a media type, the most
+    specific one determines its quality.
+
+    :rfc:`3261#section-20.1`
+    """
+
+    def __init__(self, accept: list[MediaType]) -> None:
+        ranges = []
+        for media_type in accept:
+            maintype, _, subtype = media_type.mime_type.lower().partition("/")
+            parameters = []
+            quality = 1.0
+            for k, v in media_type.parameters.items():
+                # Parameters following `q` are accept-extensions.
+                if k.lower() == "q":
+                    try:
+                        quality = float(v or "")
+                    except ValueError:
+                        raise MEDIATYPE_EXCEPTION
+                    # This also rejects `nan`.
+                    if not 0.0 <= quality <= 1.0:
+                        raise MEDIATYPE_EXCEPTION
+                    break
+                parameters.append((k.lower(), v))
+            ranges.append(MediaRange(maintype, subtype, tuple(parameters), quality))
+
+        # Most specific ranges are tried first.
+        self._ranges = sorted(ranges, key=lambda r: r.specificity, reverse=True)
+
+    @classmethod
+    def parse(cls, value: str) -> "AcceptMatcher":
+        """
+        Parse the given `Accept` header value into an :class:`AcceptMatcher`.
+
+        Matchers are cached, so parsing the same value again is cheap.
+
+        If parsing fails, a :class:`ValueError` is raised.
+        """
+        return _parse_accept_matcher(value)
+
+    def quality(self, media_type: MediaType) -> float:
+        """
+        Return the quality of the given `media_type`, between `0` for
+        unacceptable media types and `1` for the preferred ones.
+        """
+        maintype, _, subtype = media_type.mime_type.lower().partition("/")
+        # Parameter names are case-insensitive, and lowercased in ranges.
+        parameters = {k.lower(): v for k, v in media_type.parameters.items()}
+        for media_range in self._ranges:
+            if media_range.matches(maintype, subtype, parameters):
+                return media_range.quality
+        return 0.0
+
+    def select(self, offered: list[MediaType]) -> MediaType | None:
+        """
+        Return the `offered` media type with the highest quality, or `None`
+        if none of them are acceptable.
+
+        Media types with the same quality are preferred in the order in
+        which they are offered.
+        """
+        best = None
+        best_quality = 0.0
+        for media_type in offered:
+            quality = self.quality(media_type)
+            if quality > best_quality:
+                best = media_type
+                best_quality = quality
+        return best
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_accept_matcher(value: str) -> AcceptMatcher:
+    return AcceptMatcher(MediaType.parse_many(value))
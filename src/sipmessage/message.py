@@ -3,15 +3,21 @@
 # Distributed under the 2-clause BSD license
 #
 
+import abc
 import datetime
 import email.utils
+import time
+import typing
+from collections.abc import Iterator
 from typing import Union
 
+from . import grammar, instrumentation
 from .address import Address
-from .auth import AuthChallenge, AuthCredentials
-from .cseq import CSeq
-from .mediatype import MediaType
+from .auth import AuthChallenge, AuthCredentials, AuthParameters
+from .cseq import CSEQ_PATTERN, CSeq
+from .mediatype import AcceptMatcher, MediaType
 from .uri import URI
+from .utils import ParseError, T
 from .via import Via
 
 # https://www.iana.org/assignments/sip-parameters/sip-parameters.xhtml#sip-parameters-2
@@ -36,6 +42,248 @@ COMPACT_FORMS = {
     "t": "To",  # RFC3261
     "v": "Via",  # RFC3261
 }
+COMPACT_NAMES = {v.lower(): k for k, v in COMPACT_FORMS.items()}
+
+HEADER_LINE_EXCEPTION = ValueError("SIP header line is not valid")
+ENCODING_EXCEPTION = ValueError("SIP message is not valid UTF-8")
+CONTENT_LENGTH_EXCEPTION = ValueError("SIP message Content-Length is not valid")
+
+# Headers which are copied from a request into its responses.
+#
+# :rfc:`3261#section-8.2.6.2`
+RESPONSE_HEADERS = ("Via", "From", "To", "Call-ID", "CSeq")
+RESPONSE_HEADERS_LOWER = frozenset(key.lower() for key in RESPONSE_HEADERS)
+
+# Headers which must be present in requests, and in responses.
+#
+# :rfc:`3261#section-8.1.1`
+REQUEST_MANDATORY_HEADERS = ("To", "From", "CSeq", "Call-ID", "Max-Forwards", "Via")
+RESPONSE_MANDATORY_HEADERS = ("To", "From", "CSeq", "Call-ID", "Via")
+
+# Request methods which are given their own instrumentation label, any other
+# method being recorded as "other" so that peers cannot create unbounded
+# numbers of histograms.
+INSTRUMENTED_METHODS = frozenset(
+    (
+        "ACK",
+        "BYE",
+        "CANCEL",
+        "INFO",
+        "INVITE",
+        "MESSAGE",
+        "NOTIFY",
+        "OPTIONS",
+        "PRACK",
+        "PUBLISH",
+        "REFER",
+        "REGISTER",
+        "SUBSCRIBE",
+        "UPDATE",
+    )
+)
+
+# Headers examined by validation.
+VALIDATED_HEADERS = {
+    key.lower(): key for key in REQUEST_MANDATORY_HEADERS + ("Content-Length",)
+}
+
+# Validated headers which must not have multiple values.
+SINGLE_VALUED_HEADERS = frozenset(VALIDATED_HEADERS.values()) - {"Via"}
+
+
+def add_to_tag(value: str, to_tag: str) -> str:
+    """
+    Append a `tag` parameter to a raw `To` header value, unless
+    it already carries one.
+    """
+    if "tag" in Address.parse(value).parameters:
+        return value
+    else:
+        return f"{value};tag={to_tag}"
+
+
+def _auth_matches(
+    parameters: AuthParameters, realm: str | None, algorithm: str | None
+) -> bool:
+    return (realm is None or parameters.get("realm") == realm) and (
+        algorithm is None
+        or parameters.get("algorithm", "MD5").upper() == algorithm.upper()
+    )
+
+
+def _auth_may_match(value: str, realm: str | None) -> bool:
+    """
+    Return whether the raw header `value` may contain the given `realm`,
+    without parsing it.
+    """
+    # A realm containing `"` or `\` is escaped in its quoted form, so it
+    # cannot be looked up in the raw value.
+    return realm is None or '"' in realm or "\\" in realm or realm in value
+
+
+def decode(value: bytes, header: str | None = None, offset: int = 0) -> str:
+    """
+    Decode a part of a SIP message as UTF-8.
+
+    If decoding fails, a :class:`ValueError` is raised.
+    """
+    try:
+        return value.decode("utf8")
+    except UnicodeDecodeError as exc:
+        raise ParseError.wrap(
+            ENCODING_EXCEPTION,
+            expected="UTF-8",
+            offset=offset + exc.start,
+            header=header,
+        ) from None
+
+
+def decode_values(values: list[str | bytes], header: str) -> list[str]:
+    """
+    Decode in place any values of `header` which are still raw bytes.
+    """
+    for i, value in enumerate(values):
+        if isinstance(value, bytes):
+            values[i] = decode(value, header)
+    return typing.cast(list[str], values)
+
+
+def record_error(errors: list[ParseError] | None, error: ParseError) -> None:
+    """
+    Raise `error`, or append it to `errors` when parsing leniently.
+    """
+    if errors is None:
+        raise error
+    errors.append(error)
+
+
+def add_header_lines(
+    headers: "Headers",
+    lines: list[bytes],
+    offset: int = 0,
+    errors: list[ParseError] | None = None,
+) -> None:
+    """
+    Parse `Name: value` header lines and add them to `headers`,
+    expanding compact header names.
+
+    Folded lines, which start with whitespace, are joined to the previous
+    line with a single space.
+
+    Header values are kept as bytes, and only decoded when accessed.
+
+    The `offset` of the first line is used to report errors. If `errors`
+    is a list, invalid lines are skipped and their errors, which keep the
+    raw line, are appended to it.
+
+    :rfc:`3261#section-7.3.1`
+    """
+    key: str | None = None
+    value = b""
+    for line in lines:
+        line_offset = offset
+        offset += len(line) + 2
+
+        if line.startswith((b" ", b"\t")):
+            if key is None:
+                record_error(
+                    errors,
+                    ParseError.wrap(
+                        HEADER_LINE_EXCEPTION,
+                        expected="header",
+                        offset=line_offset,
+                        raw=line,
+                    ),
+                )
+            else:
+                value += b" " + line.strip()
+            continue
+
+        if key is not None:
+            headers._add(key, value)
+            key = None
+        key_bytes, sep, value = line.partition(b":")
+        if not sep:
+            record_error(
+                errors,
+                ParseError.wrap(
+                    HEADER_LINE_EXCEPTION,
+                    expected="HCOLON",
+                    offset=line_offset,
+                    raw=line,
+                ),
+            )
+            continue
+        try:
+            key = decode(key_bytes, offset=line_offset)
+        except ParseError as exc:
+            exc.raw = line
+            record_error(errors, exc)
+            continue
+        key = COMPACT_FORMS.get(key.lower(), key)
+        value = value.strip()
+
+    if key is not None:
+        headers._add(key, value)
+
+
+def header_lines(
+    headers: "Headers", body_length: int, compact: bool = False
+) -> Iterator[str]:
+    """
+    Yield the lines of `headers` followed by the empty line ending them,
+    setting the `Content-Length` to `body_length`.
+
+    The `Content-Length` header is added if the body is not empty. If
+    `compact` is `True`, compact header names and minimal whitespace are used.
+    """
+    sep = ":" if compact else ": "
+    has_length = False
+    for k, raw_values in headers._list:
+        values = decode_values(raw_values, k)
+        ikey = k.lower()
+        if compact:
+            k = COMPACT_NAMES.get(ikey, k)
+        if ikey == "content-length":
+            yield f"{k}{sep}{body_length}\r\n"
+            has_length = True
+        else:
+            for value in values:
+                yield f"{k}{sep}{value}\r\n"
+    if body_length and not has_length:
+        yield f"{'l' if compact else 'Content-Length'}{sep}{body_length}\r\n"
+    yield "\r\n"
+
+
+def parse_header(key: str, parser: typing.Callable[[str], T], value: str) -> T:
+    """
+    Parse a `value` of the header named `key`.
+
+    If parsing fails, a :class:`ParseError` naming the header is raised.
+    """
+    recorder = instrumentation.active
+    start = time.perf_counter() if recorder is not None else 0.0
+    try:
+        result = parser(value)
+    except ValueError as exc:
+        raise ParseError.wrap(exc, expected=key, header=key) from None
+    if recorder is not None:
+        recorder.observe("header", key, time.perf_counter() - start)
+    return result
+
+
+def render_headers(headers: "Headers", body_length: int, compact: bool = False) -> str:
+    """
+    Render the lines returned by :func:`header_lines` as a string.
+    """
+    return "".join(header_lines(headers, body_length, compact))
+
+
+def encoded_length(value: str) -> int:
+    """
+    Return the length of `value` once encoded as UTF-8.
+    """
+    return len(value) if value.isascii() else len(value.encode("utf8"))
 
 
 class Headers:
@@ -44,19 +292,14 @@ class Headers:
     """
 
     def __init__(self) -> None:
-        self._list: list[tuple[str, list[str]]] = []
+        # Parsed header values are stored as bytes until they are accessed.
+        self._list: list[tuple[str, list[str | bytes]]] = []
 
     def add(self, key: str, value: str) -> None:
         """
         Add a new header.
         """
-        ikey = key.lower()
-        for i, (k, values) in enumerate(self._list):
-            if k.lower() == ikey:
-                values.append(value)
-                break
-        else:
-            self._list.append((key, [value]))
+        self._add(key, value)
 
     def get(self, key: str, default: str | None = None) -> str | None:
         """
@@ -65,7 +308,7 @@ class Headers:
         ikey = key.lower()
         for k, values in self._list:
             if k.lower() == ikey:
-                return values[0]
+                return self._first(k, values)
         return default
 
     def getlist(self, key: str) -> list[str]:
@@ -75,7 +318,7 @@ class Headers:
         ikey = key.lower()
         for k, values in self._list:
             if k.lower() == ikey:
-                return values
+                return decode_values(values, k)
         return []
 
     def keys(self) -> list[str]:
@@ -112,66 +355,152 @@ class Headers:
         Remove all values for the given header and replace them
         with the given `values`.
         """
+        raw_values = typing.cast(list[str | bytes], values)
         ikey = key.lower()
         for i, (k, _values) in enumerate(self._list[:]):
             if k.lower() == ikey:
-                self._list[i] = (k, values)
+                self._list[i] = (k, raw_values)
                 break
         else:
-            self._list.append((key, values))
+            self._list.append((key, raw_values))
+
+    def _add(self, key: str, value: str | bytes) -> None:
+        ikey = key.lower()
+        for i, (k, values) in enumerate(self._list):
+            if k.lower() == ikey:
+                values.append(value)
+                break
+        else:
+            self._list.append((key, [value]))
+
+    def _first(self, key: str, values: list[str | bytes]) -> str:
+        value = values[0]
+        if isinstance(value, bytes):
+            value = values[0] = decode(value, key)
+        return value
 
     def __getitem__(self, key: str) -> str:
         ikey = key.lower()
         for k, values in self._list:
             if k.lower() == ikey:
-                return values[0]
+                return self._first(k, values)
         raise KeyError
 
     def __str__(self) -> str:
         output = ""
         for k, values in self._list:
-            for value in values:
+            for value in decode_values(values, k):
                 output += f"{k}: {value}\r\n"
         return output + "\r\n"
 
 
-class Message:
+class Message(abc.ABC):
     body: bytes
+    errors: list[ParseError]
     headers: Headers
 
+    _lenient = False
+
     @staticmethod
-    def parse(data: bytes) -> Union["Request", "Response"]:
+    def parse(
+        data: bytes, truncate: bool = True, lenient: bool = False
+    ) -> Union["Request", "Response"]:
         """
         Parse the given string into a :class:`Request` or :class:`Response` instance.
 
+        Header values are only decoded when they are accessed, so a header value
+        which is not valid UTF-8 raises a :class:`ValueError` upon access.
+
+        If the message has a `Content-Length` header and the body is longer,
+        the extra bytes are discarded if `truncate` is `True`, as mandated for
+        datagram transports. A body shorter than the `Content-Length` is always
+        an error.
+
         If parsing fails, a :class:`ValueError` is raised.
+
+        If `lenient` is `True`, invalid header lines and `Content-Length`
+        values are recorded in :attr:`errors` instead. Invalid lines are
+        skipped, and kept in the :attr:`ParseError.raw` attribute of their
+        error. Accessors for headers holding lists, such as :attr:`via` or
+        :attr:`route`, then skip invalid elements and record their errors,
+        replacing those recorded by a previous access to the same header.
+        Other header values are kept verbatim, so the message can still be
+        forwarded. The start line must always be valid.
+
+        :rfc:`3261#section-18.3`
         """
         if not isinstance(data, bytes):
             raise ValueError("SIP message must be passed as bytes")
 
+        recorder = instrumentation.active
+        start = time.perf_counter() if recorder is not None else 0.0
+
         try:
             header, body = data.split(b"\r\n\r\n", 1)
         except ValueError:
-            raise ValueError("SIP message has too few lines")
+            raise ParseError(
+                "SIP message has too few lines", expected="CRLF", offset=len(data)
+            ) from None
 
-        lines = header.decode("utf8").split("\r\n")
+        lines = header.split(b"\r\n")
 
         # Parse first line.
-        bits = lines[0].split(" ", 2)
+        bits = decode(lines[0]).split(" ", 2)
         message: Request | Response
-        if len(bits) > 2 and bits[2] == "SIP/2.0":
-            message = Request(method=bits[0], uri=URI.parse(bits[1]), body=body)
-        elif len(bits) > 2 and bits[0] == "SIP/2.0":
-            message = Response(code=int(bits[1]), phrase=bits[2], body=body)
-        else:
-            raise ValueError("SIP message is neither request nor response")
+        try:
+            if len(bits) > 2 and bits[2] == "SIP/2.0":
+                message = Request(method=bits[0], uri=URI.parse(bits[1]), body=body)
+            elif len(bits) > 2 and bits[0] == "SIP/2.0":
+                message = Response(code=int(bits[1]), phrase=bits[2], body=body)
+            else:
+                raise ValueError("SIP message is neither request nor response")
+        except ValueError as exc:
+            raise ParseError.wrap(exc, expected="Start-Line", offset=0) from None
+
+        errors: list[ParseError] | None = None
+        if lenient:
+            errors = message.errors
+            message._lenient = True
 
         # Parse headers.
-        for line in lines[1:]:
-            key, val = line.split(":", 1)
-            key = COMPACT_FORMS.get(key.lower(), key)
-            message.headers.add(key, val.strip())
+        add_header_lines(
+            message.headers, lines[1:], offset=len(lines[0]) + 2, errors=errors
+        )
 
+        # Check the body length, bypassing `parse_header` so that this
+        # internal check is not instrumented.
+        try:
+            value = message.headers.get("Content-Length", None)
+            content_length = None if value is None else int(value)
+            if content_length is not None and content_length < 0:
+                raise CONTENT_LENGTH_EXCEPTION
+        except ValueError as exc:
+            record_error(
+                errors,
+                ParseError.wrap(
+                    CONTENT_LENGTH_EXCEPTION,
+                    expected="Content-Length",
+                    offset=getattr(exc, "offset", None),
+                    header="Content-Length",
+                ),
+            )
+            content_length = None
+        if content_length is not None:
+            if len(body) < content_length or (
+                len(body) > content_length and not truncate
+            ):
+                record_error(
+                    errors,
+                    ParseError(
+                        "SIP message body does not match Content-Length",
+                        offset=len(header) + 4,
+                        header="Content-Length",
+                    ),
+                )
+            message.body = body[:content_length]
+
+        if recorder is not None:
+            recorder.observe("parse", message._name(), time.perf_counter() - start)
         return message
 
     @property
@@ -184,15 +513,9 @@ class Message:
 
         :rfc:`3261#section-20.1`
         """
-        found = False
-        headers: list[MediaType] = []
-        for value in self.headers.getlist("Accept"):
-            found = True
-            headers += MediaType.parse_many(value)
-        if found:
-            return headers
-        else:
+        if self.headers.get("Accept") is None:
             return None
+        return self._get_list("Accept", MediaType.parse_many)
 
     @accept.setter
     def accept(self, value: list[MediaType] | None) -> None:
@@ -203,6 +526,22 @@ class Message:
         else:
             self.headers.setlist("Accept", [str(x) for x in value])
 
+    @property
+    def accept_matcher(self) -> AcceptMatcher:
+        """
+        An :class:`AcceptMatcher` for the `Accept` header values.
+
+        If the header is absent, `application/sdp` is assumed to be acceptable.
+
+        :rfc:`3261#section-20.1`
+        """
+        values = self.headers.getlist("Accept")
+        return parse_header(
+            "Accept",
+            AcceptMatcher.parse,
+            ", ".join(values) if values else "application/sdp",
+        )
+
     @property
     def authorization(self) -> AuthCredentials | None:
         """
@@ -216,6 +555,19 @@ class Message:
     def authorization(self, value: AuthCredentials | None) -> None:
         self._set_auth_credentials("Authorization", value)
 
+    @property
+    def authorization_list(self) -> list[AuthCredentials]:
+        """
+        All the `Authorization` header values.
+
+        :rfc:`3261#section-20.7`
+        """
+        return self._get_auth_credentials_list("Authorization")
+
+    @authorization_list.setter
+    def authorization_list(self, value: list[AuthCredentials]) -> None:
+        self._set_auth_credentials_list("Authorization", value)
+
     @property
     def call_id(self) -> str:
         """
@@ -260,6 +612,9 @@ class Message:
         """
         The `Content-Length` header value.
 
+        When the message is serialized, this value is replaced by the
+        actual length of the body.
+
         :rfc:`3261#section-20.14`
         """
         return self._get_optional_int("Content-Length")
@@ -279,7 +634,7 @@ class Message:
         if str_value is None:
             return None
         else:
-            return MediaType.parse(str_value)
+            return parse_header("Content-Type", MediaType.parse, str_value)
 
     @content_type.setter
     def content_type(self, value: MediaType | None) -> None:
@@ -296,7 +651,7 @@ class Message:
 
         :rfc:`3261#section-20.16`
         """
-        return CSeq.parse(self.headers["CSeq"])
+        return parse_header("CSeq", CSeq.parse, self.headers["CSeq"])
 
     @cseq.setter
     def cseq(self, value: CSeq) -> None:
@@ -313,7 +668,7 @@ class Message:
         if str_value is None:
             return None
         else:
-            return email.utils.parsedate_to_datetime(str_value)
+            return parse_header("Date", email.utils.parsedate_to_datetime, str_value)
 
     @date.setter
     def date(self, value: datetime.datetime | None) -> None:
@@ -345,7 +700,7 @@ class Message:
 
         :rfc:`3261#section-20.20`
         """
-        return Address.parse(self.headers["From"])
+        return parse_header("From", Address.parse, self.headers["From"])
 
     @from_address.setter
     def from_address(self, value: Address) -> None:
@@ -403,6 +758,19 @@ class Message:
     def proxy_authenticate(self, value: AuthChallenge | None) -> None:
         self._set_auth_challenge("Proxy-Authenticate", value)
 
+    @property
+    def proxy_authenticate_list(self) -> list[AuthChallenge]:
+        """
+        All the `Proxy-Authenticate` header values.
+
+        :rfc:`3261#section-20.27`
+        """
+        return self._get_auth_challenge_list("Proxy-Authenticate")
+
+    @proxy_authenticate_list.setter
+    def proxy_authenticate_list(self, value: list[AuthChallenge]) -> None:
+        self._set_auth_challenge_list("Proxy-Authenticate", value)
+
     @property
     def proxy_authorization(self) -> AuthCredentials | None:
         """
@@ -416,6 +784,19 @@ class Message:
     def proxy_authorization(self, value: AuthCredentials | None) -> None:
         self._set_auth_credentials("Proxy-Authorization", value)
 
+    @property
+    def proxy_authorization_list(self) -> list[AuthCredentials]:
+        """
+        All the `Proxy-Authorization` header values.
+
+        :rfc:`3261#section-20.28`
+        """
+        return self._get_auth_credentials_list("Proxy-Authorization")
+
+    @proxy_authorization_list.setter
+    def proxy_authorization_list(self, value: list[AuthCredentials]) -> None:
+        self._set_auth_credentials_list("Proxy-Authorization", value)
+
     @property
     def proxy_require(self) -> list[str]:
         """
@@ -514,7 +895,7 @@ class Message:
 
         :rfc:`3261#section-20.39`
         """
-        return Address.parse(self.headers["To"])
+        return parse_header("To", Address.parse, self.headers["To"])
 
     @to_address.setter
     def to_address(self, value: Address) -> None:
@@ -553,15 +934,29 @@ class Message:
 
         :rfc:`3261#section-20.42`
         """
-        headers: list[Via] = []
-        for value in self.headers.getlist("Via"):
-            headers += Via.parse_many(value)
-        return headers
+        return self._get_list("Via", Via.parse_many)
 
     @via.setter
     def via(self, value: list[Via]) -> None:
         self.headers.setlist("Via", [str(x) for x in value])
 
+    def update_via_parameters(self, **changes: str | None) -> None:
+        """
+        Update the parameters of the topmost `Via` header value, for instance
+        to add `received` and `rport` parameters.
+
+        Only the parameters of the topmost `Via` are modified, all other
+        header values are kept verbatim.
+
+        If there is no `Via` header, a :class:`KeyError` is raised.
+        """
+        values = self.headers.getlist("Via")
+        if not values:
+            raise KeyError("Via")
+        self.headers.setlist(
+            "Via", [Via.splice_parameters(values[0], **changes)] + values[1:]
+        )
+
     @property
     def www_authenticate(self) -> AuthChallenge | None:
         """
@@ -575,11 +970,173 @@ class Message:
     def www_authenticate(self, value: AuthChallenge | None) -> None:
         self._set_auth_challenge("WWW-Authenticate", value)
 
+    @property
+    def www_authenticate_list(self) -> list[AuthChallenge]:
+        """
+        All the `WWW-Authenticate` header values.
+
+        :rfc:`3261#section-20.44`
+        """
+        return self._get_auth_challenge_list("WWW-Authenticate")
+
+    @www_authenticate_list.setter
+    def www_authenticate_list(self, value: list[AuthChallenge]) -> None:
+        self._set_auth_challenge_list("WWW-Authenticate", value)
+
+    def find_authorization(
+        self, realm: str | None = None, algorithm: str | None = None
+    ) -> AuthCredentials | None:
+        """
+        Return the first `Authorization` header value matching the given
+        `realm` and `algorithm`, or `None`.
+
+        Header values are only parsed until a match is found.
+        """
+        return self._find_auth_credentials("Authorization", realm, algorithm)
+
+    def find_proxy_authenticate(
+        self, realm: str | None = None, algorithm: str | None = None
+    ) -> AuthChallenge | None:
+        """
+        Return the first `Proxy-Authenticate` header value matching the given
+        `realm` and `algorithm`, or `None`.
+
+        Header values are only parsed until a match is found.
+        """
+        return self._find_auth_challenge("Proxy-Authenticate", realm, algorithm)
+
+    def find_proxy_authorization(
+        self, realm: str | None = None, algorithm: str | None = None
+    ) -> AuthCredentials | None:
+        """
+        Return the first `Proxy-Authorization` header value matching the given
+        `realm` and `algorithm`, or `None`.
+
+        Header values are only parsed until a match is found.
+        """
+        return self._find_auth_credentials("Proxy-Authorization", realm, algorithm)
+
+    def find_www_authenticate(
+        self, realm: str | None = None, algorithm: str | None = None
+    ) -> AuthChallenge | None:
+        """
+        Return the first `WWW-Authenticate` header value matching the given
+        `realm` and `algorithm`, or `None`.
+
+        Header values are only parsed until a match is found.
+        """
+        return self._find_auth_challenge("WWW-Authenticate", realm, algorithm)
+
+    def serialize(self, compact: bool = False) -> bytes:
+        """
+        Serialize the message to bytes.
+
+        If `compact` is `True`, header names are replaced by their compact
+        form where one exists and minimal whitespace is used, which is
+        useful to keep messages sent over UDP under the path MTU.
+
+        :rfc:`3261#section-7.3.3`
+        """
+        recorder = instrumentation.active
+        start = time.perf_counter() if recorder is not None else 0.0
+        data = (
+            self._start_line() + render_headers(self.headers, len(self.body), compact)
+        ).encode("utf8") + self.body
+        if recorder is not None:
+            recorder.observe("serialize", self._name(), time.perf_counter() - start)
+        return data
+
+    def serialized_size(self, compact: bool = False) -> int:
+        """
+        Return the size in bytes of the serialized message, without
+        serializing it.
+
+        This allows senders to decide whether a request is small enough to
+        be sent over UDP, or whether a congestion-controlled transport must
+        be used.
+
+        :rfc:`3261#section-18.1.1`
+        """
+        size = encoded_length(self._start_line()) + len(self.body)
+        for line in header_lines(self.headers, len(self.body), compact):
+            size += encoded_length(line)
+        return size
+
+    def validate(self) -> str | None:
+        """
+        Check that the message is well-formed enough to be processed.
+
+        If it is not, the reason phrase for a `400 Bad Request` response is
+        returned, otherwise `None` is returned.
+
+        The mandatory headers must be present, and only `Via` may have
+        multiple values. The `CSeq` header must be valid and, for requests,
+        carry the request method. If present, `Max-Forwards` and
+        `Content-Length` must be valid, and `Content-Length` must match the
+        body length.
+
+        The headers are examined in a single pass, without raising
+        exceptions or parsing any other header.
+
+        :rfc:`3261#section-8.1.1`
+        """
+        found: dict[str, str | bytes] = {}
+        for k, values in self.headers._list:
+            key = VALIDATED_HEADERS.get(k.lower())
+            if key is not None and values:
+                if len(values) > 1 and key in SINGLE_VALUED_HEADERS:
+                    return f"Multiple {key} Headers"
+                found[key] = values[0]
+
+        mandatory_headers: tuple[str, ...] = RESPONSE_MANDATORY_HEADERS
+        if isinstance(self, Request):
+            mandatory_headers = REQUEST_MANDATORY_HEADERS
+        for key in mandatory_headers:
+            if key not in found:
+                return f"Missing {key} Header"
+
+        cseq = found["CSeq"]
+        if isinstance(cseq, bytes):
+            cseq = cseq.decode("utf8", "replace")
+        m = CSEQ_PATTERN.match(grammar.simplify_whitespace(cseq))
+        if m is None:
+            return "Invalid CSeq Header"
+        elif isinstance(self, Request) and m.group("method") != self.method:
+            return "CSeq Method Does Not Match Request Method"
+
+        max_forwards = found.get("Max-Forwards")
+        if max_forwards is not None and not (
+            max_forwards.isascii() and max_forwards.isdigit()
+        ):
+            return "Invalid Max-Forwards Header"
+
+        content_length = found.get("Content-Length")
+        if content_length is not None and not (
+            content_length.isascii()
+            and content_length.isdigit()
+            and int(content_length) == len(self.body)
+        ):
+            return "Invalid Content-Length Header"
+
+        return None
+
+    @abc.abstractmethod
+    def _name(self) -> str:
+        """
+        Return the request method or response code, for instrumentation.
+        """
+
+    @abc.abstractmethod
+    def _start_line(self) -> str:
+        """
+        Render the start line, including its line ending.
+        """
+
+    def __bytes__(self) -> bytes:
+        return self.serialize()
+
     def _get_address_list(self, key: str) -> list[Address]:
-        headers: list[Address] = []
-        for value in self.headers.getlist(key):
-            headers += Address.parse_many(value)
-        return headers
+        return self._get_list(key, Address.parse_many)
 
     def _set_address_list(self, key: str, value: list[Address]) -> None:
         self.headers.setlist(key, [str(x) for x in value])
@@ -589,7 +1146,7 @@ class Message:
         if value is None:
             return None
         else:
-            return AuthChallenge.parse(value)
+            return parse_header(key, AuthChallenge.parse, value)
 
     def _set_auth_challenge(self, key: str, value: AuthChallenge | None) -> None:
         if value is None:
@@ -597,12 +1154,64 @@ class Message:
         else:
             self.headers.set(key, str(value))
 
+    def _find_auth_challenge(
+        self, key: str, realm: str | None, algorithm: str | None
+    ) -> AuthChallenge | None:
+        for value in self.headers.getlist(key):
+            # Skip values which cannot match without parsing them.
+            if not _auth_may_match(value, realm):
+                continue
+            challenge = parse_header(key, AuthChallenge.parse, value)
+            if _auth_matches(challenge.parameters, realm, algorithm):
+                return challenge
+        return None
+
+    def _get_auth_challenge_list(self, key: str) -> list[AuthChallenge]:
+        return [
+            parse_header(key, AuthChallenge.parse, value)
+            for value in self.headers.getlist(key)
+        ]
+
+    def _set_auth_challenge_list(self, key: str, value: list[AuthChallenge]) -> None:
+        if value:
+            self.headers.setlist(key, [str(x) for x in value])
+        else:
+            self.headers.remove(key)
+
+    def _find_auth_credentials(
+        self, key: str, realm: str | None, algorithm: str | None
+    ) -> AuthCredentials | None:
+        for value in self.headers.getlist(key):
+            # Skip values which cannot match without parsing them.
+            if not _auth_may_match(value, realm):
+                continue
+            credentials = parse_header(key, AuthCredentials.parse, value)
+            if credentials.parameters is not None and _auth_matches(
+                credentials.parameters, realm, algorithm
+            ):
+                return credentials
+        return None
+
+    def _get_auth_credentials_list(self, key: str) -> list[AuthCredentials]:
+        return [
+            parse_header(key, AuthCredentials.parse, value)
+            for value in self.headers.getlist(key)
+        ]
+
+    def _set_auth_credentials_list(
+        self, key: str, value: list[AuthCredentials]
+    ) -> None:
+        if value:
+            self.headers.setlist(key, [str(x) for x in value])
+        else:
+            self.headers.remove(key)
+
     def _get_auth_credentials(self, key: str) -> AuthCredentials | None:
         value = self.headers.get(key, None)
         if value is None:
             return None
         else:
-            return AuthCredentials.parse(value)
+            return parse_header(key, AuthCredentials.parse, value)
 
     def _set_auth_credentials(self, key: str, value: AuthCredentials | None) -> None:
         if value is None:
@@ -610,12 +1219,32 @@ class Message:
         else:
             self.headers.set(key, str(value))
 
+    def _get_list(
+        self,
+        key: str,
+        parse_many: typing.Callable[[str, list[ParseError] | None], list[T]],
+    ) -> list[T]:
+        # Invalid elements are skipped for messages parsed leniently.
+        errors: list[ParseError] | None = [] if self._lenient else None
+        items: list[T] = []
+        for value in self.headers.getlist(key):
+            items += parse_header(key, lambda v: parse_many(v, errors), value)
+
+        if errors is not None:
+            # Replace any errors recorded by a previous access to the header.
+            for error in errors:
+                error.header = key
+            self.errors[:] = [
+                error for error in self.errors if error.header != key
+            ] + errors
+        return items
+
     def _get_optional_int(self, key: str) -> int | None:
         value = self.headers.get(key, None)
         if value is None:
             return None
         else:
-            return int(value)
+            return parse_header(key, int, value)
 
     def _set_optional_int(self, key: str, value: int | None) -> None:
         if value is None:
@@ -663,21 +1292,48 @@ class Request(Message):
     headers: Headers
     "The request headers in raw form. It is usually better to use the typed accessors."
 
+    errors: list[ParseError]
+    "The errors found while parsing the request leniently."
+
     def __init__(self, method: str, uri: URI, body: bytes = b"") -> None:
         self.method = method
         self.uri = uri
         self.body = body
+        self.errors = []
         self.headers = Headers()
 
-    def __bytes__(self) -> bytes:
-        return (
-            "%s %s SIP/2.0\r\n%s"
-            % (
-                self.method,
-                self.uri,
-                self.headers,
-            )
-        ).encode("utf8") + self.body
+    def create_response(
+        self, code: int, phrase: str, to_tag: str | None = None
+    ) -> "Response":
+        """
+        Create a :class:`Response` to this request.
+
+        The `Via`, `From`, `To`, `Call-ID` and `CSeq` header values are
+        copied verbatim, without being parsed or reformatted.
+
+        If `to_tag` is given and the `To` header does not already carry
+        a tag, the tag is appended to the `To` header value.
+
+        :rfc:`3261#section-8.2.6.2`
+        """
+        response = Response(code=code, phrase=phrase)
+        for key in RESPONSE_HEADERS:
+            values = self.headers.getlist(key)
+            if values:
+                response.headers.setlist(key, values[:])
+
+        if to_tag is not None:
+            to_value = response.headers.get("To")
+            if to_value is not None:
+                response.headers.set("To", add_to_tag(to_value, to_tag))
+
+        return response
+
+    def _name(self) -> str:
+        return self.method if self.method in INSTRUMENTED_METHODS else "other"
+
+    def _start_line(self) -> str:
+        return f"{self.method} {self.uri} SIP/2.0\r\n"
 
 
 class Response(Message):
@@ -697,18 +1353,56 @@ class Response(Message):
     headers: Headers
     "The response headers in raw form. It is usually better to use the typed accessors."
 
+    errors: list[ParseError]
+    "The errors found while parsing the response leniently."
+
     def __init__(self, code: int, phrase: str, body: bytes = b"") -> None:
         self.code = code
         self.phrase = phrase
         self.body = body
+        self.errors = []
         self.headers = Headers()
 
-    def __bytes__(self) -> bytes:
-        return (
-            "SIP/2.0 %s %s\r\n%s"
-            % (
-                self.code,
-                self.phrase,
-                self.headers,
-            )
-        ).encode("utf8") + self.body
+    def _name(self) -> str:
+        return str(self.code) if 100 <= self.code <= 699 else "other"
+
+    def _start_line(self) -> str:
+        return f"SIP/2.0 {self.code} {self.phrase}\r\n"
+
+
+class ResponseTemplate:
+    """
+    A pre-rendered :class:`Response`, for use by stateless responders.
+
+    The status line, headers and body of the `response` are encoded once.
+    Rendering the template for a request only encodes the `Via`, `From`,
+    `To`, `Call-ID` and `CSeq` header values copied from that request. Any
+    such headers present in the `response` itself are ignored.
+    """
+
+    def __init__(self, response: Response) -> None:
+        static_headers = Headers()
+        for key in response.headers.keys():
+            if key.lower() not in RESPONSE_HEADERS_LOWER:
+                static_headers.setlist(key, response.headers.getlist(key))
+
+        self._head = f"SIP/2.0 {response.code} {response.phrase}\r\n".encode("utf8")
+        self._tail = (
+            render_headers(static_headers, len(response.body)).encode("utf8")
+            + response.body
+        )
+
+    def render(self, request: Request, to_tag: str | None = None) -> bytes:
+        """
+        Render the response to the given `request` as bytes.
+
+        If `to_tag` is given and the `To` header does not already carry
+        a tag, the tag is appended to the `To` header value.
+        """
+        lines = ""
+        for key in RESPONSE_HEADERS:
+            for value in request.headers.getlist(key):
+                if to_tag is not None and key == "To":
+                    value = add_to_tag(value, to_tag)
+                lines += f"{key}: {value}\r\n"
+        return self._head + lines.encode("utf8") + self._tail
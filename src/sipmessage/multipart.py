@@ -0,0 +1,173 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+from collections.abc import Iterator, Sequence
+from typing import overload
+
+from .mediatype import MediaType
+from .message import Headers, Message, add_header_lines
+
+MULTIPART_EXCEPTION = ValueError("Multipart body is not valid")
+
+
+class BodyPart:
+    """
+    A part of a :class:`Multipart` body.
+    """
+
+    headers: Headers
+    "The part headers in raw form."
+
+    body: memoryview
+    "The part body, as a view into the multipart body."
+
+    def __init__(self, headers: Headers, body: memoryview) -> None:
+        self.headers = headers
+        self.body = body
+
+    @property
+    def content_type(self) -> MediaType | None:
+        """
+        The `Content-Type` header value.
+        """
+        value = self.headers.get("Content-Type")
+        if value is None:
+            return None
+        else:
+            return MediaType.parse(value)
+
+
+class Multipart(Sequence[BodyPart]):
+    """
+    A multipart body, as described by :rfc:`2046#section-5.1`.
+
+    The boundaries of all the parts are located when the body is parsed,
+    but the parts themselves are only parsed when they are accessed. Part
+    bodies are views into the original body, so no data is copied.
+    """
+
+    def __init__(self, body: bytes, boundary: str) -> None:
+        self._body = body
+        self._view = memoryview(body)
+        self._offsets = _find_parts(body, boundary.encode("utf8"))
+        self._parts: list[BodyPart | None] = [None] * len(self._offsets)
+
+    @classmethod
+    def from_message(cls, message: Message) -> "Multipart":
+        """
+        Parse the body of the given `message` using the `boundary` parameter
+        of its `Content-Type` header.
+
+        If the message body is not a multipart body, or parsing fails,
+        a :class:`ValueError` is raised.
+        """
+        content_type = message.content_type
+        if content_type is None or not content_type.mime_type.lower().startswith(
+            "multipart/"
+        ):
+            raise ValueError("Message body is not multipart")
+
+        boundary = content_type.parameters.get("boundary")
+        if not boundary:
+            raise MULTIPART_EXCEPTION
+
+        # The boundary may be a quoted string.
+        if boundary.startswith('"') and boundary.endswith('"'):
+            boundary = boundary[1:-1]
+
+        return cls(message.body, boundary)
+
+    def find(self, mime_type: str) -> BodyPart | None:
+        """
+        Return the first part with the given MIME type, or `None`.
+
+        Parts are only parsed until a match is found.
+        """
+        mime_type = mime_type.lower()
+        for part in self:
+            content_type = part.content_type
+            if content_type is not None and content_type.mime_type.lower() == mime_type:
+                return part
+        return None
+
+    @overload
+    def __getitem__(self, index: int) -> BodyPart: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[BodyPart]: ...
+
+    def __getitem__(self, index: int | slice) -> BodyPart | list[BodyPart]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+
+        part = self._parts[index]
+        if part is None:
+            start, end = self._offsets[index]
+            part = self._parts[index] = self._parse_part(start, end)
+        return part
+
+    def __iter__(self) -> Iterator[BodyPart]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _parse_part(self, start: int, end: int) -> BodyPart:
+        headers = Headers()
+        if self._body.startswith(b"\r\n", start, end):
+            # The part has no headers.
+            return BodyPart(headers=headers, body=self._view[start + 2 : end])
+
+        header_end = self._body.find(b"\r\n\r\n", start, end)
+        if header_end == -1:
+            raise MULTIPART_EXCEPTION
+
+        add_header_lines(headers, self._body[start:header_end].split(b"\r\n"))
+        return BodyPart(headers=headers, body=self._view[header_end + 4 : end])
+
+
+def _find_parts(data: bytes, boundary: bytes) -> list[tuple[int, int]]:
+    """
+    Return the start and end offsets of the parts in `data`, locating
+    the delimiters in a single forward pass.
+
+    Text which starts like a delimiter but is followed by anything other
+    than `--` or transport padding up to the end of the line is part of
+    the preamble or of a part.
+
+    :rfc:`2046#section-5.1.1`
+    """
+    dash_boundary = b"--" + boundary
+    delimiter = b"\r\n" + dash_boundary
+
+    # The first delimiter may directly start the body.
+    if data.startswith(dash_boundary):
+        end, pos = 0, len(dash_boundary)
+    else:
+        end = data.find(delimiter)
+        pos = end + len(delimiter)
+
+    offsets = []
+    start: int | None = None
+    while end != -1:
+        if data.startswith(b"--", pos):
+            # The close delimiter, which must follow at least one part.
+            if start is None:
+                raise MULTIPART_EXCEPTION
+            offsets.append((start, end))
+            return offsets
+
+        # Skip any transport padding up to the end of the delimiter line.
+        line_end = data.find(b"\r\n", pos)
+        if line_end != -1 and not data[pos:line_end].strip(b" \t"):
+            if start is not None:
+                offsets.append((start, end))
+            start = pos = line_end + 2
+
+        end = data.find(delimiter, pos)
+        pos = end + len(delimiter)
+
+    raise MULTIPART_EXCEPTION
@@ -5,22 +5,48 @@
 
 import re
 from collections.abc import Iterator, Mapping
-from urllib.parse import quote, unquote
 
-from . import grammar
+from . import grammar, utils
+from .utils import quote, unquote
 
 EQUAL_PATTERN = re.compile(grammar.EQUAL)
 SEMI_PATTERN = re.compile(grammar.SEMI)
 
 
-class Parameters(Mapping[str, str | None]):
+def decode_parameter(bit: str) -> tuple[str, str | None]:
+    """
+    Decode a single `key=value` or `key` parameter.
+    """
+    if "=" in bit:
+        k, v = EQUAL_PATTERN.split(bit, 1)
+        return unquote(k), unquote(v)
+    else:
+        return unquote(bit), None
+
+
+def encode_parameter(key: str, value: str | None) -> str:
+    """
+    Encode a single parameter as `key=value` or `key`.
+    """
+    if value is None:
+        return quote(key)
+    else:
+        return quote(key) + "=" + quote(value)
+
+
+class Parameters(utils.CachedStr, Mapping[str, str | None]):
     """
     A mapping of :class:`Address`, :class:`MediaType`, :class:`URI` or :class:`Via`
     parameters.
+
+    Parameters obtained using :meth:`parse` keep the raw text they were parsed
+    from. Individual parameters are only decoded when they are looked up, and
+    the raw text is output verbatim when the parameters are serialized.
     """
 
     def __init__(self, **kwargs: str | None) -> None:
-        self.__data = dict(kwargs)
+        self.__data: dict[str, str | None] | None = dict(kwargs)
+        self.__raw: str | None = None
 
     @classmethod
     def parse(cls, value: str) -> "Parameters":
@@ -30,46 +56,86 @@ class Parameters(Mapping[str, str | None]):
         If parsing fails, a :class:`ValueError` is raised.
         """
         value = grammar.simplify_whitespace(value)
+        if not value:
+            return cls()
 
-        data: dict[str, str | None] = {}
-        if value:
+        if " " in value:
+            # Whitespace around separators is not preserved, decode eagerly.
             bits = SEMI_PATTERN.split(value)
 
             # The first "bit" must be empty, as the string must start
-            # with a SEMI.
-            if bits[0]:
+            # with a SEMI. Empty parameters are not allowed.
+            if bits[0] or not all(bits[1:]):
                 raise ValueError("Parameters are not valid")
 
-            for bit in bits[1:]:
-                # Empty parameters are not allowed.
-                if not bit:
-                    raise ValueError("Parameters are not valid")
+            return cls(**dict(decode_parameter(bit) for bit in bits[1:]))
 
-                if "=" in bit:
-                    k, v = EQUAL_PATTERN.split(bit, 1)
-                    v = unquote(v)
-                else:
-                    k, v = bit, None
-                data[unquote(k)] = v
-        return cls(**data)
+        # The string must start with a SEMI and empty parameters are not allowed.
+        if value[0] != ";" or value[-1] == ";" or ";;" in value:
+            raise ValueError("Parameters are not valid")
+
+        return cls._from_raw(value)
 
     def replace(self, **changes: str | None) -> "Parameters":
         """
         Return a copy of the parameters, updated with the given `changes`.
         """
+        if self.__raw is not None and "%" not in self.__raw:
+            # Splice the changes into the raw text, leaving the
+            # other parameters untouched.
+            bits = self.__raw[1:].split(";")
+            for k, v in changes.items():
+                bit = encode_parameter(k, v)
+                found = False
+                for i, existing in enumerate(bits):
+                    if existing.partition("=")[0] == k:
+                        # Drop any duplicates, as a dictionary would.
+                        bits[i] = "" if found else bit
+                        found = True
+                if not found:
+                    bits.append(bit)
+            return Parameters._from_raw(";" + ";".join(x for x in bits if x))
+
         data = {}
-        data.update(self.__data)
+        data.update(self._data)
         data.update(**changes)
         return Parameters(**data)
 
+    @classmethod
+    def _from_raw(cls, raw: str) -> "Parameters":
+        parameters = cls()
+        parameters.__data = None
+        parameters.__raw = raw
+        parameters._set_str(raw)
+        return parameters
+
+    @property
+    def _data(self) -> dict[str, str | None]:
+        if self.__data is None:
+            assert self.__raw is not None
+            self.__data = dict(
+                decode_parameter(bit) for bit in self.__raw[1:].split(";")
+            )
+        return self.__data
+
     def __getitem__(self, key: str) -> str | None:
+        if self.__data is None:
+            assert self.__raw is not None
+            # Only decode the parameters until the key is found. The last
+            # occurrence of a key wins, as it would in a dictionary.
+            if key in self.__raw or "%" in self.__raw:
+                for bit in reversed(self.__raw[1:].split(";")):
+                    k, v = decode_parameter(bit)
+                    if k == key:
+                        return v
+            raise KeyError(key)
         return self.__data[key]
 
     def __iter__(self) -> Iterator[str]:
-        return iter(self.__data)
+        return iter(self._data)
 
     def __len__(self) -> int:
-        return len(self.__data)
+        return len(self._data)
 
     def __repr__(self) -> str:
         data = ""
@@ -79,10 +145,21 @@ class Parameters(Mapping[str, str | None]):
             data += f"{k}={v!r}"
         return f"Parameters({data})"
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         output = ""
         for k, v in self.items():
-            output += ";" + quote(k)
-            if v is not None:
-                output += "=" + quote(v)
+            output += ";" + encode_parameter(k, v)
         return output
+
+
+def splice_parameters(
+    value: str, m: re.Match[str], changes: dict[str, str | None]
+) -> str:
+    """
+    Apply `changes` to the `parameters` group matched by `m` in `value`,
+    keeping the rest of `value` verbatim.
+    """
+    parameters = Parameters.parse(m.group("parameters")).replace(**changes)
+    return (
+        value[: m.start("parameters")] + str(parameters) + value[m.end("parameters") :]
+    )
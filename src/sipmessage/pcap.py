@@ -0,0 +1,407 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import functools
+import mmap
+import os
+import re
+import socket
+import struct
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
+
+from .message import Message, Request, Response
+
+CAPTURE_EXCEPTION = ValueError("Capture file is not valid")
+
+# Link-layer header types.
+#
+# https://www.tcpdump.org/linktypes.html
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLANS = (0x8100, 0x88A8)
+
+# IPv6 extension headers which can be skipped.
+IPV6_EXTENSION_HEADERS = (0, 43, 60)
+
+PROTO_TCP = 6
+PROTO_UDP = 17
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+
+# Limits on the data buffered for a TCP stream. Streams exceeding them
+# are not SIP, or have lost segments, and are resynchronized.
+MAX_HEADER_SIZE = 65536
+MAX_BODY_SIZE = 1048576
+MAX_PENDING_SEGMENTS = 64
+
+# The maximum number of TCP streams being reassembled, the least recently
+# used ones being discarded first.
+MAX_STREAMS = 1024
+
+CONTENT_LENGTH_PATTERN = re.compile(
+    rb"^(?:content-length|l)[ \t]*:[ \t]*(\d+)", re.IGNORECASE | re.MULTILINE
+)
+
+
+class CapturedMessage(NamedTuple):
+    """
+    A SIP message read from a packet capture.
+    """
+
+    timestamp: float
+    "The capture time of the packet which completed the message, in seconds."
+
+    source: tuple[str, int]
+    "The source IP address and port."
+
+    destination: tuple[str, int]
+    "The destination IP address and port."
+
+    message: Request | Response
+    "The parsed message."
+
+
+class TcpStream:
+    """
+    The reassembly state of one direction of a TCP connection.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self.next_seq: int | None = None
+        self.pending: dict[int, bytes] = {}
+
+    def feed(self, seq: int, payload: bytes) -> None:
+        """
+        Add a segment's `payload` at the given sequence number.
+
+        Retransmitted data is discarded and segments received out of order
+        are held until the missing data arrives.
+        """
+        if self.next_seq is None:
+            # The capture started in the middle of the connection.
+            self.next_seq = seq
+
+        offset = (seq - self.next_seq) & 0xFFFFFFFF
+        if offset >= 0x80000000:
+            # The segment overlaps data which was already received.
+            payload = payload[0x100000000 - offset :]
+        elif offset:
+            if len(self.pending) >= MAX_PENDING_SEGMENTS:
+                self.reset()
+            else:
+                self.pending[seq] = payload
+            return
+
+        self.buffer += payload
+        self.next_seq = (self.next_seq + len(payload)) & 0xFFFFFFFF
+        while self.next_seq in self.pending:
+            self.feed(self.next_seq, self.pending.pop(self.next_seq))
+
+    def messages(self) -> Iterator[bytes]:
+        """
+        Extract the complete messages from the buffer, using their
+        `Content-Length` to find where they end.
+        """
+        buffer = self.buffer
+        while True:
+            # Skip keep-alives.
+            start = 0
+            while buffer.startswith(b"\r\n", start):
+                start += 2
+            del buffer[:start]
+
+            header_end = buffer.find(b"\r\n\r\n")
+            if header_end == -1:
+                if len(buffer) > MAX_HEADER_SIZE:
+                    self.reset()
+                return
+
+            m = CONTENT_LENGTH_PATTERN.search(buffer, 0, header_end)
+            body_length = int(m.group(1)) if m else 0
+            if body_length > MAX_BODY_SIZE:
+                self.reset()
+                return
+
+            end = header_end + 4 + body_length
+            if len(buffer) < end:
+                return
+
+            data = bytes(buffer[:end])
+            del buffer[:end]
+            yield data
+
+    def reset(self) -> None:
+        """
+        Discard all buffered data, and resynchronize on the next segment.
+        """
+        self.buffer.clear()
+        self.next_seq = None
+        self.pending.clear()
+
+
+class CaptureReader:
+    """
+    A reader for packet capture files in pcap or pcapng format.
+
+    The file is memory-mapped and packets are decoded as the reader is
+    iterated, so memory usage does not depend on the size of the capture.
+
+    Ethernet, Linux cooked and raw IP captures are supported. SIP messages
+    are extracted from UDP datagrams and from reassembled TCP streams,
+    and packets which do not contain a valid SIP message are skipped.
+    IP fragments are not reassembled. To bound memory usage, at most 1024
+    TCP streams are reassembled at once, the least recently used ones being
+    discarded, and messages with a body larger than 1 MiB are skipped.
+
+    If the file does not start with a valid pcap or pcapng header, a
+    :class:`ValueError` is raised. Errors further in the file are raised
+    while iterating. The reader can be iterated several times.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as fp:
+            if not os.fstat(fp.fileno()).st_size:
+                raise CAPTURE_EXCEPTION
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._streams: dict[tuple[tuple[str, int], tuple[str, int]], TcpStream] = {}
+
+        self._read_packets: Callable[[], Iterator[tuple[float, int, bytes]]]
+        # Files shorter than any pcap or pcapng header are not valid.
+        magic = self._mmap[:4] if len(self._mmap) >= 24 else b""
+        if magic in (b"\xd4\xc3\xb2\xa1", b"\x4d\x3c\xb2\xa1"):
+            self._read_packets = functools.partial(self._read_pcap, "<")
+        elif magic in (b"\xa1\xb2\xc3\xd4", b"\xa1\xb2\x3c\x4d"):
+            self._read_packets = functools.partial(self._read_pcap, ">")
+        elif magic == b"\x0a\x0d\x0d\x0a" and _valid_pcapng_header(self._mmap):
+            self._read_packets = self._read_pcapng
+        else:
+            self.close()
+            raise CAPTURE_EXCEPTION
+
+    def close(self) -> None:
+        """
+        Close the capture file.
+        """
+        self._mmap.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[CapturedMessage]:
+        self._streams = {}
+        for timestamp, linktype, frame in self._read_packets():
+            yield from self._read_frame(timestamp, linktype, frame)
+
+    def _read_pcap(self, endian: str) -> Iterator[tuple[float, int, bytes]]:
+        data = self._mmap
+        magic, linktype = struct.unpack_from(endian + "I16xI", data, 0)
+        resolution = 1e-9 if magic == 0xA1B23C4D else 1e-6
+
+        pos = 24
+        while pos + 16 <= len(data):
+            ts_sec, ts_frac, length = struct.unpack_from(endian + "III", data, pos)
+            pos += 16
+            if pos + length > len(data):
+                raise CAPTURE_EXCEPTION
+            yield ts_sec + ts_frac * resolution, linktype, data[pos : pos + length]
+            pos += length
+
+    def _read_pcapng(self) -> Iterator[tuple[float, int, bytes]]:
+        data = self._mmap
+        endian = "<"
+        interfaces: list[tuple[int, float]] = []
+
+        pos = 0
+        while pos + 12 <= len(data):
+            if data[pos : pos + 4] == b"\x0a\x0d\x0d\x0a":
+                # Section header block, which sets the byte order.
+                endian = "<" if data[pos + 8 : pos + 12] == b"\x4d\x3c\x2b\x1a" else ">"
+                interfaces = []
+            block_type, block_length = struct.unpack_from(endian + "II", data, pos)
+            if block_length < 12 or pos + block_length > len(data):
+                raise CAPTURE_EXCEPTION
+
+            if block_type == 1:
+                # Interface description block.
+                (linktype,) = struct.unpack_from(endian + "H", data, pos + 8)
+                interfaces.append(
+                    (linktype, _pcapng_resolution(data, endian, pos, block_length))
+                )
+            elif block_type == 6:
+                # Enhanced packet block.
+                interface_id, ts_high, ts_low, length = struct.unpack_from(
+                    endian + "IIII", data, pos + 8
+                )
+                if interface_id >= len(interfaces):
+                    raise CAPTURE_EXCEPTION
+                linktype, resolution = interfaces[interface_id]
+                yield (
+                    ((ts_high << 32) | ts_low) * resolution,
+                    linktype,
+                    data[pos + 28 : pos + 28 + length],
+                )
+
+            pos += block_length
+
+    def _read_frame(
+        self, timestamp: float, linktype: int, frame: bytes
+    ) -> Iterator[CapturedMessage]:
+        packet = _link_payload(linktype, frame)
+        if packet is None:
+            return
+        transport = _ip_payload(packet)
+        if transport is None:
+            return
+        proto, src_ip, dst_ip, segment = transport
+
+        if proto == PROTO_UDP and len(segment) >= 8:
+            src_port, dst_port, length = struct.unpack_from("!HHH", segment)
+            source, destination = (src_ip, src_port), (dst_ip, dst_port)
+            message = _parse(segment[8:length])
+            if message is not None:
+                yield CapturedMessage(timestamp, source, destination, message)
+
+        elif proto == PROTO_TCP and len(segment) >= 20:
+            src_port, dst_port, seq, offset, flags = struct.unpack_from(
+                "!HHI4xBB", segment
+            )
+            source, destination = (src_ip, src_port), (dst_ip, dst_port)
+            key = (source, destination)
+
+            # Re-inserting the stream keeps the streams ordered by last use.
+            stream = self._streams.pop(key, None)
+            if stream is None:
+                stream = TcpStream()
+                if len(self._streams) >= MAX_STREAMS:
+                    del self._streams[next(iter(self._streams))]
+            self._streams[key] = stream
+            if flags & TCP_SYN:
+                stream.reset()
+                seq += 1
+
+            payload = segment[(offset >> 4) * 4 :]
+            if payload:
+                stream.feed(seq, payload)
+                for data in stream.messages():
+                    message = _parse(data)
+                    if message is not None:
+                        yield CapturedMessage(timestamp, source, destination, message)
+
+            if flags & (TCP_FIN | TCP_RST):
+                del self._streams[key]
+
+
+def _valid_pcapng_header(data: mmap.mmap) -> bool:
+    """
+    Return whether `data` starts with a complete section header block.
+    """
+    byte_order = data[8:12]
+    if byte_order == b"\x4d\x3c\x2b\x1a":
+        endian = "<"
+    elif byte_order == b"\x1a\x2b\x3c\x4d":
+        endian = ">"
+    else:
+        return False
+    block_length: int = struct.unpack_from(endian + "I", data, 4)[0]
+    return 28 <= block_length <= len(data)
+
+
+def _pcapng_resolution(data: mmap.mmap, endian: str, pos: int, length: int) -> float:
+    """
+    Return the timestamp resolution of an interface description block,
+    read from its `if_tsresol` option.
+    """
+    end = pos + length - 4
+    pos += 16
+    while pos + 4 <= end:
+        code, option_length = struct.unpack_from(endian + "HH", data, pos)
+        if code == 0:
+            break
+        elif code == 9:
+            value = data[pos + 4]
+            if value & 0x80:
+                return float(2 ** -(value & 0x7F))
+            else:
+                return float(10**-value)
+        pos += 4 + (option_length + 3) // 4 * 4
+    return 1e-6
+
+
+def _link_payload(linktype: int, frame: bytes) -> bytes | None:
+    """
+    Return the IP packet carried by a link-layer `frame`, or `None`.
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        pos = 12
+        ethertype = int.from_bytes(frame[pos : pos + 2], "big")
+        while ethertype in ETHERTYPE_VLANS:
+            pos += 4
+            ethertype = int.from_bytes(frame[pos : pos + 2], "big")
+        if ethertype in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+            return frame[pos + 2 :]
+        return None
+    elif linktype == LINKTYPE_LINUX_SLL:
+        return frame[16:]
+    elif linktype == LINKTYPE_NULL:
+        return frame[4:]
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        return frame
+    else:
+        return None
+
+
+def _ip_payload(packet: bytes) -> tuple[int, str, str, bytes] | None:
+    """
+    Return the protocol, source and destination addresses and payload of
+    an IP `packet`, or `None` if it is not a complete IP packet.
+    """
+    version = packet[0] >> 4 if packet else 0
+    if version == 4 and len(packet) >= 20:
+        header_length = (packet[0] & 0x0F) * 4
+        total_length, fragment, proto = struct.unpack_from("!2xH2xHxB", packet)
+        if fragment & 0x3FFF:
+            # A fragment, or a packet followed by fragments.
+            return None
+        return (
+            proto,
+            socket.inet_ntop(socket.AF_INET, packet[12:16]),
+            socket.inet_ntop(socket.AF_INET, packet[16:20]),
+            packet[header_length:total_length],
+        )
+    elif version == 6 and len(packet) >= 40:
+        (payload_length, proto) = struct.unpack_from("!4xHB", packet)
+        payload = packet[40 : 40 + payload_length]
+        while proto in IPV6_EXTENSION_HEADERS and len(payload) >= 2:
+            proto = payload[0]
+            payload = payload[(payload[1] + 1) * 8 :]
+        return (
+            proto,
+            socket.inet_ntop(socket.AF_INET6, packet[8:24]),
+            socket.inet_ntop(socket.AF_INET6, packet[24:40]),
+            payload,
+        )
+    else:
+        return None
+
+
+def _parse(data: bytes) -> Request | Response | None:
+    try:
+        return Message.parse(data)
+    except ValueError:
+        return None
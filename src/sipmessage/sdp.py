@@ -0,0 +1,270 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import dataclasses
+
+from .message import Message
+
+SDP_EXCEPTION = ValueError("SDP is not valid")
+
+# Line types which follow the `c=` line, in a session or a media section.
+#
+# :rfc:`8866#section-5`
+CONNECTION_SUCCESSORS = frozenset(b"btrzka")
+
+
+def line_type(line: bytes) -> bytes:
+    return line[:1]
+
+
+def line_value(line: bytes) -> str:
+    return line[2:].rstrip(b"\r\n").decode("utf8")
+
+
+def replace_line_value(line: bytes, value: str) -> bytes:
+    """
+    Replace the value of a line, keeping its type and line ending.
+    """
+    content = line.rstrip(b"\r\n")
+    return content[:2] + value.encode("utf8") + line[len(content) :]
+
+
+@dataclasses.dataclass(frozen=True)
+class Connection:
+    """
+    The connection data of a session or media description.
+
+    :rfc:`8866#section-5.7`
+    """
+
+    address: str
+    "The connection address, e.g. `192.0.2.1`."
+
+    address_type: str = "IP4"
+    'The address type, e.g. `"IP4"` or `"IP6"`.'
+
+    network_type: str = "IN"
+    'The network type, e.g. `"IN"`.'
+
+    @classmethod
+    def parse(cls, value: str) -> "Connection":
+        """
+        Parse the given string into a :class:`Connection` instance.
+
+        If parsing fails, a :class:`ValueError` is raised.
+        """
+        bits = value.split(" ")
+        if len(bits) != 3 or not all(bits):
+            raise ValueError("Connection is not valid")
+        return cls(network_type=bits[0], address_type=bits[1], address=bits[2])
+
+    def __str__(self) -> str:
+        return f"{self.network_type} {self.address_type} {self.address}"
+
+
+class Section:
+    """
+    The raw lines of a session or media description.
+    """
+
+    def __init__(self, lines: list[bytes]) -> None:
+        self._lines = lines
+
+    @property
+    def attributes(self) -> list[tuple[str, str | None]]:
+        """
+        The `a=` attributes, as a list of `(name, value)` tuples.
+
+        The value of property attributes is `None`.
+        """
+        attributes: list[tuple[str, str | None]] = []
+        for line in self._lines:
+            if line_type(line) == b"a":
+                name, sep, value = line_value(line).partition(":")
+                attributes.append((name, value if sep else None))
+        return attributes
+
+    @property
+    def connection(self) -> Connection | None:
+        """
+        The `c=` connection data.
+        """
+        for line in self._lines:
+            if line_type(line) == b"c":
+                return Connection.parse(line_value(line))
+        return None
+
+    @connection.setter
+    def connection(self, value: Connection | None) -> None:
+        for i, line in enumerate(self._lines):
+            if line_type(line) == b"c":
+                if value is None:
+                    self._lines.pop(i)
+                else:
+                    self._lines[i] = replace_line_value(line, str(value))
+                return
+
+        if value is not None:
+            # Insert the line at the position mandated by the grammar,
+            # the first line being the `v=` or `m=` line.
+            for i in range(1, len(self._lines)):
+                if self._lines[i][0] in CONNECTION_SUCCESSORS:
+                    break
+            else:
+                i = len(self._lines)
+            if not self._lines[i - 1].endswith(b"\n"):
+                # The previous line was the last one, without a line ending.
+                self._lines[i - 1] += b"\r\n"
+            self._lines.insert(i, f"c={value}\r\n".encode("utf8"))
+
+    def __bytes__(self) -> bytes:
+        return b"".join(self._lines)
+
+
+class MediaDescription(Section):
+    """
+    A media description, starting with an `m=` line.
+
+    :rfc:`8866#section-5.14`
+    """
+
+    @property
+    def media(self) -> str:
+        """
+        The media type, e.g. `"audio"` or `"video"`.
+        """
+        return self._media_fields()[0]
+
+    @property
+    def port(self) -> int:
+        """
+        The transport port to which the media stream is sent.
+        """
+        return int(self._media_fields()[1].split("/")[0])
+
+    @port.setter
+    def port(self, value: int) -> None:
+        fields = self._media_fields()
+        _port, sep, count = fields[1].partition("/")
+        fields[1] = f"{value}{sep}{count}"
+        self._lines[0] = replace_line_value(self._lines[0], " ".join(fields))
+
+    @property
+    def proto(self) -> str:
+        """
+        The transport protocol, e.g. `"RTP/AVP"`.
+        """
+        return self._media_fields()[2]
+
+    @property
+    def formats(self) -> list[str]:
+        """
+        The media formats, e.g. RTP payload types.
+        """
+        return self._media_fields()[3:]
+
+    def _media_fields(self) -> list[str]:
+        fields = line_value(self._lines[0]).split(" ")
+        if len(fields) < 4:
+            raise SDP_EXCEPTION
+        return fields
+
+
+class SessionDescription(Section):
+    """
+    An SDP session description, as described by :rfc:`8866`.
+
+    The description is split into lines in a single pass, but media
+    descriptions are only created when they are accessed. Serializing the
+    description outputs all unmodified lines byte-for-byte.
+    """
+
+    def __init__(self, lines: list[bytes], media_lines: list[bytes]) -> None:
+        super().__init__(lines)
+        self._media_lines = media_lines
+        self._media: list[MediaDescription] | None = None
+
+    @classmethod
+    def parse(cls, data: bytes | memoryview) -> "SessionDescription":
+        """
+        Parse the given bytes into a :class:`SessionDescription` instance.
+
+        If parsing fails, a :class:`ValueError` is raised.
+        """
+        lines = bytes(data).splitlines(keepends=True)
+        if not lines or line_type(lines[0]) != b"v":
+            raise SDP_EXCEPTION
+
+        first_media = len(lines)
+        for i, line in enumerate(lines):
+            if line[1:2] != b"=" or not line[:1].islower():
+                raise SDP_EXCEPTION
+            if first_media == len(lines) and line_type(line) == b"m":
+                first_media = i
+
+        return cls(lines[:first_media], lines[first_media:])
+
+    @classmethod
+    def from_message(cls, message: Message) -> "SessionDescription":
+        """
+        Parse the body of the given `message`.
+
+        If the message body is not an SDP body, or parsing fails,
+        a :class:`ValueError` is raised.
+        """
+        content_type = message.content_type
+        if content_type is None or content_type.mime_type.lower() != "application/sdp":
+            raise ValueError("Message body is not SDP")
+        return cls.parse(message.body)
+
+    @property
+    def media(self) -> list[MediaDescription]:
+        """
+        The media descriptions.
+        """
+        if self._media is None:
+            self._media = []
+            start = 0
+            for i, line in enumerate(self._media_lines):
+                if i > start and line_type(line) == b"m":
+                    self._media.append(MediaDescription(self._media_lines[start:i]))
+                    start = i
+            if self._media_lines:
+                self._media.append(MediaDescription(self._media_lines[start:]))
+        return self._media
+
+    @property
+    def origin(self) -> str:
+        """
+        The `o=` origin line value.
+        """
+        return self._get_value(b"o")
+
+    @property
+    def session_name(self) -> str:
+        """
+        The `s=` session name.
+        """
+        return self._get_value(b"s")
+
+    @property
+    def version(self) -> int:
+        """
+        The `v=` protocol version.
+        """
+        return int(self._get_value(b"v"))
+
+    def _get_value(self, key: bytes) -> str:
+        for line in self._lines:
+            if line_type(line) == key:
+                return line_value(line)
+        raise KeyError(key.decode())
+
+    def __bytes__(self) -> bytes:
+        output = b"".join(self._lines)
+        if self._media is None:
+            return output + b"".join(self._media_lines)
+        else:
+            return output + b"".join(bytes(media) for media in self._media)
@@ -6,9 +6,8 @@
 import dataclasses
 import re
 import string
-import urllib.parse
 
-from . import grammar
+from . import grammar, utils
 from .parameters import Parameters
 
 C_VISUAL_SEPARATOR = "-.()"
@@ -39,7 +38,7 @@ TEL_URI_PATTERN = re.compile(
 
 
 @dataclasses.dataclass(frozen=True)
-class URI:
+class URI(utils.CachedStr):
     """
     A SIP, SIPS or TEL URI as described by RFC3261 and RFC3966.
     """
@@ -79,8 +78,8 @@ class URI:
                 scheme=m.group("scheme"),
                 host=m.group("host"),
                 port=int(port) if port else None,
-                user=urllib.parse.unquote(user) if user else None,
-                password=urllib.parse.unquote(password) if password else None,
+                user=utils.unquote(user) if user else None,
+                password=utils.unquote(password) if password else None,
                 parameters=Parameters.parse(parameters),
             )
         elif m := TEL_URI_PATTERN.match(value):
@@ -115,18 +114,16 @@ class URI:
         else:
             return None
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         s = self.scheme + ":"
         if self.scheme == "tel":
             assert self.user is not None
             s += self.user
         else:
             if self.user is not None:
-                s += urllib.parse.quote(self.user, safe=grammar.C_USER_SAFE)
+                s += utils.quote(self.user, safe=grammar.C_USER_SAFE)
                 if self.password is not None:
-                    s += ":" + urllib.parse.quote(
-                        self.password, safe=grammar.C_PASSWORD_SAFE
-                    )
+                    s += ":" + utils.quote(self.password, safe=grammar.C_PASSWORD_SAFE)
                 s += "@"
             s += self.host
             if self.port is not None:
@@ -1,30 +1,154 @@
+import abc
+import re
 import typing
+import urllib.parse
 
 from . import grammar
 
 T = typing.TypeVar("T")
 
+NON_WHITESPACE_PATTERN = re.compile(r"\S+")
+
+# Text up to the next comma which is not inside a quoted string.
+UNQUOTED_ELEMENT_PATTERN = re.compile(r'(?:[^",]|"(?:[^"\\]|\\.)*")*')
+
+# Patterns matching characters which need escaping, keyed by safe characters.
+UNSAFE_PATTERNS: dict[str, re.Pattern[str]] = {}
+
+
+class ParseError(ValueError):
+    """
+    A :class:`ValueError` describing where parsing failed.
+
+    These errors are only built once parsing has failed, so successful
+    parsing does not pay for the extra details.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        expected: str | None = None,
+        offset: int | None = None,
+        header: str | None = None,
+        raw: bytes | None = None,
+    ) -> None:
+        super().__init__(message)
+
+        self.expected = expected
+        'The production which was expected, e.g. `"Via"`.'
+
+        self.offset = offset
+        """
+        The offset at which parsing failed, in the header value or, for
+        errors in the message structure, in the message.
+        """
+
+        self.header = header
+        "The name of the header which was being parsed."
+
+        self.raw = raw
+        "The raw line which could not be parsed, for invalid header lines."
+
+    @classmethod
+    def wrap(
+        cls,
+        exc: ValueError,
+        expected: str | None = None,
+        offset: int | None = None,
+        header: str | None = None,
+        raw: bytes | None = None,
+    ) -> "ParseError":
+        """
+        Build a :class:`ParseError` from `exc`, keeping any details it
+        already carries and filling in the missing ones.
+        """
+        if isinstance(exc, ParseError):
+            expected = exc.expected or expected
+            offset = exc.offset if exc.offset is not None else offset
+            header = exc.header or header
+            raw = exc.raw if exc.raw is not None else raw
+        return cls(str(exc), expected=expected, offset=offset, header=header, raw=raw)
+
+
+class CachedStr(abc.ABC):
+    """
+    Base class for immutable values, which caches their string form.
+    """
+
+    _str: str
+
+    def __str__(self) -> str:
+        try:
+            return self._str
+        except AttributeError:
+            self._set_str(self._render())
+            return self._str
+
+    @abc.abstractmethod
+    def _render(self) -> str:
+        """
+        Render the value as a string.
+        """
+
+    def _set_str(self, value: str) -> None:
+        # Bypass the `__setattr__` of frozen dataclasses.
+        object.__setattr__(self, "_str", value)
+
+
+def parse_error(exc: ValueError, expected: str, value: str, rest: str) -> ParseError:
+    """
+    Build the error raised when parsing the raw `value` failed with `rest`
+    remaining to be parsed from its simplified form.
+    """
+    # Map the offset in the simplified value back to the raw value,
+    # pointing at the first character which is not whitespace.
+    offset = len(grammar.simplify_whitespace(value)) - len(rest)
+    count = 0
+    for m in NON_WHITESPACE_PATTERN.finditer(value):
+        length = m.end() - m.start()
+        if offset < count + length:
+            return ParseError.wrap(
+                exc, expected=expected, offset=m.start() + max(offset - count, 0)
+            )
+        # Runs are separated by a single space once simplified.
+        count += length + 1
+    return ParseError.wrap(exc, expected=expected, offset=len(value))
+
 
 def parse_many(
     parser: typing.Callable[[str], tuple[T, str]],
     parser_exc: ValueError,
+    expected: str,
     value: str,
+    errors: list[ParseError] | None = None,
 ) -> list[T]:
-    value = grammar.simplify_whitespace(value)
+    rest = grammar.simplify_whitespace(value)
 
     items: list[T] = []
-    while value:
-        item, value = parser(value)
-        items.append(item)
-
-        if value.startswith(","):
-            # We have a separator, check it is followed by data.
-            value = value[1:].lstrip()
-            if not value:
+    while rest:
+        try:
+            item, rest = parser(rest)
+            if rest and not rest.startswith(","):
+                # We do not have a separator, this is invalid.
                 raise parser_exc
-        elif value:
-            # We do not have a separator, this is invalid.
-            raise parser_exc
+            items.append(item)
+
+            if rest:
+                # We have a separator, check it is followed by data.
+                rest = rest[1:].lstrip()
+                if not rest:
+                    raise parser_exc
+        except ValueError as exc:
+            error = parse_error(exc, expected, value, rest)
+            if errors is None:
+                raise error from None
+            errors.append(error)
+
+            # Skip to the next element, ignoring commas in quoted strings.
+            m = UNQUOTED_ELEMENT_PATTERN.match(rest)
+            assert m is not None
+            pos = m.end()
+            rest = rest[pos + 1 :].lstrip() if rest.startswith(",", pos) else ""
 
     return items
 
@@ -32,12 +156,45 @@ def parse_many(
 def parse_single(
     parser: typing.Callable[[str], tuple[T, str]],
     parser_exc: ValueError,
+    expected: str,
     value: str,
 ) -> T:
-    value = grammar.simplify_whitespace(value)
+    rest = grammar.simplify_whitespace(value)
 
-    item, value = parser(value)
-    if value:
-        raise parser_exc
+    try:
+        item, rest = parser(rest)
+        if rest:
+            raise parser_exc
+    except ValueError as exc:
+        raise parse_error(exc, expected, value, rest) from None
 
     return item
+
+
+def quote(value: str, safe: str = "/") -> str:
+    """
+    Escape the characters of `value` which are neither unreserved
+    nor in `safe`.
+
+    If no character needs escaping, `value` is returned as-is.
+    """
+    try:
+        pattern = UNSAFE_PATTERNS[safe]
+    except KeyError:
+        pattern = UNSAFE_PATTERNS[safe] = re.compile(
+            "[^" + re.escape(grammar.C_ALWAYS_SAFE + safe) + "]"
+        )
+    if pattern.search(value) is None:
+        return value
+    return urllib.parse.quote(value, safe=safe)
+
+
+def unquote(value: str) -> str:
+    """
+    Replace escapes in `value` by the characters they represent.
+
+    If `value` contains no escapes, it is returned as-is.
+    """
+    if "%" not in value:
+        return value
+    return urllib.parse.unquote(value)
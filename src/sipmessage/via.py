@@ -7,7 +7,7 @@ import dataclasses
 import re
 
 from . import grammar, utils
-from .parameters import Parameters
+from .parameters import Parameters, splice_parameters
 
 VIA_EXCEPTION = ValueError("Via is not valid")
 VIA_PATTERN = re.compile(
@@ -19,7 +19,7 @@ VIA_PATTERN = re.compile(
 
 
 @dataclasses.dataclass(frozen=True)
-class Via:
+class Via(utils.CachedStr):
     """
     A `Via` header, indicating a reponse location for a transaction.
     """
@@ -43,16 +43,38 @@ class Via:
 
         If parsing fails, a :class:`ValueError` is raised.
         """
-        return utils.parse_single(cls._parse_one, VIA_EXCEPTION, value)
+        return utils.parse_single(cls._parse_one, VIA_EXCEPTION, "Via", value)
 
     @classmethod
-    def parse_many(cls, value: str) -> "list[Via]":
+    def parse_many(
+        cls, value: str, errors: list[utils.ParseError] | None = None
+    ) -> "list[Via]":
         """
         Parse the given string into a list of :class:`Via` instances.
 
+        If parsing fails, a :class:`ValueError` is raised. If `errors` is
+        a list, invalid elements are skipped instead, and their errors are
+        appended to it.
+        """
+        return utils.parse_many(cls._parse_one, VIA_EXCEPTION, "Via", value, errors)
+
+    @classmethod
+    def splice_parameters(cls, value: str, **changes: str | None) -> str:
+        """
+        Update the parameters of the first `Via` in the given header value,
+        returning the new header value.
+
+        Only the parameters are modified, the remainder of the header value,
+        including any further `Via`, is kept verbatim.
+
         If parsing fails, a :class:`ValueError` is raised.
         """
-        return utils.parse_many(cls._parse_one, VIA_EXCEPTION, value)
+        value = grammar.simplify_whitespace(value)
+        m = VIA_PATTERN.match(value)
+        if m is None:
+            raise VIA_EXCEPTION
+
+        return splice_parameters(value, m, changes)
 
     @classmethod
     def _parse_one(cls, value: str) -> tuple["Via", str]:
@@ -69,7 +91,7 @@ class Via:
             parameters=Parameters.parse(m.group("parameters")),
         ), value[m.end() :]
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         s = f"SIP/2.0/{self.transport} {self.host}"
         if self.port is not None:
             s += f":{self.port}"
@@ -5,7 +5,7 @@
 
 import unittest
 
-from sipmessage import URI, Address, Parameters
+from sipmessage import URI, Address, Parameters, ParseError
 
 
 class AddressTest(unittest.TestCase):
@@ -139,9 +139,10 @@ class AddressTest(unittest.TestCase):
                 ),
             ),
         )
+        # The parameters are serialized verbatim.
         self.assertEqual(
             str(contact),
-            "<sip:caller@host5.example.net;lr;name=value%2541>",
+            "<sip:caller@host5.example.net;%6C%72;n%61me=v%61lue%25%34%31>",
         )
 
     def test_rfc4475_esc02_from(self) -> None:
@@ -204,6 +205,19 @@ class AddressTest(unittest.TestCase):
             Address.parse("<sip:1.2.3.4;lr>,")
         self.assertEqual(str(cm.exception), "Address is not valid")
 
+    def test_splice_parameters(self) -> None:
+        value = Address.splice_parameters(
+            '"Bob" <sips:bob@biloxi.com;transport=tcp>', tag="a48s"
+        )
+        self.assertEqual(value, '"Bob" <sips:bob@biloxi.com;transport=tcp>;tag=a48s')
+
+        value = Address.splice_parameters("sip:bob@biloxi.com;tag=1234", tag="a48s")
+        self.assertEqual(value, "sip:bob@biloxi.com;tag=a48s")
+
+        with self.assertRaises(ValueError) as cm:
+            Address.splice_parameters("", tag="a48s")
+        self.assertEqual(str(cm.exception), "Address is not valid")
+
 
 class AddressParseManyTest(unittest.TestCase):
     def test_simple(self) -> None:
@@ -228,3 +242,42 @@ class AddressParseManyTest(unittest.TestCase):
         with self.assertRaises(ValueError) as cm:
             Address.parse_many("<sip:1.2.3.4;lr>,")
         self.assertEqual(str(cm.exception), "Address is not valid")
+
+    def test_errors(self) -> None:
+        errors: list[ParseError] = []
+        contacts = Address.parse_many(
+            "<sip:alice@atlanta.com>, <sip:bob@biloxi.com $, <sip:carol@chicago.com>,",
+            errors,
+        )
+        self.assertEqual(
+            contacts,
+            [
+                Address(uri=URI(scheme="sip", host="atlanta.com", user="alice")),
+                Address(uri=URI(scheme="sip", host="chicago.com", user="carol")),
+            ],
+        )
+        self.assertEqual(
+            [(str(error), error.offset) for error in errors],
+            [("URI is not valid", 25), ("Address is not valid", 72)],
+        )
+
+    def test_errors_quoted_comma(self) -> None:
+        errors: list[ParseError] = []
+        contacts = Address.parse_many(
+            '<sip:alice@atlanta.com> $ "Bob, B." <sip:bob@biloxi.com;x="a,\\"b">, '
+            '"Carol, C." <sip:carol@chicago.com>, "Dave, \\"D.\\" $',
+            errors,
+        )
+        self.assertEqual(
+            contacts,
+            [
+                Address(
+                    uri=URI(scheme="sip", host="chicago.com", user="carol"),
+                    name="Carol, C.",
+                ),
+            ],
+        )
+        self.assertEqual(
+            [(str(error), error.offset) for error in errors],
+            [("Address is not valid", 24), ("URI is not valid", 105)],
+        )
@@ -5,7 +5,7 @@
 
 import unittest
 
-from sipmessage import AuthChallenge, AuthCredentials, AuthParameters
+from sipmessage import AuthChallenge, AuthCredentials, AuthParameters, ParseError
 
 
 class AuthChallengeTest(unittest.TestCase):
@@ -54,6 +54,44 @@ class AuthChallengeTest(unittest.TestCase):
             'opaque="", stale=FALSE, algorithm=MD5',
         )
 
+    def test_digest_quoted_comma(self) -> None:
+        auth = AuthChallenge.parse(
+            'Digest realm="atlanta, \\"north\\"", qop="auth,auth-int", nonce="abc"'
+        )
+        self.assertEqual(
+            auth,
+            AuthChallenge(
+                scheme="Digest",
+                parameters=AuthParameters(
+                    realm='atlanta, "north"', qop="auth,auth-int", nonce="abc"
+                ),
+            ),
+        )
+
+    def test_invalid(self) -> None:
+        for value in [
+            "Digest",
+            "Digest ",
+            "Digest realm",
+            'Digest realm="atlanta.com",',
+            'Digest realm="atlanta.com" nonce="abc"',
+            'Digest realm="atlanta.com, nonce=abc',
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                AuthChallenge.parse(value)
+            self.assertEqual(str(cm.exception), "AuthChallenge is not valid")
+
+    def test_invalid_offset(self) -> None:
+        with self.assertRaises(ParseError) as cm:
+            AuthChallenge.parse('Digest realm="atlanta.com", $')
+        self.assertEqual(cm.exception.expected, "AuthChallenge")
+        self.assertEqual(cm.exception.offset, 28)
+
+        with self.assertRaises(ParseError) as cm:
+            AuthParameters.parse("  realm=$")
+        self.assertEqual(cm.exception.expected, "AuthParameters")
+        self.assertEqual(cm.exception.offset, 2)
+
 
 class AuthCredentialsTest(unittest.TestCase):
     def test_empty(self) -> None:
@@ -104,13 +142,19 @@ class AuthCredentialsTest(unittest.TestCase):
             'realm="biloxi.com", '
             'nonce="dcd98b7102dd2f0e8b11d0f600bfb0c093", '
             'uri="sip:bob@biloxi.com", '
-            'qop="auth", '
+            "qop=auth, "
             "nc=00000001, "
             'cnonce="0a4f113b", '
             'response="6629fae49393a05397450978507c4ef1", '
             'opaque="5ccc069c403ebaf9f0171e9517f40e41"',
         )
 
+    def test_invalid(self) -> None:
+        for value in ["Digest", "Digest a b", 'Digest realm="atlanta.com",']:
+            with self.assertRaises(ValueError) as cm:
+                AuthCredentials.parse(value)
+            self.assertEqual(str(cm.exception), "AuthCredentials are not valid")
+
     def test_invalid_constructor(self) -> None:
         with self.assertRaises(ValueError) as cm:
             AuthCredentials(scheme="Digest")
@@ -140,9 +184,10 @@ class AuthParametersTest(unittest.TestCase):
         self.assertEqual(str(parameters), "")
 
     def test_invalid(self) -> None:
-        with self.assertRaises(ValueError) as cm:
-            AuthParameters.parse("a")
-        self.assertEqual(str(cm.exception), "AuthParameters are not valid")
+        for value in ["a", "a=1,", "a=1;b=2", "a=1 b=2", "a=1,,b=2"]:
+            with self.assertRaises(ValueError) as cm:
+                AuthParameters.parse(value)
+            self.assertEqual(str(cm.exception), "AuthParameters are not valid")
 
     def test_replace(self) -> None:
         parameters1 = AuthParameters(foo="1", bar="2")
@@ -0,0 +1,146 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import os
+import tempfile
+import unittest
+
+from sipmessage import CallIndex, LogReader, MessageSummary
+
+from .test_message import lf2crlf
+
+INVITE = lf2crlf(b"""INVITE sip:bob@biloxi.com SIP/2.0
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+To: Bob <sip:bob@biloxi.com;tag=uri-param>
+From: Alice <sip:alice@atlanta.com>;tag=1928301774
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+Content-Length: 17
+
+To: <sip:x>;tag=y
+""")
+
+RINGING = lf2crlf(b"""SIP/2.0 180 Ringing
+v: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+t: Bob <sip:bob@biloxi.com;tag=uri-param> ; TAG = a6c85cf
+f: Alice <sip:alice@atlanta.com>;tag=1928301774
+i: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+l: 0
+
+""")
+
+BYE = lf2crlf(b"""BYE sip:alice@pc33.atlanta.com SIP/2.0
+Via: SIP/2.0/UDP 192.0.2.4;branch=z9hG4bKnashds10
+From: sip:bob@biloxi.com;tag=a6c85cf
+To: sip:alice@atlanta.com;tag=1928301774
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 231 BYE
+Content-Length: 0
+
+""")
+
+OPTIONS = lf2crlf(b"""OPTIONS sip:biloxi.com SIP/2.0
+From: <sip:alice@atlanta.com>;tag=abc
+To: <sip:biloxi.com>
+Call-ID: 1j9FpLxk3uxtm8tn@biloxi.com
+CSeq: 1 OPTIONS
+
+""")
+
+
+class MessageSummaryTest(unittest.TestCase):
+    def test_parse(self) -> None:
+        summary = MessageSummary.parse(INVITE)
+        self.assertEqual(
+            summary,
+            MessageSummary(
+                call_id="a84b4c76e66710@pc33.atlanta.com",
+                cseq=314159,
+                method="INVITE",
+                from_tag="1928301774",
+                to_tag=None,
+            ),
+        )
+        self.assertEqual(
+            summary.dialog_id, ("a84b4c76e66710@pc33.atlanta.com", "", "1928301774")
+        )
+
+    def test_parse_compact(self) -> None:
+        summary = MessageSummary.parse(RINGING)
+        self.assertEqual(summary.call_id, "a84b4c76e66710@pc33.atlanta.com")
+        self.assertEqual(summary.to_tag, "a6c85cf")
+
+        # The dialog identifier does not depend on the direction.
+        self.assertEqual(summary.dialog_id, MessageSummary.parse(BYE).dialog_id)
+
+    def test_parse_range(self) -> None:
+        data = b"garbage" + BYE.replace(b"\r\n", b"\n") + b"garbage"
+        summary = MessageSummary.parse(data, 7, len(data) - 7)
+        self.assertEqual((summary.cseq, summary.method), (231, "BYE"))
+
+    def test_invalid(self) -> None:
+        for data in [
+            INVITE.replace(b"Call-ID", b"X-Call-ID"),
+            INVITE.replace(b"CSeq: 314159 INVITE", b"CSeq: INVITE"),
+            INVITE.replace(b"To:", b"X-To:"),
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                MessageSummary.parse(data)
+            self.assertEqual(
+                str(cm.exception), "SIP message headers are not valid for indexing"
+            )
+
+
+class CallIndexTest(unittest.TestCase):
+    def test_index(self) -> None:
+        index = CallIndex()
+        for position, data in enumerate([INVITE, OPTIONS, RINGING, BYE]):
+            index.add(position, MessageSummary.parse(data))
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(
+            list(index.call_ids()),
+            ["a84b4c76e66710@pc33.atlanta.com", "1j9FpLxk3uxtm8tn@biloxi.com"],
+        )
+        self.assertEqual(list(index.call("a84b4c76e66710@pc33.atlanta.com")), [0, 2, 3])
+        self.assertEqual(list(index.call("1j9FpLxk3uxtm8tn@biloxi.com")), [1])
+        self.assertEqual(list(index.call("unknown")), [])
+
+        dialog_ids = index.dialog_ids("a84b4c76e66710@pc33.atlanta.com")
+        self.assertEqual(
+            dialog_ids,
+            [
+                ("a84b4c76e66710@pc33.atlanta.com", "", "1928301774"),
+                ("a84b4c76e66710@pc33.atlanta.com", "1928301774", "a6c85cf"),
+            ],
+        )
+        self.assertEqual(list(index.dialog(dialog_ids[0])), [0])
+        self.assertEqual(list(index.dialog(dialog_ids[1])), [2, 3])
+        self.assertEqual(list(index.dialog(("unknown", "", ""))), [])
+        self.assertEqual(index.dialog_ids("unknown"), [])
+
+    def test_log_reader(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sip.log")
+            with open(path, "wb") as fp:
+                for data in [INVITE, b"NOT SIP\r\n\r\n", RINGING, BYE]:
+                    fp.write(b"----\n" + data)
+
+            with LogReader(path, marker=rb"^----$") as reader:
+                index = reader.index_calls()
+                self.assertEqual(
+                    [
+                        reader[i].cseq.method
+                        for i in index.call("a84b4c76e66710@pc33.atlanta.com")
+                    ],
+                    ["INVITE", "INVITE", "BYE"],
+                )
+
+            # Empty log.
+            with open(path, "wb"):
+                pass
+            with LogReader(path, marker=rb"^----$") as reader:
+                self.assertEqual(len(reader.index_calls()), 0)
@@ -0,0 +1,364 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import unittest
+
+from sipmessage import (
+    AuthChallenge,
+    AuthCredentials,
+    AuthParameters,
+    DigestClient,
+    DigestServer,
+    DigestStatus,
+    NonceStore,
+)
+from sipmessage.digest import compute_ha1, compute_response
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ComputeResponseTest(unittest.TestCase):
+    def test_rfc2617(self) -> None:
+        # RFC 2617 section 3.5
+        self.assertEqual(
+            compute_response(
+                algorithm="MD5",
+                ha1=compute_ha1(
+                    "MD5", "Mufasa", "testrealm@host.com", "Circle Of Life"
+                ),
+                method="GET",
+                uri="/dir/index.html",
+                nonce="dcd98b7102dd2f0e8b11d0f600bfb0c093",
+                qop="auth",
+                nc="00000001",
+                cnonce="0a4f113b",
+            ),
+            "6629fae49393a05397450978507c4ef1",
+        )
+
+    def test_rfc7616(self) -> None:
+        # RFC 7616 section 3.9.1
+        for algorithm, expected in [
+            ("MD5", "8ca523f5e9506fed4657c9700eebdbec"),
+            (
+                "SHA-256",
+                "753927fa0e85d155564e2e272a28d1802ca10daf4496794697cf8db5856cb6c1",
+            ),
+        ]:
+            ha1 = compute_ha1(
+                algorithm, "Mufasa", "http-auth@example.org", "Circle of Life"
+            )
+            self.assertEqual(
+                compute_response(
+                    algorithm=algorithm,
+                    ha1=ha1,
+                    method="GET",
+                    uri="/dir/index.html",
+                    nonce="7ypf/xlj9XXwfDPEoM4URrv/xwf94BcCAzFZH4GiTo0v",
+                    qop="auth",
+                    nc="00000001",
+                    cnonce="f2/wE4q74E6zIJEtWaHKaf5wv/H5QzzpXusqGemxURZJ",
+                ),
+                expected,
+            )
+
+    def test_rfc2069(self) -> None:
+        self.assertEqual(
+            compute_response(
+                algorithm="MD5",
+                ha1=compute_ha1(
+                    "MD5", "Mufasa", "testrealm@host.com", "Circle Of Life"
+                ),
+                method="GET",
+                uri="/dir/index.html",
+                nonce="dcd98b7102dd2f0e8b11d0f600bfb0c093",
+            ),
+            "670fd8c2df070c60b045671b8b24ff02",
+        )
+
+    def test_unsupported(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            compute_ha1("SHA-1", "alice", "atlanta.com", "secret")
+        self.assertEqual(str(cm.exception), "Digest algorithm 'SHA-1' is not supported")
+
+        with self.assertRaises(ValueError) as cm:
+            compute_response(
+                algorithm="MD5",
+                ha1="",
+                method="GET",
+                uri="/",
+                nonce="abc",
+                qop="auth-conf",
+            )
+        self.assertEqual(str(cm.exception), "Digest qop 'auth-conf' is not supported")
+
+
+class DigestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.client = DigestClient(username="alice", password="secret")
+
+    def _test_roundtrip(self, algorithm: str, qop: str | None) -> None:
+        server = DigestServer(
+            realm="atlanta.com",
+            algorithm=algorithm,
+            qop=qop,
+            nonces=NonceStore(clock=self.clock),
+        )
+        challenge = server.challenge()
+        self.assertEqual(challenge.parameters["algorithm"], algorithm)
+
+        credentials = self.client.authorize(
+            challenge, "REGISTER", "sip:atlanta.com", body=b"body"
+        )
+        assert credentials.parameters is not None
+        self.assertEqual(credentials.parameters["username"], "alice")
+        self.assertEqual(credentials.parameters.get("qop"), qop)
+        if qop is not None:
+            # The qop of credentials is a token, which is not quoted.
+            self.assertTrue(str(credentials).endswith(f", qop={qop}"))
+
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "secret", body=b"body"),
+            DigestStatus.VALID,
+        )
+        self.assertEqual(
+            server.verify(credentials, "INVITE", "secret", body=b"body"),
+            DigestStatus.INVALID,
+        )
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "wrong", body=b"body"),
+            DigestStatus.INVALID,
+        )
+
+    def test_md5_auth(self) -> None:
+        self._test_roundtrip("MD5", "auth")
+
+    def test_md5_auth_int(self) -> None:
+        self._test_roundtrip("MD5", "auth-int")
+
+    def test_md5_no_qop(self) -> None:
+        self._test_roundtrip("MD5", None)
+
+    def test_md5_sess(self) -> None:
+        self._test_roundtrip("MD5-sess", "auth")
+
+    def test_sha256_auth(self) -> None:
+        self._test_roundtrip("SHA-256", "auth")
+
+    def test_sha512_256_auth(self) -> None:
+        self._test_roundtrip("SHA-512-256", "auth")
+
+    def test_client_nonce_count(self) -> None:
+        server = DigestServer(realm="atlanta.com", nonces=NonceStore(clock=self.clock))
+        challenge = server.challenge()
+
+        credentials1 = self.client.authorize(challenge, "REGISTER", "sip:atlanta.com")
+        credentials2 = self.client.authorize(challenge, "REGISTER", "sip:atlanta.com")
+        assert credentials1.parameters is not None
+        assert credentials2.parameters is not None
+        self.assertEqual(credentials1.parameters["nc"], "00000001")
+        self.assertEqual(credentials2.parameters["nc"], "00000002")
+
+        # Replaying the first credentials after the second is rejected.
+        self.assertEqual(
+            server.verify(credentials2, "REGISTER", "secret"), DigestStatus.VALID
+        )
+        self.assertEqual(
+            server.verify(credentials1, "REGISTER", "secret"), DigestStatus.INVALID
+        )
+
+        # A new nonce resets the nonce count.
+        credentials3 = self.client.authorize(
+            server.challenge(), "REGISTER", "sip:atlanta.com"
+        )
+        assert credentials3.parameters is not None
+        self.assertEqual(credentials3.parameters["nc"], "00000001")
+
+    def test_client_opaque(self) -> None:
+        challenge = AuthChallenge(
+            scheme="Digest",
+            parameters=AuthParameters(
+                realm="atlanta.com",
+                nonce="abcd",
+                opaque="5ccc069c403ebaf9f0171e9517f40e41",
+            ),
+        )
+        credentials = self.client.authorize(challenge, "INVITE", "sip:bob@atlanta.com")
+        self.assertEqual(
+            credentials.parameters,
+            AuthParameters(
+                username="alice",
+                realm="atlanta.com",
+                nonce="abcd",
+                uri="sip:bob@atlanta.com",
+                response="9d326fe6700ea48af6ab438145b5ad5a",
+                opaque="5ccc069c403ebaf9f0171e9517f40e41",
+            ),
+        )
+
+    def test_client_not_digest(self) -> None:
+        for challenge in [
+            AuthChallenge(
+                scheme="Bearer", parameters=AuthParameters(realm="atlanta.com")
+            ),
+            AuthChallenge(
+                scheme="Digest", parameters=AuthParameters(realm="atlanta.com")
+            ),
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                self.client.authorize(challenge, "INVITE", "sip:bob@atlanta.com")
+            self.assertEqual(
+                str(cm.exception), "AuthChallenge is not a digest challenge"
+            )
+
+    def test_client_password(self) -> None:
+        server = DigestServer(realm="atlanta.com", nonces=NonceStore(clock=self.clock))
+        challenge = server.challenge()
+
+        self.client.authorize(challenge, "REGISTER", "sip:atlanta.com")
+        self.client.password = "changed"
+        credentials = self.client.authorize(challenge, "REGISTER", "sip:atlanta.com")
+        self.assertEqual(self.client.password, "changed")
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "changed"), DigestStatus.VALID
+        )
+
+    def test_server_password_changed(self) -> None:
+        server = DigestServer(realm="atlanta.com", nonces=NonceStore(clock=self.clock))
+        credentials = self.client.authorize(
+            server.challenge(), "REGISTER", "sip:atlanta.com"
+        )
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "secret"), DigestStatus.VALID
+        )
+
+        # Once the password changed, credentials using the old one are rejected.
+        credentials = self.client.authorize(
+            server.challenge(), "REGISTER", "sip:atlanta.com"
+        )
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "changed"), DigestStatus.INVALID
+        )
+
+    def test_server_ha1(self) -> None:
+        server = DigestServer(realm="atlanta.com", nonces=NonceStore(clock=self.clock))
+        credentials = self.client.authorize(
+            server.challenge(), "REGISTER", "sip:atlanta.com"
+        )
+        self.assertEqual(
+            server.verify(
+                credentials,
+                "REGISTER",
+                ha1=compute_ha1("MD5", "alice", "atlanta.com", "secret"),
+            ),
+            DigestStatus.VALID,
+        )
+
+        # Exactly one of password or HA1 must be given.
+        for password, ha1 in [(None, None), ("secret", "abcd")]:
+            with self.assertRaises(ValueError) as cm:
+                server.verify(credentials, "REGISTER", password=password, ha1=ha1)
+            self.assertEqual(
+                str(cm.exception), "Exactly one of `password` or `ha1` must be set."
+            )
+
+    def test_server_stale(self) -> None:
+        server = DigestServer(realm="atlanta.com", nonces=NonceStore(clock=self.clock))
+        credentials = self.client.authorize(
+            server.challenge(), "REGISTER", "sip:atlanta.com"
+        )
+
+        self.clock.now = 301.0
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "secret"), DigestStatus.STALE
+        )
+
+        challenge = server.challenge(stale=True)
+        self.assertEqual(challenge.parameters["stale"], "TRUE")
+
+    def test_server_invalid(self) -> None:
+        server = DigestServer(realm="atlanta.com", nonces=NonceStore(clock=self.clock))
+        nonce = server.challenge().parameters["nonce"]
+        valid = {
+            "username": "alice",
+            "realm": "atlanta.com",
+            "nonce": nonce,
+            "uri": "sip:atlanta.com",
+            "qop": "auth",
+            "nc": "00000001",
+            "cnonce": "abcd",
+            "response": "",
+        }
+        for credentials in [
+            AuthCredentials(scheme="Bearer", token="sometoken"),
+            AuthCredentials(
+                scheme="Digest",
+                parameters=AuthParameters(**{**valid, "realm": "biloxi.com"}),
+            ),
+            AuthCredentials(
+                scheme="Digest",
+                parameters=AuthParameters(**{**valid, "algorithm": "SHA-256"}),
+            ),
+            AuthCredentials(
+                scheme="Digest",
+                parameters=AuthParameters(**{**valid, "qop": "auth-int"}),
+            ),
+            AuthCredentials(
+                scheme="Digest",
+                parameters=AuthParameters(
+                    **{k: v for k, v in valid.items() if k != "nc"}
+                ),
+            ),
+        ]:
+            self.assertEqual(
+                server.verify(credentials, "REGISTER", "secret"),
+                DigestStatus.INVALID,
+            )
+
+        # A qop is given, but none was offered.
+        server = DigestServer(realm="atlanta.com", qop=None)
+        credentials = AuthCredentials(
+            scheme="Digest", parameters=AuthParameters(**valid)
+        )
+        self.assertEqual(
+            server.verify(credentials, "REGISTER", "secret"), DigestStatus.INVALID
+        )
+
+
+class NonceStoreTest(unittest.TestCase):
+    def test_expiry(self) -> None:
+        clock = FakeClock()
+        store = NonceStore(lifetime=10.0, clock=clock)
+
+        nonce1 = store.create()
+        clock.now = 5.0
+        nonce2 = store.create()
+        self.assertEqual(len(store), 2)
+
+        clock.now = 10.0
+        self.assertEqual(store.check(nonce1, None), DigestStatus.STALE)
+        self.assertEqual(store.check(nonce2, None), DigestStatus.VALID)
+        self.assertEqual(len(store), 1)
+
+        clock.now = 15.0
+        store.create()
+        self.assertEqual(len(store), 1)
+
+    def test_nonce_count(self) -> None:
+        store = NonceStore()
+        nonce = store.create()
+
+        self.assertEqual(store.check(nonce, "00000001"), DigestStatus.VALID)
+        self.assertEqual(store.check(nonce, "00000001"), DigestStatus.INVALID)
+        self.assertEqual(store.check(nonce, "0000000a"), DigestStatus.VALID)
+        self.assertEqual(store.check(nonce, "00000002"), DigestStatus.INVALID)
+        self.assertEqual(store.check(nonce, "zzzzzzzz"), DigestStatus.INVALID)
@@ -0,0 +1,197 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import array
+import io
+import json
+import sys
+import unittest
+
+from sipmessage import URI, ColumnExporter, Message, Response, StringColumn
+
+from .test_message import lf2crlf
+
+INVITE = lf2crlf(b"""INVITE sip:bob@biloxi.com SIP/2.0
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds, SIP/2.0/UDP 192.0.2.1
+To: Bob <sip:bob@biloxi.com>
+From: Alice <sip:alice@atlanta.com>;tag=1928301774
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+Content-Length: 0
+
+""")
+
+RINGING = lf2crlf(b"""SIP/2.0 180 Ringing
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+To: Bob <sip:bob@biloxi.com>;tag=a6c85cf
+From: Alice <sip:alice@atlanta.com>;tag=1928301774
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+Content-Length: 0
+
+""")
+
+
+class StringColumnTest(unittest.TestCase):
+    def test_column(self) -> None:
+        column = StringColumn()
+        for value in ["INVITE", "ACK", "INVITE", "BYE"]:
+            column.append(value)
+
+        self.assertEqual(len(column), 4)
+        self.assertEqual(column.values, ["INVITE", "ACK", "BYE"])
+        self.assertEqual(column.codes, array.array("L", [0, 1, 0, 2]))
+        self.assertEqual(column[2], "INVITE")
+        self.assertEqual(column[1:], ["ACK", "INVITE", "BYE"])
+        self.assertEqual(list(column), ["INVITE", "ACK", "INVITE", "BYE"])
+
+
+class ColumnExporterTest(unittest.TestCase):
+    def test_export(self) -> None:
+        exporter = ColumnExporter()
+        self.assertEqual(len(exporter), 0)
+
+        exporter.add(Message.parse(INVITE), timestamp=1.5)
+        exporter.add(Message.parse(RINGING), timestamp=1.75)
+        # Missing headers.
+        exporter.add(Response(200, "OK"))
+        self.assertEqual(len(exporter), 3)
+
+        columns = exporter.columns
+        self.assertEqual(columns["timestamp"], array.array("d", [1.5, 1.75, 0.0]))
+        self.assertEqual(list(columns["method"]), ["INVITE", "INVITE", ""])
+        self.assertEqual(columns["code"], array.array("H", [0, 180, 200]))
+        self.assertEqual(
+            list(columns["call_id"]),
+            ["a84b4c76e66710@pc33.atlanta.com", "a84b4c76e66710@pc33.atlanta.com", ""],
+        )
+        self.assertEqual(list(columns["from_user"]), ["alice", "alice", ""])
+        self.assertEqual(list(columns["to_user"]), ["bob", "bob", ""])
+        self.assertEqual(
+            list(columns["via_host"]), ["pc33.atlanta.com", "pc33.atlanta.com", ""]
+        )
+        self.assertEqual(columns["cseq"], array.array("L", [314159, 314159, 0]))
+
+        output = io.StringIO()
+        exporter.write_csv(output)
+        self.assertEqual(
+            output.getvalue(),
+            lf2crlf(
+                b"""timestamp,method,code,call_id,from_user,to_user,via_host,cseq
+1.5,INVITE,0,a84b4c76e66710@pc33.atlanta.com,alice,bob,pc33.atlanta.com,314159
+1.75,INVITE,180,a84b4c76e66710@pc33.atlanta.com,alice,bob,pc33.atlanta.com,314159
+0.0,,200,,,,,0
+"""
+            ).decode(),
+        )
+
+    def test_binary(self) -> None:
+        exporter = ColumnExporter()
+        exporter.add(Message.parse(INVITE), timestamp=1.5)
+        exporter.add(Message.parse(RINGING), timestamp=1.75)
+
+        fp = io.BytesIO()
+        exporter.write_binary(fp)
+        data = fp.getvalue()
+        self.assertTrue(data.startswith(b"sipmessage-columns 1\n"))
+
+        loaded = ColumnExporter.read_binary(io.BytesIO(data))
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(
+            {name: list(column) for name, column in loaded.columns.items()},
+            {name: list(column) for name, column in exporter.columns.items()},
+        )
+
+        # Rows can be added to the loaded columns.
+        loaded.add(Message.parse(INVITE))
+        method = loaded.columns["method"]
+        assert isinstance(method, StringColumn)
+        self.assertEqual(method.values, ["INVITE"])
+
+        # Data written with the other byte order is swapped.
+        fp = io.BytesIO()
+        fp.write(data.split(b"\n", 2)[0] + b"\n")
+        header = json.loads(data.split(b"\n", 2)[1])
+        header["byteorder"] = "big" if sys.byteorder == "little" else "little"
+        fp.write(json.dumps(header).encode() + b"\n")
+        for column in exporter.columns.values():
+            values = column.codes if isinstance(column, StringColumn) else column
+            swapped = array.array(values.typecode, values)
+            swapped.byteswap()
+            fp.write(swapped.tobytes())
+        loaded = ColumnExporter.read_binary(io.BytesIO(fp.getvalue()))
+        self.assertEqual(list(loaded.columns["cseq"]), [314159, 314159])
+        self.assertEqual(list(loaded.columns["timestamp"]), [1.5, 1.75])
+
+    def test_binary_invalid(self) -> None:
+        exporter = ColumnExporter(columns=["method", "code"])
+        exporter.add(Message.parse(RINGING))
+        fp = io.BytesIO()
+        exporter.write_binary(fp)
+        magic, header, body = fp.getvalue().split(b"\n", 2)
+
+        def with_header(**kwargs: object) -> bytes:
+            return (
+                magic
+                + b"\n"
+                + json.dumps({**json.loads(header), **kwargs}).encode()
+                + b"\n"
+                + body
+            )
+
+        code_size = array.array("H").itemsize
+        for data in [
+            b"",
+            b"not columns\n",
+            magic + b"\n{\n",
+            magic + b"\n[]\n",
+            with_header(rows=-1),
+            with_header(rows=2),
+            with_header(columns=[{"name": "user_agent"}]),
+            with_header(columns=[{"name": "code", "itemsize": 8}]),
+            with_header(
+                columns=[
+                    {"name": "method", "itemsize": array.array("L").itemsize},
+                    {"name": "code", "itemsize": code_size},
+                ]
+            ),
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                ColumnExporter.read_binary(io.BytesIO(data))
+            self.assertEqual(str(cm.exception), "Column file is not valid")
+
+    def test_select_columns(self) -> None:
+        exporter = ColumnExporter(columns=["method", "to_user"])
+        request = Message.parse(INVITE)
+        request.to_address = request.to_address.__class__(
+            uri=URI.parse("sip:biloxi.com")
+        )
+        exporter.add(request)
+        self.assertEqual(list(exporter.columns), ["method", "to_user"])
+        self.assertEqual(list(exporter.columns["to_user"]), [""])
+
+    def test_invalid_column(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            ColumnExporter(columns=["method", "user_agent"])
+        self.assertEqual(str(cm.exception), "Column 'user_agent' is not supported")
+
+    def test_invalid_header(self) -> None:
+        exporter = ColumnExporter()
+        exporter.add(Message.parse(INVITE))
+
+        # A message which cannot be exported leaves the columns aligned.
+        with self.assertRaises(ValueError):
+            exporter.add(
+                Message.parse(INVITE.replace(b".com>;tag=1928", b".com;tag=1928"))
+            )
+        self.assertEqual(
+            {name: len(column) for name, column in exporter.columns.items()},
+            {name: 1 for name in exporter.columns},
+        )
+
+        exporter.add(Message.parse(RINGING))
+        self.assertEqual(len(exporter), 2)
+        self.assertEqual(list(exporter.columns["code"]), [0, 180])
+        self.assertEqual(list(exporter.columns["from_user"]), ["alice", "alice"])
@@ -0,0 +1,133 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import unittest
+
+from sipmessage import Histogram, Instrumentation, Message, Request, Response
+from sipmessage import instrumentation as instrumentation_module
+
+from .test_message import lf2crlf
+
+REQUEST_BYTES = lf2crlf(
+    b"""OPTIONS sip:carol@chicago.com SIP/2.0
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKhjhs8ass877
+Max-Forwards: 70
+To: <sip:carol@chicago.com>
+From: Alice <sip:alice@atlanta.com>;tag=1928301774
+Call-ID: a84b4c76e66710
+CSeq: 63104 OPTIONS
+Content-Length: 0
+
+"""
+)
+
+
+class HistogramTest(unittest.TestCase):
+    def test_observe(self) -> None:
+        histogram = Histogram(buckets=(1.0, 2.0))
+        for duration in [0.5, 1.0, 1.5, 3.0]:
+            histogram.observe(duration)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 6.0)
+
+
+class InstrumentationTest(unittest.TestCase):
+    def tearDown(self) -> None:
+        instrumentation_module.active = None
+
+    def test_disabled(self) -> None:
+        instrumentation = Instrumentation()
+        request = Message.parse(REQUEST_BYTES)
+        request.via
+        bytes(request)
+        self.assertEqual(instrumentation.histograms, {})
+        self.assertEqual(
+            instrumentation.render(), "# TYPE sipmessage_duration_seconds histogram\n"
+        )
+
+    def test_enabled(self) -> None:
+        instrumentation = Instrumentation()
+        instrumentation.enable()
+
+        request = Message.parse(REQUEST_BYTES)
+        assert isinstance(request, Request)
+        request.via
+        request.cseq
+        request.cseq
+        response = request.create_response(200, "OK")
+        bytes(response)
+        Message.parse(bytes(request))
+
+        self.assertEqual(
+            {
+                key: histogram.count
+                for key, histogram in instrumentation.histograms.items()
+            },
+            {
+                ("parse", "OPTIONS"): 2,
+                ("header", "Via"): 1,
+                ("header", "CSeq"): 2,
+                ("serialize", "200"): 1,
+                ("serialize", "OPTIONS"): 1,
+            },
+        )
+
+        # Disabling stops recording.
+        instrumentation.disable()
+        Message.parse(REQUEST_BYTES)
+        self.assertEqual(instrumentation.histograms[("parse", "OPTIONS")].count, 2)
+
+    def test_enable_other(self) -> None:
+        instrumentation = Instrumentation()
+        instrumentation.enable()
+        other = Instrumentation()
+        other.enable()
+
+        # Disabling an instrumentation which is not enabled has no effect.
+        instrumentation.disable()
+        Message.parse(REQUEST_BYTES)
+        self.assertEqual(instrumentation.histograms, {})
+        self.assertEqual(
+            list(other.histograms),
+            [("parse", "OPTIONS")],
+        )
+
+    def test_other(self) -> None:
+        instrumentation = Instrumentation()
+        instrumentation.enable()
+
+        for method in ["FOO", "BAR"]:
+            Message.parse(REQUEST_BYTES.replace(b"OPTIONS", method.encode()))
+        for code in [99, 700]:
+            bytes(Response(code=code, phrase="Weird"))
+        self.assertEqual(
+            {
+                key: histogram.count
+                for key, histogram in instrumentation.histograms.items()
+            },
+            {("parse", "other"): 2, ("serialize", "other"): 2},
+        )
+
+    def test_render(self) -> None:
+        instrumentation = Instrumentation(buckets=(0.001, 0.01))
+        instrumentation.observe("parse", "INVITE", 0.0005)
+        instrumentation.observe("parse", "INVITE", 0.5)
+        instrumentation.observe("header", '"\\', 0.005)
+        self.assertEqual(
+            instrumentation.render(),
+            """# TYPE sipmessage_duration_seconds histogram
+sipmessage_duration_seconds_bucket{operation="parse",name="INVITE",le="0.001"} 1
+sipmessage_duration_seconds_bucket{operation="parse",name="INVITE",le="0.01"} 1
+sipmessage_duration_seconds_bucket{operation="parse",name="INVITE",le="+Inf"} 2
+sipmessage_duration_seconds_sum{operation="parse",name="INVITE"} 0.5005
+sipmessage_duration_seconds_count{operation="parse",name="INVITE"} 2
+sipmessage_duration_seconds_bucket{operation="header",name="\\"\\\\",le="0.001"} 0
+sipmessage_duration_seconds_bucket{operation="header",name="\\"\\\\",le="0.01"} 1
+sipmessage_duration_seconds_bucket{operation="header",name="\\"\\\\",le="+Inf"} 1
+sipmessage_duration_seconds_sum{operation="header",name="\\"\\\\"} 0.005
+sipmessage_duration_seconds_count{operation="header",name="\\"\\\\"} 1
+""",
+        )
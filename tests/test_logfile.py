@@ -0,0 +1,212 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import os
+import tempfile
+import unittest
+
+from sipmessage import LogReader, Message, Request, Response
+
+from .test_message import lf2crlf
+
+MARKER = rb"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} (?:Received|Sent)"
+
+INVITE = lf2crlf(b"""INVITE sip:bob@biloxi.com SIP/2.0
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+Content-Length: 5
+
+v=0
+""")
+
+OK = lf2crlf(b"""SIP/2.0 200 OK
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+Content-Length: 0
+
+""")
+
+OPTIONS = lf2crlf(b"""OPTIONS sip:biloxi.com SIP/2.0
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKhjhs8ass877
+i: 1j9FpLxk3uxtm8tn@biloxi.com
+CSeq: 1 OPTIONS
+Content-Length: 0
+
+""")
+
+LOG = (
+    b"Log started\n"
+    + b"2024-01-01 12:00:00 Received from 192.0.2.1:5060\n\n"
+    + INVITE
+    + b"\n"
+    + b"2024-01-01 12:00:01 Sent to 192.0.2.1:5060\n"
+    + OK
+    + b"2024-01-01 12:00:02 Received from 192.0.2.2:5060\n"
+    + OPTIONS
+    + b"2024-01-01 12:00:03 Sent to 192.0.2.2:5060\n"
+    + b"2024-01-01 12:00:04 Sent"
+)
+
+
+class LogReaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, "sip.log")
+        self.index_path = os.path.join(directory.name, "sip.log.idx")
+        self.write_log(LOG)
+
+    def write_log(self, data: bytes) -> None:
+        with open(self.log_path, "wb") as fp:
+            fp.write(data)
+
+    def test_read(self) -> None:
+        with LogReader(self.log_path, marker=MARKER) as reader:
+            self.assertEqual(len(reader), 3)
+
+            message = reader[0]
+            assert isinstance(message, Request)
+            self.assertEqual(message.method, "INVITE")
+            self.assertEqual(message.body, b"v=0\r\n")
+
+            self.assertIsInstance(reader[1], Response)
+            self.assertEqual(
+                [bytes(x) for x in reader[1:]], [bytes(reader[1]), bytes(reader[2])]
+            )
+            self.assertEqual(
+                [bytes(x) for x in reader],
+                [bytes(Message.parse(x)) for x in [INVITE, OK, OPTIONS]],
+            )
+
+    def test_read_invalid(self) -> None:
+        self.write_log(b"2024-01-01 12:00:00 Received from 192.0.2.3\nNOT SIP\r\n\r\n")
+        with LogReader(self.log_path, marker=MARKER) as reader:
+            self.assertEqual(len(reader), 1)
+            with self.assertRaises(ValueError):
+                reader[0]
+
+    def test_read_noise(self) -> None:
+        # Without Content-Length nor Content-Type, there is no body.
+        bye = lf2crlf(b"""BYE sip:bob@biloxi.com SIP/2.0
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314160 BYE
+
+""")
+        # Without Content-Length, the body runs up to the next marker.
+        message = lf2crlf(b"""MESSAGE sip:bob@biloxi.com SIP/2.0
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314161 MESSAGE
+c: text/plain
+
+hello
+""")
+        self.write_log(
+            b"2024-01-01 12:00:00 Received from 192.0.2.1:5060\n"
+            + INVITE
+            + b"2024-01-01 12:00:00 DEBUG dialog created\n\n"
+            + b"2024-01-01 12:00:01 Received from 192.0.2.1:5060\n"
+            + bye
+            + b"2024-01-01 12:00:01 DEBUG dialog terminated\n"
+            + b"2024-01-01 12:00:02 Received from 192.0.2.1:5060\n"
+            + message
+            + b"\r\n \n\n"
+            + b"2024-01-01 12:00:03 Received from 192.0.2.1:5060\n"
+            + b"NOT SIP\n\n"
+            + b"2024-01-01 12:00:04 Received from 192.0.2.1:5060\n"
+            + b"NOT SIP EITHER  "
+        )
+        with LogReader(self.log_path, marker=MARKER) as reader:
+            self.assertEqual(
+                [bytes(reader._view[start:end]) for start, end in reader._offsets],
+                [INVITE, bye, message, b"NOT SIP\n", b"NOT SIP EITHER"],
+            )
+            self.assertEqual(
+                reader._call_ids,
+                ["a84b4c76e66710@pc33.atlanta.com"] * 3 + [None, None],
+            )
+
+    def test_find_call(self) -> None:
+        with LogReader(self.log_path, marker=MARKER) as reader:
+            self.assertEqual(
+                [bytes(x) for x in reader.find_call("a84b4c76e66710@pc33.atlanta.com")],
+                [bytes(reader[0]), bytes(reader[1])],
+            )
+            self.assertEqual(
+                [bytes(x) for x in reader.find_call("1j9FpLxk3uxtm8tn@biloxi.com")],
+                [bytes(reader[2])],
+            )
+            self.assertEqual(reader.find_call("unknown"), [])
+
+    def test_index(self) -> None:
+        # The index is built and saved.
+        with LogReader(
+            self.log_path, marker=MARKER, index_path=self.index_path
+        ) as reader:
+            offsets = reader._offsets
+            call_ids = reader._call_ids
+        with open(self.index_path, "rb") as fp:
+            index = fp.read()
+        self.assertTrue(index.startswith(b"sipmessage-index 3 "))
+
+        # The index is loaded, so the log is not scanned.
+        with open(self.index_path, "wb") as fp:
+            fp.write(index.replace(b"1j9FpLxk3uxtm8tn@biloxi.com", b"loaded"))
+        with LogReader(
+            self.log_path, marker=MARKER, index_path=self.index_path
+        ) as reader:
+            self.assertEqual(reader._offsets, offsets)
+            self.assertEqual(reader._call_ids, call_ids[:2] + ["loaded"])
+            self.assertEqual(bytes(reader[2]), bytes(Message.parse(OPTIONS)))
+
+        # The marker changed, so the index is rebuilt.
+        with LogReader(
+            self.log_path,
+            marker=MARKER.replace(b"(?:Received|Sent)", b"Received"),
+            index_path=self.index_path,
+        ) as reader:
+            self.assertEqual(len(reader), 2)
+
+        # A malformed index is rebuilt.
+        for lines in [[b"1 2"], [b"a b c"], [b"1 2 \xff"], [b"2 1 -"], [b"0 9999 -"]]:
+            with open(self.index_path, "wb") as fp:
+                fp.write(b"\n".join(index.splitlines()[:1] + lines))
+            with LogReader(
+                self.log_path, marker=MARKER, index_path=self.index_path
+            ) as reader:
+                self.assertEqual(reader._offsets, offsets)
+                self.assertEqual(reader._call_ids, call_ids)
+
+        # The log was modified without changing its size, so the index is rebuilt.
+        stat = os.stat(self.log_path)
+        os.utime(self.log_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        with open(self.index_path, "wb") as fp:
+            fp.write(index.replace(b"1j9FpLxk3uxtm8tn@biloxi.com", b"loaded"))
+        with LogReader(
+            self.log_path, marker=MARKER, index_path=self.index_path
+        ) as reader:
+            self.assertEqual(reader._call_ids, call_ids)
+
+        # The log changed, so the index is rebuilt.
+        with open(self.log_path, "ab") as fp:
+            fp.write(b"\n")
+        with LogReader(
+            self.log_path, marker=MARKER, index_path=self.index_path
+        ) as reader:
+            self.assertEqual(len(reader), 3)
+
+        # An empty index is rebuilt.
+        with open(self.index_path, "wb"):
+            pass
+        with LogReader(
+            self.log_path, marker=MARKER, index_path=self.index_path
+        ) as reader:
+            self.assertEqual(len(reader), 3)
+
+    def test_empty(self) -> None:
+        self.write_log(b"")
+        with LogReader(self.log_path, marker=MARKER) as reader:
+            self.assertEqual(len(reader), 0)
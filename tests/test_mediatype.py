@@ -5,7 +5,7 @@
 
 import unittest
 
-from sipmessage import MediaType, Parameters
+from sipmessage import AcceptMatcher, MediaType, Parameters
 
 
 class MediaTypeTest(unittest.TestCase):
@@ -50,3 +50,62 @@ class MediaTypeParseManyTest(unittest.TestCase):
             media_types,
             [MediaType(mime_type="application/sdp"), MediaType(mime_type="foo/bar")],
         )
+
+
+class AcceptMatcherTest(unittest.TestCase):
+    def test_quality(self) -> None:
+        matcher = AcceptMatcher.parse(
+            "application/sdp;level=1, application/*;q=0.5, text/plain;q=0, */*;q=0.1"
+        )
+        for mime_type, parameters, quality in [
+            ("application/sdp", Parameters(level="1"), 1.0),
+            ("APPLICATION/SDP", Parameters(level="1"), 1.0),
+            ("application/sdp", Parameters(Level="1"), 1.0),
+            ("application/sdp", Parameters(), 0.5),
+            ("application/pidf+xml", Parameters(), 0.5),
+            ("text/plain", Parameters(), 0.0),
+            ("text/html", Parameters(), 0.1),
+        ]:
+            self.assertEqual(
+                matcher.quality(MediaType(mime_type=mime_type, parameters=parameters)),
+                quality,
+            )
+
+    def test_accept_extension(self) -> None:
+        matcher = AcceptMatcher.parse("application/sdp;q=0.7;foo=bar")
+        self.assertEqual(matcher.quality(MediaType(mime_type="application/sdp")), 0.7)
+
+    def test_cached(self) -> None:
+        self.assertIs(
+            AcceptMatcher.parse("application/sdp"),
+            AcceptMatcher.parse("application/sdp"),
+        )
+
+    def test_invalid(self) -> None:
+        for value in [
+            "application/sdp;q=high",
+            "application/sdp;q",
+            "application/sdp;q=7",
+            "application/sdp;q=-0.5",
+            "application/sdp;q=nan",
+            "application/sdp;q=inf",
+            "foo",
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                AcceptMatcher.parse(value)
+            self.assertEqual(str(cm.exception), "MediaType is not valid")
+
+    def test_select(self) -> None:
+        pidf = MediaType(mime_type="application/pidf+xml")
+        sdp = MediaType(mime_type="application/sdp")
+        text = MediaType(mime_type="text/plain")
+
+        matcher = AcceptMatcher.parse("application/*;q=0.5, application/pidf+xml")
+        self.assertEqual(matcher.select([sdp, pidf]), pidf)
+        self.assertEqual(matcher.select([sdp, text]), sdp)
+        self.assertEqual(matcher.select([text]), None)
+        self.assertEqual(matcher.select([]), None)
+
+        # Equal qualities are resolved using the offered order.
+        matcher = AcceptMatcher.parse("*/*")
+        self.assertEqual(matcher.select([text, sdp]), text)
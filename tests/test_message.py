@@ -18,8 +18,10 @@ from sipmessage import (
     MediaType,
     Message,
     Parameters,
+    ParseError,
     Request,
     Response,
+    ResponseTemplate,
     Via,
 )
 from sipmessage.message import Headers
@@ -46,6 +48,23 @@ AUTHORIZATION = AuthCredentials(
         response="7587245234b3434cc3412213e5f113a5432",
     ),
 )
+AUTHENTICATE_SHA256 = AuthChallenge(
+    "Digest",
+    parameters=AuthParameters(
+        realm="atlanta.com",
+        qop="auth",
+        nonce="f84f1cec41e6cbe5aea9c8e88d359",
+        algorithm="SHA-256",
+    ),
+)
+AUTHENTICATE_BILOXI = AuthChallenge(
+    "Digest",
+    parameters=AuthParameters(
+        realm="biloxi.com",
+        qop="auth",
+        nonce="a2b1b7dac3bd8d06e21f9b1d3a61a6b4",
+    ),
+)
 CSEQ = CSeq(sequence=1, method="OPTIONS")
 VIA = Via(
     transport="WSS",
@@ -279,6 +298,55 @@ Content-Length: 0
 
         self.assertEqual(bytes(message), message_bytes)
 
+    def test_create_response(self) -> None:
+        request = Message.parse(self.REQUEST_COMPACT_BYTES)
+        assert isinstance(request, Request)
+
+        response = request.create_response(100, "Trying")
+        self.assertEqual(response.code, 100)
+        self.assertEqual(response.phrase, "Trying")
+        self.assertEqual(
+            bytes(response),
+            lf2crlf(
+                b"""SIP/2.0 100 Trying
+Via: SIP/2.0/WSS mYn6S3lQaKjo.invalid;branch=z9hG4bKgD24yaj
+From: <sip:alice@atlanta.com>;tag=69piINLbAb
+To: <sip:alice@atlanta.com>
+Call-ID: t87Br1RHAoBz2FsrKKk6hV
+CSeq: 1 REGISTER
+
+"""
+            ),
+        )
+
+        # The request headers must not be shared with the response.
+        response.via = []
+        self.assertEqual(len(request.via), 1)
+
+    def test_create_response_to_tag(self) -> None:
+        request = Message.parse(self.REQUEST_FULL_BYTES)
+        assert isinstance(request, Request)
+
+        response = request.create_response(200, "OK", to_tag="Bg8X3vvKyrmKH")
+        self.assertEqual(
+            response.to_address,
+            Address(
+                uri=URI(scheme="sip", host="atlanta.com", user="alice"),
+                parameters=Parameters(tag="Bg8X3vvKyrmKH"),
+            ),
+        )
+
+        # An existing tag is preserved.
+        request.headers.set("To", "<sip:alice@atlanta.com>;tag=abcd")
+        response = request.create_response(200, "OK", to_tag="Bg8X3vvKyrmKH")
+        self.assertEqual(response.headers["To"], "<sip:alice@atlanta.com>;tag=abcd")
+
+    def test_create_response_missing_headers(self) -> None:
+        request = dummy_message()
+
+        response = request.create_response(400, "Bad Request", to_tag="abcd")
+        self.assertMessageHeaders(response, [])
+
     def test_header_accept(self) -> None:
         request = dummy_message()
 
@@ -320,6 +388,23 @@ Content-Length: 0
         self.assertEqual(request.accept, None)
         self.assertMessageHeaders(request, [])
 
+    def test_header_accept_matcher(self) -> None:
+        request = dummy_message()
+        pidf = MediaType(mime_type="application/pidf+xml")
+        sdp = MediaType(mime_type="application/sdp")
+
+        # Without the header, SDP is assumed.
+        self.assertEqual(request.accept_matcher.select([pidf, sdp]), sdp)
+
+        # With the header.
+        request.headers.add("Accept", "application/sdp;q=0.5")
+        request.headers.add("Accept", "application/pidf+xml")
+        self.assertEqual(request.accept_matcher.select([sdp, pidf]), pidf)
+
+        # With an empty header.
+        request.headers.set("Accept", "")
+        self.assertEqual(request.accept_matcher.select([sdp, pidf]), None)
+
     def test_header_authorization(self) -> None:
         request = dummy_message()
 
@@ -343,6 +428,52 @@ Content-Length: 0
         self.assertIsNone(request.authorization)
         self.assertMessageHeaders(request, [])
 
+    def test_header_authorization_list(self) -> None:
+        request = dummy_message()
+        biloxi = AuthCredentials(
+            "Digest",
+            parameters=AuthParameters(
+                username="Alice",
+                realm="biloxi.com",
+                nonce="a2b1b7dac3bd8d06e21f9b1d3a61a6b4",
+                response="3c5ab0ed0f5a50ac6e2b8a7c2bb1c3a4",
+            ),
+        )
+        bearer = AuthCredentials("Bearer", token="sometoken")
+
+        # Check the initial value.
+        self.assertEqual(request.authorization_list, [])
+        self.assertIsNone(request.find_authorization())
+
+        # Add the header.
+        request.authorization_list = [bearer, AUTHORIZATION, biloxi]
+        self.assertEqual(request.authorization_list, [bearer, AUTHORIZATION, biloxi])
+        self.assertEqual(request.authorization, bearer)
+        self.assertEqual(request.find_authorization(), AUTHORIZATION)
+        self.assertEqual(request.find_authorization(realm="biloxi.com"), biloxi)
+        self.assertEqual(
+            request.find_authorization(realm="atlanta.com", algorithm="md5"),
+            AUTHORIZATION,
+        )
+        self.assertIsNone(
+            request.find_authorization(realm="atlanta.com", algorithm="SHA-256")
+        )
+        self.assertIsNone(request.find_authorization(realm="chicago.com"))
+
+        # A realm which is escaped in the header is found.
+        escaped = AuthCredentials(
+            "Digest",
+            parameters=AuthParameters(username="Alice", realm='say "hi" \\o/'),
+        )
+        request.authorization_list = [escaped]
+        self.assertIn('realm="say \\"hi\\" \\\\o/"', str(request.headers))
+        self.assertEqual(request.find_authorization(realm='say "hi" \\o/'), escaped)
+
+        # Remove the header.
+        request.authorization_list = []
+        self.assertEqual(request.authorization_list, [])
+        self.assertMessageHeaders(request, [])
+
     def test_header_call_id(self) -> None:
         request = dummy_message()
 
@@ -580,6 +711,46 @@ Content-Length: 0
         self.assertIsNone(request.proxy_authorization)
         self.assertMessageHeaders(request, [])
 
+    def test_header_proxy_authenticate_list(self) -> None:
+        request = dummy_message()
+
+        # Check the initial value.
+        self.assertEqual(request.proxy_authenticate_list, [])
+        self.assertIsNone(request.find_proxy_authenticate())
+
+        # Add the header.
+        request.proxy_authenticate_list = [AUTHENTICATE, AUTHENTICATE_BILOXI]
+        self.assertEqual(
+            request.proxy_authenticate_list, [AUTHENTICATE, AUTHENTICATE_BILOXI]
+        )
+        self.assertEqual(
+            request.find_proxy_authenticate(realm="biloxi.com"), AUTHENTICATE_BILOXI
+        )
+
+        # Remove the header.
+        request.proxy_authenticate_list = []
+        self.assertEqual(request.proxy_authenticate_list, [])
+        self.assertMessageHeaders(request, [])
+
+    def test_header_proxy_authorization_list(self) -> None:
+        request = dummy_message()
+
+        # Check the initial value.
+        self.assertEqual(request.proxy_authorization_list, [])
+        self.assertIsNone(request.find_proxy_authorization())
+
+        # Add the header.
+        request.proxy_authorization_list = [AUTHORIZATION]
+        self.assertEqual(request.proxy_authorization_list, [AUTHORIZATION])
+        self.assertEqual(
+            request.find_proxy_authorization(realm="atlanta.com"), AUTHORIZATION
+        )
+
+        # Remove the header.
+        request.proxy_authorization_list = []
+        self.assertEqual(request.proxy_authorization_list, [])
+        self.assertMessageHeaders(request, [])
+
     def test_header_proxy_require(self) -> None:
         request = dummy_message()
 
@@ -759,6 +930,29 @@ Content-Length: 0
         self.assertEqual(request.via, [])
         self.assertMessageHeaders(request, [])
 
+    def test_update_via_parameters(self) -> None:
+        request = dummy_message()
+
+        # Check the initial value.
+        with self.assertRaises(KeyError):
+            request.update_via_parameters(received="192.0.2.1")
+
+        # Update the topmost value.
+        request.headers.add(
+            "Via", "SIP/2.0/UDP pc33.atlanta.com ; branch=z9hG4bKnashds8 ; rport"
+        )
+        request.headers.add(
+            "Via", "SIP/2.0/UDP bigbox3.site3.atlanta.com;branch=z9hG4bK77ef4c2312983.1"
+        )
+        request.update_via_parameters(received="192.0.2.1", rport="5060")
+        self.assertMessageHeaders(
+            request,
+            [
+                "Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKnashds8;rport=5060;received=192.0.2.1",
+                "Via: SIP/2.0/UDP bigbox3.site3.atlanta.com;branch=z9hG4bK77ef4c2312983.1",
+            ],
+        )
+
     def test_header_www_authenticate(self) -> None:
         request = dummy_message()
 
@@ -782,6 +976,415 @@ Content-Length: 0
         self.assertIsNone(request.www_authenticate)
         self.assertMessageHeaders(request, [])
 
+    def test_header_www_authenticate_list(self) -> None:
+        request = dummy_message()
+
+        # Check the initial value.
+        self.assertEqual(request.www_authenticate_list, [])
+        self.assertIsNone(request.find_www_authenticate())
+
+        # Add the header.
+        request.www_authenticate_list = [
+            AUTHENTICATE,
+            AUTHENTICATE_SHA256,
+            AUTHENTICATE_BILOXI,
+        ]
+        self.assertEqual(
+            request.www_authenticate_list,
+            [AUTHENTICATE, AUTHENTICATE_SHA256, AUTHENTICATE_BILOXI],
+        )
+        self.assertEqual(request.www_authenticate, AUTHENTICATE)
+        self.assertEqual(request.find_www_authenticate(), AUTHENTICATE)
+        self.assertEqual(
+            request.find_www_authenticate(realm="atlanta.com", algorithm="SHA-256"),
+            AUTHENTICATE_SHA256,
+        )
+        self.assertEqual(
+            request.find_www_authenticate(realm="biloxi.com", algorithm="MD5"),
+            AUTHENTICATE_BILOXI,
+        )
+        self.assertIsNone(request.find_www_authenticate(realm="atlanta"))
+
+        # A realm which is escaped in the header is found.
+        escaped = AuthChallenge(
+            "Digest", parameters=AuthParameters(realm='say "hi"', nonce="abcd")
+        )
+        request.www_authenticate_list = [escaped]
+        self.assertEqual(request.find_www_authenticate(realm='say "hi"'), escaped)
+
+        # Remove the header.
+        request.www_authenticate_list = []
+        self.assertEqual(request.www_authenticate_list, [])
+        self.assertMessageHeaders(request, [])
+
+    def test_content_length(self) -> None:
+        message_bytes = lf2crlf(
+            b"""MESSAGE sip:bob@biloxi.com SIP/2.0
+Content-Length: 5
+
+"""
+        )
+
+        # Exact length.
+        message = Message.parse(message_bytes + b"hello")
+        self.assertEqual(message.body, b"hello")
+
+        # Extra bytes are discarded.
+        message = Message.parse(message_bytes + b"hello\r\n")
+        self.assertEqual(message.body, b"hello")
+        self.assertEqual(bytes(message), message_bytes + b"hello")
+
+        # Extra bytes are rejected.
+        with self.assertRaises(ValueError) as cm:
+            Message.parse(message_bytes + b"hello\r\n", truncate=False)
+        self.assertEqual(
+            str(cm.exception), "SIP message body does not match Content-Length"
+        )
+
+        # Missing bytes are rejected.
+        with self.assertRaises(ValueError) as cm:
+            Message.parse(message_bytes + b"hell")
+        self.assertEqual(
+            str(cm.exception), "SIP message body does not match Content-Length"
+        )
+
+        # Invalid values.
+        for value in [b"-1", b"five"]:
+            with self.assertRaises(ValueError) as cm:
+                Message.parse(message_bytes.replace(b"5", value) + b"hello")
+            self.assertEqual(
+                str(cm.exception), "SIP message Content-Length is not valid"
+            )
+
+    def test_content_length_serialize(self) -> None:
+        request = Request("MESSAGE", URI.parse("sip:bob@biloxi.com"))
+
+        # No body, no header.
+        self.assertEqual(bytes(request), b"MESSAGE sip:bob@biloxi.com SIP/2.0\r\n\r\n")
+
+        # The header is added.
+        request.body = b"hello"
+        self.assertEqual(
+            bytes(request),
+            lf2crlf(
+                b"""MESSAGE sip:bob@biloxi.com SIP/2.0
+Content-Length: 5
+
+hello"""
+            ),
+        )
+
+        # The header is updated in place.
+        request.content_length = 10
+        request.subject = "Greeting"
+        request.body = b"hi"
+        self.assertEqual(
+            bytes(request),
+            lf2crlf(
+                b"""MESSAGE sip:bob@biloxi.com SIP/2.0
+Content-Length: 2
+Subject: Greeting
+
+hi"""
+            ),
+        )
+        self.assertEqual(request.content_length, 10)
+
+    def test_serialize_compact(self) -> None:
+        message = Message.parse(self.REQUEST_FULL_BYTES)
+        message.body = b"hello"
+        message.subject = "Caf\u00e9"
+
+        compact_bytes = lf2crlf(
+            """REGISTER sip:atlanta.com SIP/2.0
+v:SIP/2.0/WSS mYn6S3lQaKjo.invalid;branch=z9hG4bKgD24yaj
+Max-Forwards:70
+t:<sip:alice@atlanta.com>
+f:<sip:alice@atlanta.com>;tag=69piINLbAb
+i:t87Br1RHAoBz2FsrKKk6hV
+CSeq:1 REGISTER
+m:<sip:Mk9sZp5Z@mYn6S3lQaKjo.invalid;transport=ws>;expires=300
+User-Agent:Tester/0.1.0
+l:5
+s:Caf\u00e9
+
+hello""".encode()
+        )
+        self.assertEqual(message.serialize(compact=True), compact_bytes)
+        self.assertEqual(message.serialized_size(compact=True), len(compact_bytes))
+
+        # The compact form can be parsed back.
+        self.assertEqual(bytes(Message.parse(compact_bytes)), bytes(message))
+
+        # The default is the full form.
+        self.assertEqual(message.serialize(), bytes(message))
+        self.assertEqual(message.serialized_size(), len(bytes(message)))
+
+    def test_serialize_compact_add_length(self) -> None:
+        response = Response(200, "OK", body=b"hello")
+        self.assertEqual(
+            response.serialize(compact=True), b"SIP/2.0 200 OK\r\nl:5\r\n\r\nhello"
+        )
+        self.assertEqual(response.serialized_size(compact=True), 28)
+
+    def test_decode_on_demand(self) -> None:
+        message = Message.parse(
+            "MESSAGE sip:bob@biloxi.com SIP/2.0\r\nSubject: Caf\u00e9\r\n\r\n".encode()
+        )
+
+        # The header value is only decoded when accessed.
+        self.assertEqual(message.headers._list, [("Subject", ["Caf\u00e9".encode()])])
+        self.assertEqual(message.subject, "Caf\u00e9")
+        self.assertEqual(message.headers._list, [("Subject", ["Caf\u00e9"])])
+
+    def test_invalid_utf8(self) -> None:
+        # Invalid start line.
+        with self.assertRaises(ValueError) as cm:
+            Message.parse(b"MESSAGE sip:b\xffb@biloxi.com SIP/2.0\r\n\r\n")
+        self.assertEqual(str(cm.exception), "SIP message is not valid UTF-8")
+
+        # Invalid header name.
+        with self.assertRaises(ValueError) as cm:
+            Message.parse(
+                b"MESSAGE sip:bob@biloxi.com SIP/2.0\r\nSubj\xffct: Hi\r\n\r\n"
+            )
+        self.assertEqual(str(cm.exception), "SIP message is not valid UTF-8")
+
+        # Invalid header value, which is only decoded when accessed.
+        message = Message.parse(
+            b"MESSAGE sip:bob@biloxi.com SIP/2.0\r\nSubject: Caf\xe9\r\n\r\n"
+        )
+        with self.assertRaises(ValueError) as cm:
+            message.subject
+        self.assertEqual(str(cm.exception), "SIP message is not valid UTF-8")
+        with self.assertRaises(ValueError) as cm:
+            bytes(message)
+        self.assertEqual(str(cm.exception), "SIP message is not valid UTF-8")
+
+    def test_folded_lines(self) -> None:
+        message = Message.parse(
+            lf2crlf(
+                b"""SIP/2.0 200 OK
+Contact: <sip:alice@pc33.atlanta.com>,
+ <sip:alice@192.0.2.4>
+Allow: INVITE, ACK,
+\t  CANCEL,
+ BYE
+Content-Length: 0
+
+"""
+            )
+        )
+        self.assertEqual(
+            message.headers.get("Contact"),
+            "<sip:alice@pc33.atlanta.com>, <sip:alice@192.0.2.4>",
+        )
+        self.assertEqual(len(message.contact), 2)
+        self.assertEqual(message.headers.get("Allow"), "INVITE, ACK, CANCEL, BYE")
+        self.assertEqual(message.content_length, 0)
+
+    def test_invalid_header_line(self) -> None:
+        for header in [b"Subject", b" Subject: Hi"]:
+            with self.assertRaises(ValueError) as cm:
+                Message.parse(b"SIP/2.0 200 OK\r\n" + header + b"\r\n\r\n")
+            self.assertEqual(str(cm.exception), "SIP header line is not valid")
+
+    def test_parse_error_details(self) -> None:
+        # Invalid header line.
+        with self.assertRaises(ParseError) as cm:
+            Message.parse(b"SIP/2.0 200 OK\r\nSubject: Hi\r\nSubject\r\n\r\n")
+        self.assertEqual(cm.exception.expected, "HCOLON")
+        self.assertEqual(cm.exception.offset, 29)
+        self.assertIsNone(cm.exception.header)
+
+        # Invalid header value.
+        message = Message.parse(
+            lf2crlf(
+                b"""SIP/2.0 200 OK
+Via: SIP/2.0/UDP 192.0.2.15$
+CSeq: 1
+Subject: Caf\xe9
+
+"""
+            )
+        )
+        with self.assertRaises(ParseError) as cm:
+            message.via
+        self.assertEqual(str(cm.exception), "Via is not valid")
+        self.assertEqual(cm.exception.expected, "Via")
+        self.assertEqual(cm.exception.offset, 22)
+        self.assertEqual(cm.exception.header, "Via")
+
+        with self.assertRaises(ParseError) as cm:
+            message.cseq
+        self.assertEqual(str(cm.exception), "CSeq is not valid")
+        self.assertEqual(cm.exception.expected, "CSeq")
+        self.assertIsNone(cm.exception.offset)
+        self.assertEqual(cm.exception.header, "CSeq")
+
+        with self.assertRaises(ParseError) as cm:
+            message.subject
+        self.assertEqual(cm.exception.expected, "UTF-8")
+        self.assertEqual(cm.exception.offset, 3)
+        self.assertEqual(cm.exception.header, "Subject")
+
+        # Invalid start line.
+        with self.assertRaises(ParseError) as cm:
+            Message.parse(b"SIP/2.0 abc OK\r\n\r\n")
+        self.assertEqual(cm.exception.expected, "Start-Line")
+        self.assertEqual(cm.exception.offset, 0)
+
+        # Invalid body length.
+        with self.assertRaises(ParseError) as cm:
+            Message.parse(b"SIP/2.0 200 OK\r\nContent-Length: 5\r\n\r\nhi")
+        self.assertEqual(cm.exception.offset, 37)
+        self.assertEqual(cm.exception.header, "Content-Length")
+
+    def test_lenient(self) -> None:
+        message_bytes = lf2crlf(
+            b"""SIP/2.0 200 OK
+Via: SIP/2.0/UDP 192.0.2.15, $
+Subject
+ continued
+Contact: <sip:alice@atlanta.com>, <sip:bob@biloxi.com
+Call-ID: a84b4c76e66710
+Accept: application/sdp, $
+CSeq: 314159 INVITE
+Content-Length: five
+
+hello"""
+        )
+
+        # Strict parsing fails.
+        with self.assertRaises(ValueError) as cm:
+            Message.parse(message_bytes)
+        self.assertEqual(str(cm.exception), "SIP header line is not valid")
+
+        # Lenient parsing records the errors.
+        message = Message.parse(message_bytes, lenient=True)
+        self.assertEqual(
+            [
+                (str(error), error.offset, error.header, error.raw)
+                for error in message.errors
+            ],
+            [
+                ("SIP header line is not valid", 48, None, b"Subject"),
+                ("SIP header line is not valid", 57, None, b" continued"),
+                (
+                    "SIP message Content-Length is not valid",
+                    None,
+                    "Content-Length",
+                    None,
+                ),
+            ],
+        )
+        self.assertEqual(message.body, b"hello")
+
+        # Invalid elements are skipped, and their errors recorded once.
+        self.assertEqual(message.via, [Via(transport="UDP", host="192.0.2.15")])
+        self.assertEqual(message.via, [Via(transport="UDP", host="192.0.2.15")])
+        self.assertEqual(
+            message.contact,
+            [Address(uri=URI(scheme="sip", host="atlanta.com", user="alice"))],
+        )
+        self.assertEqual(message.accept, [MediaType("application/sdp")])
+        self.assertEqual(message.call_id, "a84b4c76e66710")
+        self.assertEqual(message.cseq, CSeq(314159, "INVITE"))
+        self.assertEqual(
+            [(str(error), error.header) for error in message.errors[3:]],
+            [
+                ("Via is not valid", "Via"),
+                ("URI is not valid", "Contact"),
+                ("MediaType is not valid", "Accept"),
+            ],
+        )
+
+        # Other values are kept verbatim.
+        self.assertEqual(
+            bytes(message),
+            lf2crlf(
+                b"""SIP/2.0 200 OK
+Via: SIP/2.0/UDP 192.0.2.15, $
+Contact: <sip:alice@atlanta.com>, <sip:bob@biloxi.com
+Call-ID: a84b4c76e66710
+Accept: application/sdp, $
+CSeq: 314159 INVITE
+Content-Length: 5
+
+hello"""
+            ),
+        )
+
+        # Errors are replaced when the header is accessed again.
+        message.via = [Via(transport="UDP", host="192.0.2.15")]
+        message.via
+        self.assertEqual(
+            [error.header for error in message.errors[3:]], ["Contact", "Accept"]
+        )
+
+    def test_lenient_body_length(self) -> None:
+        message = Message.parse(
+            b"SIP/2.0 200 OK\r\nSubj\xffct: Hi\r\nContent-Length: 5\r\n\r\nhi",
+            lenient=True,
+        )
+        self.assertEqual(
+            [(str(error), error.offset, error.raw) for error in message.errors],
+            [
+                ("SIP message is not valid UTF-8", 20, b"Subj\xffct: Hi"),
+                ("SIP message body does not match Content-Length", 50, None),
+            ],
+        )
+        self.assertEqual(message.body, b"hi")
+        self.assertEqual(message.headers.keys(), ["Content-Length"])
+
+    def test_validate(self) -> None:
+        request = Message.parse(self.REQUEST_FULL_BYTES)
+        assert isinstance(request, Request)
+        self.assertIsNone(request.validate())
+
+        for old, new, reason in [
+            (b"Max-Forwards: 70\r\n", b"", "Missing Max-Forwards Header"),
+            (b"Max-Forwards: 70", b"Max-Forwards: x", "Invalid Max-Forwards Header"),
+            (b"Call-ID: ", b"i: ", None),
+            (b"Call-ID: ", b"Foo: ", "Missing Call-ID Header"),
+            (b"To: ", b"t: x\r\nTo: ", "Multiple To Headers"),
+            (b"Via: ", b"Via: SIP/2.0/UDP 192.0.2.15\r\nVia: ", None),
+            (b"1 REGISTER", b"1  REGISTER", None),
+            (b"1 REGISTER", b"one REGISTER", "Invalid CSeq Header"),
+            (b"1 REGISTER", b"1 R\xe9GISTER", "Invalid CSeq Header"),
+            (
+                b"1 REGISTER",
+                b"1 INVITE",
+                "CSeq Method Does Not Match Request Method",
+            ),
+            (b"Content-Length: 0\r\n", b"", None),
+            (b"Content-Length: 0", b"l: 0", None),
+        ]:
+            with self.subTest(new=new):
+                message = Message.parse(
+                    self.REQUEST_FULL_BYTES.replace(old, new), lenient=True
+                )
+                self.assertEqual(message.validate(), reason)
+
+        # Content-Length must match the body.
+        request.body = b"hello"
+        self.assertEqual(request.validate(), "Invalid Content-Length Header")
+        request.content_length = 5
+        self.assertIsNone(request.validate())
+        request.headers.set("Content-Length", "+5")
+        self.assertEqual(request.validate(), "Invalid Content-Length Header")
+
+        # Responses do not need Max-Forwards, and may have any CSeq method.
+        response = request.create_response(200, "OK")
+        response.headers.set("CSeq", "1 INVITE")
+        self.assertIsNone(response.validate())
+        response.headers.remove("Via")
+        self.assertEqual(response.validate(), "Missing Via Header")
+
+        # A header set to an empty list is missing.
+        response.via = []
+        self.assertEqual(response.validate(), "Missing Via Header")
+
     def test_not_bytes(self) -> None:
         with self.assertRaises(ValueError) as cm:
             Message.parse("SIP/2.0 200 OK")  # type: ignore
@@ -798,3 +1401,34 @@ Content-Length: 0
         self.assertEqual(
             str(cm.exception), "SIP message is neither request nor response"
         )
+
+
+class ResponseTemplateTest(unittest.TestCase):
+    REQUEST_BYTES = MessageTest.REQUEST_FULL_BYTES
+
+    def test_render(self) -> None:
+        request = Message.parse(self.REQUEST_BYTES)
+        assert isinstance(request, Request)
+
+        response = Response(503, "Service Unavailable")
+        response.via = [VIA]
+        response.server = "Tester/0.1.0"
+        response.content_length = 0
+        template = ResponseTemplate(response)
+
+        # The output is identical to that of a response built from the request.
+        expected = request.create_response(503, "Service Unavailable")
+        expected.server = "Tester/0.1.0"
+        expected.content_length = 0
+        self.assertEqual(template.render(request), bytes(expected))
+
+    def test_render_to_tag(self) -> None:
+        request = Message.parse(self.REQUEST_BYTES)
+        assert isinstance(request, Request)
+
+        template = ResponseTemplate(Response(200, "OK", body=b"hello"))
+        expected = request.create_response(200, "OK", to_tag="Bg8X3vvKyrmKH")
+        expected.body = b"hello"
+        self.assertEqual(
+            template.render(request, to_tag="Bg8X3vvKyrmKH"), bytes(expected)
+        )
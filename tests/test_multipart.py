@@ -0,0 +1,144 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import unittest
+
+from sipmessage import URI, MediaType, Multipart, Parameters, Request
+
+from .test_message import lf2crlf
+
+SDP = lf2crlf(b"""v=0
+o=alice 2890844526 2890844526 IN IP4 atlanta.com
+s=-
+c=IN IP4 192.0.2.101
+t=0 0
+m=audio 49172 RTP/AVP 0
+""")
+
+PIDF = lf2crlf(b"""<?xml version="1.0" encoding="UTF-8"?>
+<presence xmlns="urn:ietf:params:xml:ns:pidf" entity="pres:alice@atlanta.com"/>
+""")
+
+BODY = (
+    lf2crlf(b"""This is the preamble.
+--boundary1
+Content-Type: application/sdp
+
+""")
+    + SDP
+    + lf2crlf(b"""
+--boundary1\t
+Content-Type: application/pidf+xml
+Content-ID: <alice@atlanta.com>
+
+""")
+    + PIDF
+    + lf2crlf(b"""
+--boundary1
+
+no headers
+--boundary1--
+This is the epilogue.
+""")
+)
+
+
+class MultipartTest(unittest.TestCase):
+    def test_parts(self) -> None:
+        multipart = Multipart(BODY, "boundary1")
+        self.assertEqual(len(multipart), 3)
+
+        part = multipart[0]
+        self.assertEqual(part.content_type, MediaType(mime_type="application/sdp"))
+        self.assertEqual(part.body, SDP)
+        self.assertIsInstance(part.body, memoryview)
+
+        part = multipart[1]
+        self.assertEqual(part.content_type, MediaType(mime_type="application/pidf+xml"))
+        self.assertEqual(part.headers.get("Content-ID"), "<alice@atlanta.com>")
+        self.assertEqual(part.body, PIDF)
+
+        part = multipart[2]
+        self.assertEqual(part.content_type, None)
+        self.assertEqual(part.body, b"no headers")
+
+        # Parts are only parsed once.
+        self.assertIs(multipart[0], multipart[0])
+        self.assertEqual(multipart[1:], [multipart[1], multipart[2]])
+        self.assertEqual(list(multipart), [multipart[0], multipart[1], multipart[2]])
+
+    def test_find(self) -> None:
+        multipart = Multipart(BODY, "boundary1")
+
+        part = multipart.find("APPLICATION/PIDF+XML")
+        assert part is not None
+        self.assertEqual(part.body, PIDF)
+
+        # Parts following the match are not parsed.
+        self.assertEqual(multipart._parts[2], None)
+
+        self.assertIsNone(multipart.find("text/plain"))
+
+    def test_from_message(self) -> None:
+        request = Request("INVITE", URI.parse("sip:bob@biloxi.com"), body=BODY)
+
+        with self.assertRaises(ValueError) as cm:
+            Multipart.from_message(request)
+        self.assertEqual(str(cm.exception), "Message body is not multipart")
+
+        request.content_type = MediaType(mime_type="application/sdp")
+        with self.assertRaises(ValueError) as cm:
+            Multipart.from_message(request)
+        self.assertEqual(str(cm.exception), "Message body is not multipart")
+
+        request.content_type = MediaType(mime_type="multipart/mixed")
+        with self.assertRaises(ValueError) as cm:
+            Multipart.from_message(request)
+        self.assertEqual(str(cm.exception), "Multipart body is not valid")
+
+        for boundary in ["boundary1", '"boundary1"']:
+            request.content_type = MediaType(
+                mime_type="multipart/mixed",
+                parameters=Parameters(boundary=boundary),
+            )
+            multipart = Multipart.from_message(request)
+            self.assertEqual(len(multipart), 3)
+
+    def test_no_preamble(self) -> None:
+        multipart = Multipart(b"--b\r\n\r\nfoo\r\n--b--", "b")
+        self.assertEqual(len(multipart), 1)
+        self.assertEqual(multipart[0].body, b"foo")
+
+    def test_delimiter_prefix(self) -> None:
+        # Lines starting with the delimiter are not delimiters.
+        multipart = Multipart(
+            b"--b\r\n\r\nfoo\r\n--bX\r\n--b x\r\n--b\r\n\r\nbar\r\n--b--", "b"
+        )
+        self.assertEqual(len(multipart), 2)
+        self.assertEqual(multipart[0].body, b"foo\r\n--bX\r\n--b x")
+        self.assertEqual(multipart[1].body, b"bar")
+
+    def test_invalid(self) -> None:
+        for body in [
+            # No delimiter.
+            b"foo",
+            # Junk on the delimiter line.
+            b"--b junk\r\n\r\nfoo\r\n--b--",
+            # No parts.
+            b"--b--",
+            # Unterminated delimiter line.
+            b"--b",
+            # No close delimiter.
+            b"--b\r\n\r\nfoo",
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                Multipart(body, "b")
+            self.assertEqual(str(cm.exception), "Multipart body is not valid")
+
+        # Part headers are unterminated.
+        multipart = Multipart(b"--b\r\nContent-Type: text/plain\r\n--b--", "b")
+        with self.assertRaises(ValueError) as cm:
+            multipart[0]
+        self.assertEqual(str(cm.exception), "Multipart body is not valid")
@@ -19,7 +19,17 @@ class ParametersTest(unittest.TestCase):
     def test_escaped(self) -> None:
         parameters = Parameters.parse(";%6C%72;n%61me=v%61lue%25%34%31")
         self.assertEqual(parameters, {"lr": None, "name": "value%41"})
-        self.assertEqual(str(parameters), ";lr;name=value%2541")
+        self.assertEqual(parameters["lr"], None)
+        self.assertEqual(parameters["name"], "value%41")
+        self.assertEqual(str(parameters), ";%6C%72;n%61me=v%61lue%25%34%31")
+
+        # Modified parameters are re-encoded.
+        self.assertEqual(str(parameters.replace()), ";lr;name=value%2541")
+
+    def test_escaping(self) -> None:
+        parameters = Parameters(foo="a b", bar="caf\u00e9", baz="z9hG4bK-.~_")
+        self.assertEqual(str(parameters), ";foo=a%20b;bar=caf%C3%A9;baz=z9hG4bK-.~_")
+        self.assertEqual(Parameters.parse(str(parameters)), parameters)
 
     def test_invalid(self) -> None:
         for s in ["a", ";", " ; ", ";;;", " ; ; ;"]:
@@ -27,6 +37,29 @@ class ParametersTest(unittest.TestCase):
                 Parameters.parse(s)
             self.assertEqual(str(cm.exception), "Parameters are not valid")
 
+    def test_lazy(self) -> None:
+        parameters = Parameters.parse(";branch=z9hG4bK776asdhds;rport;foo=1;foo=2")
+
+        # Looking up parameters does not require decoding them all.
+        self.assertEqual(parameters["branch"], "z9hG4bK776asdhds")
+        self.assertEqual(parameters["rport"], None)
+        self.assertEqual(parameters["foo"], "2")
+        self.assertFalse("received" in parameters)
+        self.assertFalse("z9hG4bK776asdhds" in parameters)
+
+        # The raw text is output verbatim.
+        self.assertEqual(str(parameters), ";branch=z9hG4bK776asdhds;rport;foo=1;foo=2")
+
+        # Decoding all the parameters.
+        self.assertEqual(len(parameters), 3)
+        self.assertEqual(parameters["foo"], "2")
+        with self.assertRaises(KeyError):
+            parameters["received"]
+        self.assertEqual(
+            repr(parameters),
+            "Parameters(branch='z9hG4bK776asdhds', rport=None, foo='2')",
+        )
+
     def test_replace(self) -> None:
         parameters1 = Parameters(foo="1", bar=None)
         parameters2 = parameters1.replace(tag="blah")
@@ -34,6 +67,29 @@ class ParametersTest(unittest.TestCase):
         self.assertEqual(str(parameters1), ";foo=1;bar")
         self.assertEqual(str(parameters2), ";foo=1;bar;tag=blah")
 
+    def test_replace_raw(self) -> None:
+        parameters1 = Parameters.parse(";branch=z9hG4bK776;rport;foo=1;foo=2")
+
+        # Adding a parameter.
+        parameters2 = parameters1.replace(received="192.0.2.1")
+        self.assertEqual(
+            str(parameters2), ";branch=z9hG4bK776;rport;foo=1;foo=2;received=192.0.2.1"
+        )
+
+        # Updating parameters.
+        parameters3 = parameters1.replace(rport="5060", foo="3")
+        self.assertEqual(str(parameters3), ";branch=z9hG4bK776;rport=5060;foo=3")
+        self.assertEqual(
+            parameters3, {"branch": "z9hG4bK776", "rport": "5060", "foo": "3"}
+        )
+
+        # Adding a parameter which requires escaping.
+        parameters4 = parameters1.replace(foo=None, bar="a b")
+        self.assertEqual(str(parameters4), ";branch=z9hG4bK776;rport;foo;bar=a%20b")
+
+        # The original is unchanged.
+        self.assertEqual(str(parameters1), ";branch=z9hG4bK776;rport;foo=1;foo=2")
+
     def test_simple(self) -> None:
         parameters = Parameters.parse(";foo=1;bar")
         self.assertEqual(parameters, {"foo": "1", "bar": None})
@@ -0,0 +1,436 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import os
+import socket
+import struct
+import tempfile
+import unittest
+
+from sipmessage import CapturedMessage, CaptureReader, Message, Request, Response
+from sipmessage.pcap import MAX_STREAMS
+
+from .test_message import lf2crlf
+
+INVITE = lf2crlf(b"""INVITE sip:bob@biloxi.com SIP/2.0
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+Content-Type: application/sdp
+Content-Length: 5
+
+v=0
+""")
+
+OK = lf2crlf(b"""SIP/2.0 200 OK
+Via: SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bK776asdhds
+Call-ID: a84b4c76e66710@pc33.atlanta.com
+CSeq: 314159 INVITE
+l: 0
+
+""")
+
+ALICE = "192.0.2.1"
+BOB = "192.0.2.2"
+ALICE6 = "2001:db8::1"
+BOB6 = "2001:db8::2"
+
+
+def ipv4(src: str, dst: str, proto: int, payload: bytes, fragment: int = 0) -> bytes:
+    return (
+        struct.pack(
+            "!BBHHHBBH4s4s",
+            0x45,
+            0,
+            20 + len(payload),
+            0,
+            fragment,
+            64,
+            proto,
+            0,
+            socket.inet_pton(socket.AF_INET, src),
+            socket.inet_pton(socket.AF_INET, dst),
+        )
+        + payload
+    )
+
+
+def ipv6(src: str, dst: str, proto: int, payload: bytes) -> bytes:
+    # Add a hop-by-hop options header.
+    payload = bytes([proto, 0]) + bytes(6) + payload
+    return (
+        struct.pack(
+            "!IHBB16s16s",
+            0x60000000,
+            len(payload),
+            0,
+            64,
+            socket.inet_pton(socket.AF_INET6, src),
+            socket.inet_pton(socket.AF_INET6, dst),
+        )
+        + payload
+    )
+
+
+def udp(src_port: int, dst_port: int, payload: bytes) -> bytes:
+    return struct.pack("!HHHH", src_port, dst_port, 8 + len(payload), 0) + payload
+
+
+def tcp(
+    src_port: int, dst_port: int, seq: int, payload: bytes, flags: int = 0x18
+) -> bytes:
+    return (
+        struct.pack("!HHIIBBHHH", src_port, dst_port, seq, 0, 0x50, flags, 0, 0, 0)
+        + payload
+    )
+
+
+def ethernet(packet: bytes, ethertype: int = 0x0800, vlan: bool = False) -> bytes:
+    header = bytes(12)
+    if vlan:
+        header += struct.pack("!HH", 0x8100, 100)
+    # Add trailing padding, which must be ignored.
+    return header + struct.pack("!H", ethertype) + packet + bytes(4)
+
+
+def pcap(
+    frames: list[tuple[int, int, bytes]],
+    linktype: int = 1,
+    endian: str = "<",
+    nanoseconds: bool = False,
+) -> bytes:
+    magic = 0xA1B23C4D if nanoseconds else 0xA1B2C3D4
+    data = struct.pack(endian + "IHHiIII", magic, 2, 4, 0, 0, 65535, linktype)
+    for ts_sec, ts_frac, frame in frames:
+        data += struct.pack(endian + "IIII", ts_sec, ts_frac, len(frame), len(frame))
+        data += frame
+    return data
+
+
+def pcapng_block(block_type: int, body: bytes, endian: str = "<") -> bytes:
+    body += bytes(-len(body) % 4)
+    length = len(body) + 12
+    return (
+        struct.pack(endian + "II", block_type, length)
+        + body
+        + struct.pack(endian + "I", length)
+    )
+
+
+def pcapng(
+    frames: list[tuple[int, bytes]],
+    linktype: int = 1,
+    endian: str = "<",
+    tsresol: int | None = None,
+) -> bytes:
+    data = pcapng_block(
+        0x0A0D0D0A, struct.pack(endian + "IHHq", 0x1A2B3C4D, 1, 0, -1), endian
+    )
+
+    options = b""
+    # Add an unrelated option first.
+    options += struct.pack(endian + "HH", 2, 3) + b"eth\x00"
+    if tsresol is not None:
+        options += struct.pack(endian + "HHB3x", 9, 1, tsresol)
+    options += struct.pack(endian + "HH", 0, 0)
+    data += pcapng_block(
+        1, struct.pack(endian + "HHI", linktype, 0, 65535) + options, endian
+    )
+
+    # Add a block which is skipped.
+    data += pcapng_block(5, b"\x00" * 8, endian)
+
+    for timestamp, frame in frames:
+        data += pcapng_block(
+            6,
+            struct.pack(
+                endian + "IIIII",
+                0,
+                timestamp >> 32,
+                timestamp & 0xFFFFFFFF,
+                len(frame),
+                len(frame),
+            )
+            + frame,
+            endian,
+        )
+    return data
+
+
+class CaptureReaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def read(self, data: bytes) -> list[CapturedMessage]:
+        path = os.path.join(self.directory.name, "capture")
+        with open(path, "wb") as fp:
+            fp.write(data)
+        with CaptureReader(path) as reader:
+            return list(reader)
+
+    def assertMessages(
+        self, captured: list[CapturedMessage], expected: list[bytes]
+    ) -> None:
+        self.assertEqual(
+            [bytes(x.message) for x in captured],
+            [bytes(Message.parse(x)) for x in expected],
+        )
+
+    def test_pcap_udp(self) -> None:
+        for endian in ["<", ">"]:
+            captured = self.read(
+                pcap(
+                    [
+                        (
+                            1000,
+                            250000,
+                            ethernet(ipv4(ALICE, BOB, 17, udp(5060, 5060, INVITE))),
+                        ),
+                        (
+                            1001,
+                            500000,
+                            ethernet(
+                                ipv4(BOB, ALICE, 17, udp(5060, 5062, OK)), vlan=True
+                            ),
+                        ),
+                    ],
+                    endian=endian,
+                )
+            )
+            self.assertEqual(len(captured), 2)
+
+            timestamp, source, destination, message = captured[0]
+            self.assertEqual(timestamp, 1000.25)
+            self.assertEqual(source, (ALICE, 5060))
+            self.assertEqual(destination, (BOB, 5060))
+            assert isinstance(message, Request)
+            self.assertEqual(message.method, "INVITE")
+            self.assertEqual(message.body, b"v=0\r\n")
+
+            self.assertEqual(captured[1].timestamp, 1001.5)
+            self.assertEqual(captured[1].source, (BOB, 5060))
+            self.assertEqual(captured[1].destination, (ALICE, 5062))
+            self.assertIsInstance(captured[1].message, Response)
+
+    def test_pcap_nanoseconds(self) -> None:
+        captured = self.read(
+            pcap(
+                [(10, 500000000, ipv4(ALICE, BOB, 17, udp(5060, 5060, OK)))],
+                linktype=101,
+                nanoseconds=True,
+            )
+        )
+        self.assertEqual([x.timestamp for x in captured], [10.5])
+
+    def test_pcap_link_types(self) -> None:
+        packet = ipv4(ALICE, BOB, 17, udp(5060, 5060, OK))
+        for linktype, frame in [
+            (0, b"\x02\x00\x00\x00" + packet),
+            (113, bytes(14) + b"\x08\x00" + packet),
+            (228, packet),
+            (229, ipv6(ALICE6, BOB6, 17, udp(5060, 5060, OK))),
+        ]:
+            captured = self.read(pcap([(0, 0, frame)], linktype=linktype))
+            self.assertMessages(captured, [OK])
+
+        # Unsupported link type.
+        captured = self.read(pcap([(0, 0, packet)], linktype=147))
+        self.assertEqual(captured, [])
+
+    def test_pcap_skipped(self) -> None:
+        captured = self.read(
+            pcap(
+                [
+                    # Not IP.
+                    (0, 0, ethernet(b"\x00" * 28, ethertype=0x0806)),
+                    (0, 0, bytes(14)),
+                    # Not UDP or TCP.
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 1, bytes(8)))),
+                    # Truncated IP and UDP headers.
+                    (0, 0, ethernet(b"\x45\x00")),
+                    (0, 0, ethernet(b"\x60\x00")),
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 17, b"\x00"))),
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 6, b"\x00"))),
+                    # IP fragments.
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 17, udp(5060, 5060, OK), 0x2000))),
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 17, udp(5060, 5060, OK), 0x0010))),
+                    # Not SIP.
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 17, udp(53, 53, b"\x00" * 12)))),
+                    # SIP.
+                    (0, 0, ethernet(ipv4(ALICE, BOB, 17, udp(5060, 5060, OK)))),
+                ]
+            )
+        )
+        self.assertMessages(captured, [OK])
+
+    def test_pcapng(self) -> None:
+        for endian, tsresol, timestamp in [
+            ("<", None, 1500000),
+            (">", None, 1500000),
+            ("<", 9, 1500000000),
+            ("<", 0x80 | 10, 1536),
+        ]:
+            captured = self.read(
+                pcapng(
+                    [
+                        (
+                            timestamp,
+                            ethernet(
+                                ipv6(ALICE6, BOB6, 17, udp(5060, 5060, INVITE)),
+                                ethertype=0x86DD,
+                            ),
+                        )
+                    ],
+                    endian=endian,
+                    tsresol=tsresol,
+                )
+            )
+            self.assertEqual(len(captured), 1)
+            self.assertEqual(captured[0].timestamp, 1.5)
+            self.assertEqual(captured[0].source, (ALICE6, 5060))
+            self.assertEqual(captured[0].destination, (BOB6, 5060))
+
+    def test_tcp(self) -> None:
+        def segment(
+            seq: int, payload: bytes, flags: int = 0x18
+        ) -> tuple[int, int, bytes]:
+            return (
+                seq,
+                0,
+                ethernet(ipv4(ALICE, BOB, 6, tcp(40000, 5060, seq, payload, flags))),
+            )
+
+        stream = b"\r\n\r\n" + INVITE + OK
+        captured = self.read(
+            pcap(
+                [
+                    # SYN, which consumes a sequence number.
+                    segment(999, b"", 0x02),
+                    segment(1000, stream[:50]),
+                    # Out of order.
+                    segment(1100, stream[100:150]),
+                    segment(1050, stream[50:100]),
+                    # Retransmissions.
+                    segment(1000, stream[:50]),
+                    segment(1120, stream[120:250]),
+                    # End of the stream, and FIN.
+                    segment(1250, stream[250:], 0x19),
+                    # The reverse direction, starting mid-stream.
+                    (
+                        1300,
+                        0,
+                        ethernet(ipv4(BOB, ALICE, 6, tcp(5060, 40000, 5000, OK))),
+                    ),
+                ]
+            )
+        )
+        self.assertMessages(captured, [INVITE, OK, OK])
+        self.assertEqual([x.timestamp for x in captured], [1120.0, 1250.0, 1300.0])
+        self.assertEqual(captured[0].source, (ALICE, 40000))
+        self.assertEqual(captured[2].source, (BOB, 5060))
+
+    def test_tcp_resynchronize(self) -> None:
+        def segment(seq: int, payload: bytes) -> tuple[int, int, bytes]:
+            return (0, 0, ethernet(ipv4(ALICE, BOB, 6, tcp(40000, 5060, seq, payload))))
+
+        frames = [segment(0, b"x")]
+        # Too many segments are missing.
+        frames += [segment(10 + i, b"x") for i in range(65)]
+        # The stream is not SIP.
+        frames += [segment(1000, b"x" * 40000), segment(41000, b"x" * 40000)]
+        frames += [segment(100000, b"NOT SIP\r\n\r\n")]
+        # The stream is resynchronized, and a message is split in its body.
+        frames += [
+            segment(100011, INVITE[:-2]),
+            segment(100011 + len(INVITE) - 2, INVITE[-2:]),
+        ]
+        captured = self.read(pcap(frames))
+        self.assertMessages(captured, [INVITE])
+
+    def test_tcp_body_too_large(self) -> None:
+        def segment(seq: int, payload: bytes) -> tuple[int, int, bytes]:
+            return (0, 0, ethernet(ipv4(ALICE, BOB, 6, tcp(40000, 5060, seq, payload))))
+
+        huge = INVITE.replace(b"Content-Length: 5", b"Content-Length: 99999999")
+        captured = self.read(pcap([segment(0, huge), segment(len(huge), INVITE)]))
+        # The stream is resynchronized instead of buffering the body.
+        self.assertMessages(captured, [INVITE])
+
+    def test_tcp_max_streams(self) -> None:
+        def segment(port: int, seq: int, payload: bytes) -> tuple[int, int, bytes]:
+            return (0, 0, ethernet(ipv4(ALICE, BOB, 6, tcp(port, 5060, seq, payload))))
+
+        others = [segment(20000 + i, 0, b"x") for i in range(MAX_STREAMS)]
+        path = os.path.join(self.directory.name, "capture")
+
+        # The least recently used stream is discarded, so its message is lost.
+        with open(path, "wb") as fp:
+            fp.write(
+                pcap(
+                    [segment(10000, 0, INVITE[:50])]
+                    + others
+                    + [segment(10000, 50, INVITE[50:])]
+                )
+            )
+        with CaptureReader(path) as reader:
+            self.assertEqual(list(reader), [])
+            self.assertEqual(len(reader._streams), MAX_STREAMS)
+
+        # A recently used stream is kept.
+        captured = self.read(
+            pcap(
+                [segment(10000, 0, INVITE[:50])]
+                + others[:-1]
+                + [segment(10000, 50, INVITE[50:100])]
+                + others[-1:]
+                + [segment(10000, 100, INVITE[100:])]
+            )
+        )
+        self.assertMessages(captured, [INVITE])
+
+    def test_iterate_twice(self) -> None:
+        path = os.path.join(self.directory.name, "capture")
+        with open(path, "wb") as fp:
+            fp.write(
+                pcap([(0, 0, ethernet(ipv4(ALICE, BOB, 17, udp(5060, 5060, OK))))])
+            )
+        with CaptureReader(path) as reader:
+            self.assertMessages(list(reader), [OK])
+            self.assertMessages(list(reader), [OK])
+
+    def test_invalid_header(self) -> None:
+        path = os.path.join(self.directory.name, "capture")
+        for data in [
+            b"",
+            b"not a capture",
+            # Truncated headers.
+            pcap([])[:20],
+            pcapng([])[:20],
+            # Unknown byte order.
+            pcapng_block(0x0A0D0D0A, struct.pack("<IHHq", 0x12345678, 1, 0, -1)),
+            # Truncated section header block.
+            pcapng_block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1))[:-4],
+        ]:
+            with open(path, "wb") as fp:
+                fp.write(data)
+            # The error is raised without iterating.
+            with self.assertRaises(ValueError) as cm:
+                CaptureReader(path)
+            self.assertEqual(str(cm.exception), "Capture file is not valid")
+
+    def test_invalid(self) -> None:
+        for data in [
+            # Truncated packet.
+            pcap([(0, 0, b"\x00" * 10)])[:-1],
+            # Truncated block.
+            pcapng([])[:-1],
+            # Packet block before the interface description.
+            pcapng_block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1))
+            + pcapng_block(6, bytes(20)),
+        ]:
+            with self.assertRaises(ValueError) as cm:
+                self.read(data)
+            self.assertEqual(str(cm.exception), "Capture file is not valid")
@@ -0,0 +1,153 @@
+#
+# Copyright (C) Spacinov SAS
+# Distributed under the 2-clause BSD license
+#
+
+import unittest
+
+from sipmessage import (
+    URI,
+    Connection,
+    MediaType,
+    Request,
+    SessionDescription,
+)
+
+from .test_message import lf2crlf
+
+SDP = lf2crlf(b"""v=0
+o=alice 2890844526 2890844526 IN IP4 atlanta.com
+s=Session SDP
+c=IN IP4 192.0.2.101
+t=0 0
+a=sendrecv
+m=audio 49172 RTP/AVP 0 8
+a=rtpmap:0 PCMU/8000
+a=rtpmap:8 PCMA/8000
+m=video 51372/2 RTP/AVP 31
+c=IN IP6 2001:db8::2
+a=rtpmap:31 H261/90000
+""")
+
+
+class ConnectionTest(unittest.TestCase):
+    def test_parse(self) -> None:
+        connection = Connection.parse("IN IP4 192.0.2.101")
+        self.assertEqual(connection, Connection(address="192.0.2.101"))
+        self.assertEqual(str(connection), "IN IP4 192.0.2.101")
+
+    def test_invalid(self) -> None:
+        for value in ["", "IN IP4", "IN  IP4 192.0.2.101"]:
+            with self.assertRaises(ValueError) as cm:
+                Connection.parse(value)
+            self.assertEqual(str(cm.exception), "Connection is not valid")
+
+
+class SessionDescriptionTest(unittest.TestCase):
+    def test_parse(self) -> None:
+        sdp = SessionDescription.parse(SDP)
+        self.assertEqual(sdp.version, 0)
+        self.assertEqual(sdp.origin, "alice 2890844526 2890844526 IN IP4 atlanta.com")
+        self.assertEqual(sdp.session_name, "Session SDP")
+        self.assertEqual(sdp.connection, Connection(address="192.0.2.101"))
+        self.assertEqual(sdp.attributes, [("sendrecv", None)])
+
+        # Serialization is byte-for-byte.
+        self.assertEqual(bytes(sdp), SDP)
+
+        # Media descriptions.
+        self.assertEqual(len(sdp.media), 2)
+
+        audio = sdp.media[0]
+        self.assertEqual(audio.media, "audio")
+        self.assertEqual(audio.port, 49172)
+        self.assertEqual(audio.proto, "RTP/AVP")
+        self.assertEqual(audio.formats, ["0", "8"])
+        self.assertEqual(audio.connection, None)
+        self.assertEqual(
+            audio.attributes, [("rtpmap", "0 PCMU/8000"), ("rtpmap", "8 PCMA/8000")]
+        )
+
+        video = sdp.media[1]
+        self.assertEqual(video.media, "video")
+        self.assertEqual(video.port, 51372)
+        self.assertEqual(
+            video.connection,
+            Connection(address="2001:db8::2", address_type="IP6"),
+        )
+
+        self.assertEqual(bytes(sdp), SDP)
+
+    def test_rewrite(self) -> None:
+        sdp = SessionDescription.parse(SDP.replace(b"\r\n", b"\n"))
+        sdp.connection = Connection(address="203.0.113.1")
+        sdp.media[0].port = 30000
+        sdp.media[0].connection = Connection(address="203.0.113.2")
+        sdp.media[1].port = 30002
+        sdp.media[1].connection = None
+
+        # Modified lines keep their line ending, new lines use CRLF.
+        self.assertEqual(
+            bytes(sdp),
+            b"""v=0
+o=alice 2890844526 2890844526 IN IP4 atlanta.com
+s=Session SDP
+c=IN IP4 203.0.113.1
+t=0 0
+a=sendrecv
+m=audio 30000 RTP/AVP 0 8
+c=IN IP4 203.0.113.2\r
+a=rtpmap:0 PCMU/8000
+a=rtpmap:8 PCMA/8000
+m=video 30002/2 RTP/AVP 31
+a=rtpmap:31 H261/90000
+""",
+        )
+
+    def test_add_connection(self) -> None:
+        sdp = SessionDescription.parse(b"v=0\r\nm=audio 0 RTP/AVP 0\r\n")
+        sdp.connection = Connection(address="192.0.2.1")
+        sdp.media[0].connection = Connection(address="192.0.2.2")
+        sdp.media[0].connection = Connection(address="192.0.2.3")
+        self.assertEqual(
+            bytes(sdp),
+            b"v=0\r\nc=IN IP4 192.0.2.1\r\nm=audio 0 RTP/AVP 0\r\n"
+            b"c=IN IP4 192.0.2.3\r\n",
+        )
+
+    def test_add_connection_no_final_line_ending(self) -> None:
+        sdp = SessionDescription.parse(b"v=0\r\nm=audio 4000 RTP/AVP 0")
+        sdp.media[0].connection = Connection(address="192.0.2.1")
+        self.assertEqual(
+            bytes(sdp),
+            b"v=0\r\nm=audio 4000 RTP/AVP 0\r\nc=IN IP4 192.0.2.1\r\n",
+        )
+
+    def test_no_media(self) -> None:
+        sdp = SessionDescription.parse(memoryview(b"v=0\r\ns=-\r\n"))
+        self.assertEqual(sdp.media, [])
+        self.assertEqual(sdp.connection, None)
+        with self.assertRaises(KeyError):
+            sdp.origin
+        self.assertEqual(bytes(sdp), b"v=0\r\ns=-\r\n")
+
+    def test_from_message(self) -> None:
+        request = Request("INVITE", URI.parse("sip:bob@biloxi.com"), body=SDP)
+        with self.assertRaises(ValueError) as cm:
+            SessionDescription.from_message(request)
+        self.assertEqual(str(cm.exception), "Message body is not SDP")
+
+        request.content_type = MediaType(mime_type="application/sdp")
+        sdp = SessionDescription.from_message(request)
+        self.assertEqual(bytes(sdp), SDP)
+
+    def test_invalid(self) -> None:
+        for data in [b"", b"s=-\r\n", b"v=0\r\n\r\n", b"v=0\r\nS=-\r\n", b"v=0\r\nfoo"]:
+            with self.assertRaises(ValueError) as cm:
+                SessionDescription.parse(data)
+            self.assertEqual(str(cm.exception), "SDP is not valid")
+
+        sdp = SessionDescription.parse(b"v=0\r\nm=audio 0\r\n")
+        with self.assertRaises(ValueError) as cm:
+            sdp.media[0].port
+        self.assertEqual(str(cm.exception), "SDP is not valid")
@@ -3,9 +3,10 @@
 # Distributed under the 2-clause BSD license
 #
 
+import dataclasses
 import unittest
 
-from sipmessage import Parameters, Via
+from sipmessage import Parameters, ParseError, Via
 
 
 class ViaTest(unittest.TestCase):
@@ -37,6 +38,21 @@ class ViaTest(unittest.TestCase):
             "received=80.200.136.90;rport=49940",
         )
 
+    def test_str_cached(self) -> None:
+        via = Via(
+            transport="UDP",
+            host="pc33.atlanta.com",
+            parameters=Parameters(branch="z9hG4bKnashds8"),
+        )
+        self.assertIs(str(via), str(via))
+
+        # A modified copy is rendered anew.
+        via2 = dataclasses.replace(via, port=5060)
+        self.assertEqual(
+            str(via2), "SIP/2.0/UDP pc33.atlanta.com:5060;branch=z9hG4bKnashds8"
+        )
+        self.assertEqual(str(via), "SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKnashds8")
+
     def test_hostname_and_port(self) -> None:
         via = Via.parse(
             "SIP/2.0/WSS T8trJdbBz7r6.invalid:5060;branch=z9hG4bKYJHC9fb;"
@@ -99,9 +115,8 @@ class ViaTest(unittest.TestCase):
                 parameters=Parameters(branch="z9hG4bK-.!f*_+`'~"),
             ),
         )
-        # FIXME: this is unnecessarily quoted
         self.assertEqual(
-            str(via), "SIP/2.0/TCP host1.example.com;branch=z9hG4bK-.%21f%2A_%2B%60%27~"
+            str(via), "SIP/2.0/TCP host1.example.com;branch=z9hG4bK-.!%66*_+`'~"
         )
 
     def test_rfc4475_wsinv(self) -> None:
@@ -122,6 +137,24 @@ class ViaTest(unittest.TestCase):
             Via.parse("SIP/2.0/UDP 192.0.2.15,")
         self.assertEqual(str(cm.exception), "Via is not valid")
 
+    def test_splice_parameters(self) -> None:
+        value = Via.splice_parameters(
+            "SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKnashds8;rport, "
+            "SIP/2.0/UDP bigbox3.site3.atlanta.com;branch=z9hG4bK77ef4c2312983.1",
+            received="192.0.2.1",
+            rport="5060",
+        )
+        self.assertEqual(
+            value,
+            "SIP/2.0/UDP pc33.atlanta.com;branch=z9hG4bKnashds8;rport=5060;"
+            "received=192.0.2.1, "
+            "SIP/2.0/UDP bigbox3.site3.atlanta.com;branch=z9hG4bK77ef4c2312983.1",
+        )
+
+        with self.assertRaises(ValueError) as cm:
+            Via.splice_parameters("", received="192.0.2.1")
+        self.assertEqual(str(cm.exception), "Via is not valid")
+
 
 class ViaParseManyTest(unittest.TestCase):
     def test_simple(self) -> None:
@@ -146,11 +179,43 @@ class ViaParseManyTest(unittest.TestCase):
         )
 
     def test_trailing_garbage(self) -> None:
-        with self.assertRaises(ValueError) as cm:
+        with self.assertRaises(ParseError) as cm:
             Via.parse_many("SIP/2.0/UDP 192.0.2.15$")
         self.assertEqual(str(cm.exception), "Via is not valid")
+        self.assertEqual(cm.exception.expected, "Via")
+        self.assertEqual(cm.exception.offset, 22)
+
+    def test_trailing_garbage_whitespace(self) -> None:
+        # The offset is in the raw value, not the simplified one.
+        for value, offset in [
+            ("SIP/2.0/UDP   192.0.2.15\t\t$", 26),
+            ("  SIP/2.0/UDP 192.0.2.15$", 24),
+            ("SIP/2.0/UDP 192.0.2.15, \t", 25),
+        ]:
+            with self.assertRaises(ParseError) as cm:
+                Via.parse_many(value)
+            self.assertEqual(cm.exception.expected, "Via")
+            self.assertEqual(cm.exception.offset, offset)
 
     def test_trailing_comma(self) -> None:
         with self.assertRaises(ValueError) as cm:
             Via.parse_many("SIP/2.0/UDP 192.0.2.15,")
         self.assertEqual(str(cm.exception), "Via is not valid")
+
+    def test_errors(self) -> None:
+        errors: list[ParseError] = []
+        vias = Via.parse_many(
+            "SIP/2.0/UDP 192.0.2.15, $, SIP/2.0/TCP 192.0.2.16 $, SIP/2.0/TLS h",
+            errors,
+        )
+        self.assertEqual(
+            vias,
+            [
+                Via(transport="UDP", host="192.0.2.15"),
+                Via(transport="TLS", host="h"),
+            ],
+        )
+        self.assertEqual(
+            [(error.expected, error.offset) for error in errors],
+            [("Via", 24), ("Via", 50)],
+        )